@@ -0,0 +1,251 @@
+// Browser side update of the beam graphs. The server sends the unit load curves and the geometry of the beam
+// (update_graph in beam_app.py); the force magnitude and the material are applied here, and only the data
+// arrays, titles, axis ranges and markers of the current figures are replaced.
+// This mirrors scale_curves and fill_figures in beam_app.py.
+// While the force location slider is dragged, coarse preview curves are drawn in the same way (see
+// update_preview in beam_app.py).
+(function () {
+    // arrays arrive either as JSON lists or as typed array encodings {dtype: 'f8' or 'f4', bdata: base64 of the
+    // little endian values} (see beam_transport.py)
+    function decode(values) {
+        if (!values || values.bdata === undefined) {
+            return values;
+        }
+        var bytes = atob(values.bdata);
+        var buffer = new Uint8Array(bytes.length);
+        for (var i = 0; i < bytes.length; i++) {
+            buffer[i] = bytes.charCodeAt(i);
+        }
+        return Array.from(values.dtype === 'f4' ? new Float32Array(buffer.buffer) : new Float64Array(buffer.buffer));
+    }
+
+    function decode_all(curves) {
+        var decoded = {};
+        Object.keys(curves).forEach(function (name) {
+            decoded[name] = decode(curves[name]);
+        });
+        return decoded;
+    }
+
+    // ids of the inputs that triggered the running callback
+    function triggered() {
+        var context = window.dash_clientside.callback_context;
+        return ((context && context.triggered) || []).map(function (input) {
+            return input.prop_id;
+        });
+    }
+
+    // the force location slider is being dragged away from its value (see update_preview in beam_app.py)
+    function dragging(drag_value, value) {
+        return drag_value !== undefined && drag_value !== null && drag_value !== value;
+    }
+
+    // a preview request waits this long for its answer before the next one is sent anyway, in ms
+    var PREVIEW_TIMEOUT = 2000;
+    // busy: {id, sent} of the request in flight, pending: the newest position not sent yet, drawn: the
+    // figures show a preview
+    var preview_state = {id: 0, busy: null, pending: null, drawn: false};
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        beam: {
+            // Position of the next preview, at most one request in flight. Positions passed while a request
+            // is answered are coalesced into the newest one, and dropped when the drag ends.
+            request_preview: function (drag_value, preview, value) {
+                var no_update = window.dash_clientside.no_update;
+                var inputs = triggered();
+                if (preview && preview_state.busy && preview.id === preview_state.busy.id) {
+                    preview_state.busy = null;
+                }
+                if (inputs.indexOf('force-location.drag_value') >= 0) {
+                    preview_state.pending = dragging(drag_value, value) ? drag_value : null;
+                }
+                if (preview_state.pending === null ||
+                    (preview_state.busy && Date.now() - preview_state.busy.sent < PREVIEW_TIMEOUT)) {
+                    return no_update;
+                }
+                preview_state.id += 1;
+                preview_state.busy = {id: preview_state.id, sent: Date.now()};
+                var a = preview_state.pending;
+                preview_state.pending = null;
+                return {id: preview_state.id, a: a};
+            },
+
+            rescale_figures: function (data, material, force, bands, preview, drag_value, moduli, value) {
+                var no_update = window.dash_clientside.no_update;
+                var inputs = triggered();
+                var drawn = false;
+                if (inputs.length && inputs.every(function (input) {
+                    return input === 'preview-data.data' || input === 'force-location.drag_value';
+                })) {
+                    if (dragging(drag_value, value)) {
+                        // a preview while the drag goes on, the newest answer even if the slider moved since
+                        if (inputs.indexOf('preview-data.data') < 0 || !preview || !preview.data) {
+                            return no_update;
+                        }
+                        data = preview.data;
+                        drawn = true;
+                    } else if (!(preview_state.drawn && data && data.curves.a === value)) {
+                        // a preview answered after the release is stale, the full curves follow from beam-data
+                        return no_update;
+                    }
+                    // else back at the released position: the full curves of data are still current
+                }
+                var F = parseFloat(force);
+                if (!data || isNaN(F) || !(material in moduli)) {
+                    return no_update;
+                }
+                preview_state.drawn = drawn;
+                var curves = data.curves;
+                var geometry = data.geometry;
+                var modulus = moduli[material];
+                var x = decode(curves.x);
+                var n = x.length;
+                var main = decode_all(curves.main);
+                var extra = curves.extra && decode_all(curves.extra);
+
+                function combine(name, scale) {
+                    var values = new Array(n);
+                    for (var i = 0; i < n; i++) {
+                        values[i] = (F * main[name][i] + (extra ? extra[name][i] : 0)) * scale;
+                    }
+                    return values;
+                }
+
+                var scaled = {
+                    deflection: combine('deflection_EI', 1 / (modulus * curves.I)),
+                    shear_stress: combine('shear_stress', 1),
+                    bending_stress: combine('bending_stress', 1),
+                    von_mises: new Array(n)
+                };
+                for (var i = 0; i < n; i++) {
+                    var s = scaled.bending_stress[i];
+                    var t = scaled.shear_stress[i];
+                    scaled.von_mises[i] = Math.sqrt(s * s + 3 * t * t);
+                }
+
+                function peak(name) {
+                    if (curves.peaks) {
+                        var scale = {deflection: F / modulus, von_mises: Math.abs(F)}[name];
+                        return [curves.peaks[name][0], curves.peaks[name][1] * (scale === undefined ? F : scale)];
+                    }
+                    var best = 0;
+                    for (var i = 1; i < n; i++) {
+                        if (Math.abs(scaled[name][i]) > Math.abs(scaled[name][best])) {
+                            best = i;
+                        }
+                    }
+                    return [x[best], scaled[name][best]];
+                }
+
+                // same text as '{:.3e}' in Python, which pads the exponent to two digits
+                function exponential(value) {
+                    return value.toExponential(3).replace(/e([+-])(\d)$/, 'e$10$2');
+                }
+
+                // new figure objects that share everything but the replaced parts with the current figures.
+                // the layouts are small apart from the updatemenus arrays, which are replaced below anyway.
+                function update(figure) {
+                    return {
+                        data: figure.data.map(function (trace) {
+                            return Object.assign({}, trace, {marker: Object.assign({}, trace.marker)});
+                        }),
+                        layout: JSON.parse(JSON.stringify(figure.layout))
+                    };
+                }
+
+                var figures = Array.prototype.slice.call(arguments, 8).map(update);
+                // envelope bands of the uncertainty analysis (update_uncertainty in beam_app.py), null for none
+                var band_x = bands ? decode(bands.x) : [];
+                var span = geometry.span;
+                var graphs = [
+                    [figures[0], 'Deflection', 'deflection', 'm'],
+                    [figures[1], 'Shear Stress', 'shear_stress', 'Pa'],
+                    [figures[2], 'Bending Stress', 'bending_stress', 'Pa'],
+                    [figures[3], 'Von Mises Stress', 'von_mises', 'Pa']
+                ];
+                graphs.forEach(function (graph) {
+                    var p = peak(graph[2]);
+                    var layout = graph[0].layout;
+                    layout.title.text = graph[1] + '<br><sup>max ' + exponential(p[1]) + ' ' + graph[3] +
+                        ' at x = ' + p[0].toFixed(3) + ' m</sup>';
+                    layout.xaxis.range = [0, span];
+                    graph[0].data[0].x = x;
+                    graph[0].data[0].y = scaled[graph[2]];
+                    var traces = graph[0].data;
+                    var lower = traces[traces.length - 2], upper = traces[traces.length - 1];
+                    lower.x = upper.x = band_x;
+                    lower.y = bands ? decode(bands[graph[2]][0]) : [];
+                    upper.y = bands ? decode(bands[graph[2]][1]) : [];
+                });
+
+                var Y = scaled.deflection;
+                var deflection = figures[0];
+                var marker = deflection.data[0].marker;
+                marker.color = Y;
+                marker.cmin = Math.min.apply(null, Y) * 2;
+                marker.cmax = Math.max.apply(null, Y);
+                deflection.data[1].x = [0, span];
+
+                // the section outline at every ring of the mesh, moved down by the deflection there. the stresses
+                // of the outline points are the stress curves times the factors of the section.
+                var deflection_3d = figures[4];
+                // the animation of the dynamic response (update_dynamics in beam_app.py) hides the static traces
+                // behind its own; its frames are gone with the new figure object, its traces and controls here
+                if (deflection_3d.data.length > 2) {
+                    deflection_3d.data = deflection_3d.data.slice(0, 2);
+                    deflection_3d.data.forEach(function (trace) {
+                        trace.visible = true;
+                    });
+                    deflection_3d.layout.title.text = '3D Deflection';
+                    deflection_3d.layout.updatemenus = deflection_3d.layout.updatemenus.slice(0, 1);
+                    deflection_3d.layout.updatemenus[0].visible = true;
+                    delete deflection_3d.layout.sliders;
+                }
+                var index = Math.min(curves.load_index, n - 1);
+                var mesh = deflection_3d.data[0], pressure_point = deflection_3d.data[1];
+                var section = geometry.section;
+                var rings = decode(curves.rings);
+                var m = section.y.length;
+                var vx = [], vy = [], vz = [], deflections = [], stresses = [], customdata = [];
+                rings.forEach(function (station) {
+                    for (var p = 0; p < m; p++) {
+                        var s = scaled.bending_stress[station] * section.normal[p];
+                        var t = scaled.shear_stress[station] * section.shear[p];
+                        var stress = Math.sqrt(s * s + 3 * t * t);
+                        vx.push(x[station]);
+                        vy.push(Y[station] + section.y[p]);
+                        vz.push(section.z[p]);
+                        deflections.push(Y[station]);
+                        stresses.push(stress);
+                        customdata.push([Y[station], stress]);
+                    }
+                });
+                // two triangles per outline edge between neighbouring rings (beam_field.mesh_faces)
+                var fi = [], fj = [], fk = [];
+                for (var r = 0; r < rings.length - 1; r++) {
+                    [0, 1].forEach(function (half) {
+                        for (var p = 0; p < m; p++) {
+                            var a = r * m + p, b = r * m + (p + 1) % m;
+                            fi.push(half ? b : a);
+                            fj.push(half ? b + m : b);
+                            fk.push(a + m);
+                        }
+                    });
+                }
+                Object.assign(mesh, {x: vx, y: vy, z: vz, i: fi, j: fj, k: fk, intensity: deflections,
+                                     customdata: customdata});
+                pressure_point.x = [curves.a];
+                pressure_point.y = [Y[index]];
+                pressure_point.customdata = [scaled.von_mises[index]];
+                var scene = deflection_3d.layout.scene;
+                scene.xaxis.range = [-1, span];
+                scene.yaxis.range = [-1 * span, span];
+                var intensities = [deflections, stresses];
+                deflection_3d.layout.updatemenus[0].buttons.forEach(function (button, i) {
+                    button.args[0].intensity = [intensities[i]];
+                });
+                return figures;
+            }
+        }
+    });
+})();
@@ -0,0 +1,156 @@
+import numpy as np
+from flask import Blueprint, jsonify, request
+
+from beam_core import E, _bending_moment, _deflection_EI, _shear_force, as_section
+from beam_loads import LoadCase, as_load
+from beam_metrics import instrument, span
+from beam_transport import DTYPES, encode_array
+
+error_msg_body = 'The request body must be a JSON object with a list of cases'
+error_msg_case = 'Invalid case {}: '
+error_msg_stations = "Give either 'x' (a list of stations in m) or 'n_stations'"
+error_msg_size = 'Request too large: '
+
+# JSON evaluation endpoint on the Flask server of the app (registered by beam_app.create_app).
+#
+# POST /api/evaluate with a JSON body:
+#   cases: list of {'F', 'a', 'L', 'material', 'support_type', 'xsection', 'loads' (optional)}. xsection is a
+#          dict such as {'type': 'circle', 'r': 0.05}, loads a list of additional loads in the dict form of
+#          beam_loads.as_load.
+#   x: stations in m, shared by every case and clipped to each beam, or
+#   n_stations: number of evenly spaced stations from 0 to L of each beam (default 101).
+#   encoding (optional): 'f8' or 'f4' returns every array as a base64 typed array (see beam_transport)
+#                        instead of JSON lists.
+#
+# The response holds one (cases, stations) array per quantity, row i belonging to cases[i]:
+#   {'x', 'deflection', 'shear_force', 'bending_moment', 'shear_stress', 'bending_stress', 'von_mises'}.
+# The point loads of the cases of the same support type are evaluated together as one (cases, stations)
+# broadcast, the additional loads of each case are added to them.
+# Invalid requests get a 400 response with {'error': message}, requests over the limits below a 413.
+
+MAX_REQUEST_BYTES = 16 * 2 ** 20
+MAX_CASES = 10000
+MAX_STATIONS = 2001
+# cases times stations. every quantity of a full response is then at most 8 MB as float64.
+MAX_VALUES = 10 ** 6
+DEFAULT_STATIONS = 101
+
+QUANTITIES = ('x', 'deflection', 'shear_force', 'bending_moment', 'shear_stress', 'bending_stress', 'von_mises')
+
+api = Blueprint('beam_api', __name__)
+
+
+class RequestTooLarge(Exception):
+    pass
+
+
+# (F, a, L, E * I, A, S, support_type, load_case) of one case. load_case: LoadCase of the additional loads, or None
+def parse_case(case):
+    try:
+        section = as_section(case['xsection'])
+        F, a, L = float(case['F']), float(case['a']), float(case['L'])
+        material = case['material']
+        support_type = case['support_type']
+        loads = tuple(as_load(load) for load in case.get('loads') or ())
+    except KeyError as error:
+        raise Exception('missing ' + str(error))
+    except (TypeError, ValueError) as error:
+        raise Exception(str(error))
+    if material not in E:
+        raise Exception('invalid material ' + str(material))
+    if support_type not in ('cantilever', 'simply_supported'):
+        raise Exception('invalid support_type ' + str(support_type))
+    if not (np.isfinite(F) and np.isfinite(L) and 0.0 <= a <= L):
+        raise Exception('F and L must be finite and a between 0 and L')
+    load_case = LoadCase(loads, L, support_type) if loads else None
+    return F, a, L, E[material] * section.I, section.A, section.S, support_type, load_case
+
+
+# Evaluates every case at its stations. Returns a dict of (cases, stations) arrays keyed by QUANTITIES.
+def evaluate_cases(cases, x=None, n_stations=None):
+    if not isinstance(cases, list):
+        raise Exception(error_msg_body)
+    if len(cases) > MAX_CASES:
+        raise RequestTooLarge(error_msg_size + '{} cases, at most {}'.format(len(cases), MAX_CASES))
+    if x is not None and n_stations is not None:
+        raise Exception(error_msg_stations)
+    if x is not None:
+        x = np.asarray(x, dtype=float)
+        if x.ndim != 1 or not np.all(np.isfinite(x)):
+            raise Exception(error_msg_stations)
+        n = len(x)
+    else:
+        n = DEFAULT_STATIONS if n_stations is None else int(n_stations)
+        if n < 2:
+            raise Exception(error_msg_stations)
+    if n > MAX_STATIONS or len(cases) * n > MAX_VALUES:
+        raise RequestTooLarge(error_msg_size + '{} cases x {} stations, at most {} stations and {} values'.format(
+            len(cases), n, MAX_STATIONS, MAX_VALUES))
+
+    with span('api_evaluate', 'parse'):
+        parsed = []
+        for i, case in enumerate(cases):
+            try:
+                parsed.append(parse_case(case))
+            except Exception as error:
+                raise Exception(error_msg_case.format(i) + str(error))
+    with span('api_evaluate', 'compute'):
+        return _evaluate_parsed(parsed, x, n)
+
+
+# the result arrays of evaluate_cases for the cases parsed by parse_case, at the stations x (or n per beam)
+def _evaluate_parsed(parsed, x, n):
+    results = {name: np.empty((len(parsed), n)) for name in QUANTITIES[:4]}
+    F, a, L, EI, A, S = (np.array([p[k] for p in parsed], dtype=float).reshape(-1, 1) for k in range(6))
+    X = np.clip(x[None, :], 0.0, L) if x is not None else L * np.linspace(0.0, 1.0, n)
+    results['x'][:] = X
+
+    # the point load of every case as one broadcast per support type, the additional loads added on top
+    for support_type in ('cantilever', 'simply_supported'):
+        rows = [i for i, p in enumerate(parsed) if p[6] == support_type]
+        if not rows:
+            continue
+        args = (F[rows], X[rows], a[rows], L[rows], support_type)
+        results['deflection'][rows] = _deflection_EI(*args) / EI[rows]
+        results['shear_force'][rows] = _shear_force(*args)
+        results['bending_moment'][rows] = _bending_moment(*args)
+
+    for i, p in enumerate(parsed):
+        if p[7] is not None:
+            V, M, EIy = p[7].superpose(X[i])
+            results['shear_force'][i] += V
+            results['bending_moment'][i] += M
+            results['deflection'][i] += EIy / p[3]
+
+    results['shear_stress'] = results['shear_force'] / A
+    results['bending_stress'] = results['bending_moment'] / S
+    results['von_mises'] = np.sqrt(results['bending_stress'] ** 2 + 3 * results['shear_stress'] ** 2)
+    return results
+
+
+@api.route('/api/evaluate', methods=['POST'])
+@instrument('api_evaluate')
+def evaluate():
+    if request.content_length is None:
+        return jsonify(error='Content-Length is required'), 411
+    if request.content_length > MAX_REQUEST_BYTES:
+        return jsonify(error=error_msg_size + '{} bytes, at most {}'.format(request.content_length,
+                                                                           MAX_REQUEST_BYTES)), 413
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify(error=error_msg_body), 400
+    encoding = body.get('encoding')
+    if encoding is not None and encoding not in DTYPES:
+        return jsonify(error='encoding must be one of ' + ', '.join(DTYPES)), 400
+
+    try:
+        results = evaluate_cases(body.get('cases'), body.get('x'), body.get('n_stations'))
+    except RequestTooLarge as error:
+        return jsonify(error=str(error)), 413
+    except Exception as error:
+        return jsonify(error=str(error)), 400
+
+    with span('api_evaluate', 'serialize'):
+        if encoding:
+            return jsonify({name: encode_array(values, encoding) for name, values in results.items()})
+        return jsonify({name: values.tolist() for name, values in results.items()})
@@ -0,0 +1,1667 @@
+import copy
+import json
+import logging
+import os
+import time
+
+import dash
+import numpy as np
+import plotly.graph_objects as go
+from dash import dcc
+from dash import html
+from dash.dependencies import ALL, ClientsideFunction, Input, Output, State
+from dash.exceptions import PreventUpdate
+from flask import Response, request
+
+from beam_api import api
+from beam_cache import DiskCache, LRUCache
+from beam_core import (ALLOWABLE_STRESS, E, SECTION_DIMS, Section, _bending_moment, _deflection_EI, _shear_force,
+                       as_section, clip_stations, evaluate_case, evaluate_loads)
+from beam_design import design_sections
+from beam_fem import BeamModel, preset_supports
+from beam_field import MAX_TRIANGLES, mesh_faces, mesh_rings, section_factors, section_outline
+from beam_influence import InfluenceSurface, unit_response
+from beam_jobs import CANCELLED, DONE, FAILED, QUEUED, RUNNING, JobManager
+from beam_materials import compare_materials, load_materials, register_materials
+from beam_modal import load_history, modal_model
+from beam_loads import DistributedLoad, LoadCase, MomentLoad, PointLoad, as_load, clip_load, load_to_dict
+from beam_metrics import REGISTRY, instrument, span
+from beam_response import BeamResponse
+from beam_sampling import adaptive_stations, lttb_indices
+from beam_store import DesignStore
+from beam_transport import decode_arrays, encode_arrays
+from beam_uncertainty import monte_carlo_spec
+
+try:
+    import flask_compress
+except ImportError:
+    flask_compress = None
+
+logger = logging.getLogger(__name__)
+
+#######################################################################
+# Application
+#######################################################################
+
+# maximum number of stations per trace, independent of the beam length
+MAX_STATIONS = 2000
+# optional LTTB downsampling of the stations sent to the browser. None sends every station.
+DISPLAY_POINTS = None
+# encoding of the arrays sent to the browser: 'f8' or 'f4' typed arrays (see beam_transport), None for JSON lists
+ARRAY_ENCODING = 'f8'
+# largest Monte Carlo run of the uncertainty callback, about 2 s in the server process
+UNCERTAINTY_MAX_SAMPLES = 10 ** 6
+# largest run as a background job (see JOBS), about 3 minutes
+UNCERTAINTY_MAX_JOB_SAMPLES = 10 ** 8
+# seconds between two progress polls of a background job
+JOB_POLL_INTERVAL = 0.5
+# percentiles of the envelope bands drawn on the graphs
+UNCERTAINTY_PERCENTILES = (5.0, 50.0, 95.0)
+# stations of the preview drawn while the force location slider is dragged (see update_preview)
+PREVIEW_STATIONS = 101
+# time steps and stations of the dynamic response (see update_dynamics), the frames of its animation in the 3D
+# view and the triangles of its mesh, which every frame carries
+DYNAMIC_STEPS = 10000
+DYNAMIC_STATIONS = 1000
+DYNAMIC_FRAMES = 60
+DYNAMIC_TRIANGLES = 2000
+# milliseconds per frame of the animation
+DYNAMIC_FRAME_DURATION = 50
+# the animation draws the largest deflection at this share of the span, unless it is larger already
+DYNAMIC_SCALE = 0.1
+
+# computed response arrays and the unit curves sent to the browser, keyed on the normalized inputs
+# (see normalize_inputs)
+response_cache = LRUCache(maxsize=256, ttl=3600)
+figure_cache = LRUCache(maxsize=64, ttl=3600)
+# with the directory BEAM_CACHE, both are shared by every worker process of a server (see beam_cache.DiskCache),
+# so each process does not compute the same curves again. A directory under /dev/shm keeps them in memory.
+if os.environ.get('BEAM_CACHE'):
+    response_cache = DiskCache(os.path.join(os.environ['BEAM_CACHE'], 'response'), maxsize=4096, ttl=3600)
+    figure_cache = DiskCache(os.path.join(os.environ['BEAM_CACHE'], 'figure'), maxsize=1024, ttl=3600)
+# influence surfaces keyed on (support_type, L). a surface is about 5 MB.
+surface_cache = LRUCache(maxsize=8)
+# precomputed influence surfaces (see beam_store) in the directory BEAM_STORE, shared by every process that
+# opens it. None computes every surface in the process, as does a store that cannot be read.
+STORE = None
+if os.environ.get('BEAM_STORE'):
+    try:
+        STORE = DesignStore(os.environ['BEAM_STORE'])
+    except Exception:
+        logger.warning('ignoring the design store %s', os.environ['BEAM_STORE'], exc_info=True)
+# background jobs (see beam_jobs) in the directory BEAM_JOBS, shared by every process that opens it, for the
+# uncertainty analysis. None runs it in the request.
+JOBS = JobManager(os.environ['BEAM_JOBS']) if os.environ.get('BEAM_JOBS') else None
+# materials of the file BEAM_MATERIALS (see beam_materials.load_materials), added to the built-in ones in the
+# menus and analyses of the app
+if os.environ.get('BEAM_MATERIALS'):
+    register_materials(load_materials(os.environ['BEAM_MATERIALS']))
+MATERIAL_LABELS = {'aluminum': 'Aluminum', 'wood': 'Wood', 'titanium': 'Titanium', 'steel': 'Steel'}
+
+
+def cache_stats():
+    return {'response': response_cache.stats(), 'figure': figure_cache.stats(), 'surface': surface_cache.stats()}
+
+
+def _cache_gauges():
+    return {(cache, stat): value for cache, stats in cache_stats().items() for stat, value in stats.items()}
+
+
+REGISTRY.gauge('beam_cache', 'Statistics of the caches of the app (see beam_cache.LRUCache.stats), per process.',
+               ('cache', 'stat'), _cache_gauges)
+# Latency of every HTTP request by route. For the Dash callbacks this includes the JSON serialization of the
+# outputs by Dash, which happens after the callback returns.
+REQUESTS = REGISTRY.histogram('beam_request_seconds', 'Time spent answering HTTP requests.', ('route', 'status'))
+# the metrics are only served to requests from this machine unless this is True
+METRICS_ALLOW_REMOTE = False
+
+
+# the images of the support types and sections
+IMAGE_URL = 'https://raw.githubusercontent.com/bokilenator/CS-519-Beam-Bending-Visualization/main/'
+XSECTION_IMAGES = {
+    'rectangular': IMAGE_URL + 'rect_xsection.png',
+    'circle': IMAGE_URL + 'circle_xsection.png',
+}
+# most triangles of the deformed beam in the 3D view, whatever the length of the beam (see beam_field.mesh_rings)
+MESH_TRIANGLES = MAX_TRIANGLES
+
+
+# Layouts and traces of the five graphs with empty data, built once at startup (FIGURE_TEMPLATES) and used as
+# the initial figures of the graphs. Updates only replace the parts listed by figure_geometry and the data
+# arrays (see fill_figures and assets/beam_bending.js), so no plotly objects are built per callback.
+def figure_templates(L=10.0):
+    span = L
+    layout_deflection = go.Layout(
+        title={
+            'text': 'Deflection',
+            'y': 0.85,
+            'x': 0.5,
+            'xanchor': 'center',
+            'yanchor': 'top'},
+        titlefont=dict(size=15),
+        yaxis=dict(
+            title='Deflection (m)',
+            showexponent='all',
+            exponentformat='e'
+        ),
+        xaxis=dict(
+            title='Distance (m)',
+            range=[0, span]
+        ),
+        showlegend=False
+    )
+    layout_deflection_3d = go.Layout(
+        title={
+            'text': '3D Deflection',
+            'y': 0.85,
+            'x': 0.5,
+            'xanchor': 'center',
+            'yanchor': 'top'},
+        titlefont=dict(size=15),
+        scene=dict(
+            xaxis=dict(
+                title='Distance (m)',
+                range=[-1, span]
+            ),
+            yaxis=dict(
+                title='Deflection (m)',
+                showexponent='all',
+                exponentformat='e',
+                range=[-1 * span, span]
+            ),
+            zaxis=dict(
+                title='',
+                tickvals=[]
+            )
+        ),
+        showlegend=False,
+        height=600
+    )
+
+    layout_shear_stress = go.Layout(
+        title={
+            'text': 'Shear Stress',
+            'y': 0.85,
+            'x': 0.5,
+            'xanchor': 'center',
+            'yanchor': 'top'},
+        titlefont=dict(size=15),
+        yaxis=dict(
+            title='Shear Stress (Pascal)',
+            showexponent='all',
+            exponentformat='e'
+        ),
+        xaxis=dict(
+            title='Distance (m)',
+            range=[0, span]
+        ),
+        showlegend=False
+    )
+
+    layout_bending_stress = go.Layout(
+        title={
+            'text': 'Bending Stress',
+            'y': 0.85,
+            'x': 0.5,
+            'xanchor': 'center',
+            'yanchor': 'top'},
+        titlefont=dict(size=15),
+        yaxis=dict(
+            title='Bending Stress (Pascal)',
+            showexponent='all',
+            exponentformat='e'
+        ),
+        xaxis=dict(
+            title='Distance (m)',
+            range=[0, span]
+        ),
+        showlegend=False
+    )
+
+    layout_vonmises_stress = go.Layout(
+        title={
+            'text': 'Von Mises Stress',
+            'y': 0.85,
+            'x': 0.5,
+            'xanchor': 'center',
+            'yanchor': 'top'},
+        titlefont=dict(size=15),
+        yaxis=dict(
+            title='Von Mises Stress (Pascal)',
+            showexponent='all',
+            exponentformat='e'
+        ),
+        xaxis=dict(
+            title='Distance (m)',
+            range=[0, span]
+        ),
+        showlegend=False
+    )
+
+    line_deflection = go.Scatter(
+        x=[],
+        y=[],
+        mode='markers',
+        name='Deflection',
+        marker=dict(
+            size=8,
+            color=[],
+            colorbar=dict(
+                title='Deflection (m)'
+            ),
+            colorscale="thermal"
+        ),
+        line_color='orange',
+        fill='tonexty',
+        fillcolor='rgba(255, 255, 0, 0.1)'
+    )
+
+    line_shear_stress = go.Scatter(
+        x=[],
+        y=[],
+        mode='lines',
+        name='Shear Stress',
+        line_color='orange',
+        fill='tonexty',
+        fillcolor='rgba(255, 255, 0, 0.1)'
+    )
+
+    line_bending_stress = go.Scatter(
+        x=[],
+        y=[],
+        mode='lines',
+        name='Bending Stress',
+        line_color='orange',
+        fill='tonexty',
+        fillcolor='rgba(255, 255, 0, 0.1)'
+    )
+
+    line_vonmises_stress = go.Scatter(
+        x=[],
+        y=[],
+        mode='lines',
+        name='Von Mises Stress',
+        line_color='orange',
+        fill='tonexty',
+        fillcolor='rgba(255, 255, 0, 0.1)'
+    )
+
+    # the deformed beam as a mesh of the section outline swept along the deflected axis, colored by the
+    # deflection or by the von Mises stress over the section (see fill_figures)
+    mesh_3d_deflection = go.Mesh3d(
+        x=[], y=[], z=[], i=[], j=[], k=[],
+        intensity=[],
+        colorscale='thermal',
+        colorbar=dict(
+            title='Deflection (m)',
+            exponentformat='e',
+        ),
+        customdata=[],
+        hovertemplate="distance: %{x} m<br>" +
+                      "deflection: %{customdata[0]:.3e} m<br>" +
+                      "stress: %{customdata[1]:.3e} Pa<extra></extra>"
+    )
+    pressure_point_width = 25
+    pressure_point_symbol = "x"
+    pressure_point = go.Scatter3d(
+        x=[], y=[], z=[0],
+        marker=dict(
+            size=pressure_point_width,
+            color='rgba(135, 206, 250, 0.8)',
+            symbol=pressure_point_symbol
+        ),
+        hovertemplate="<b>Force Location</b><br>" +
+                      "distance: %{x} m<br>" +
+                      "deflection: %{y:.2f} m<br>" +
+                      "stress: %{customdata:.2f} Pa<extra></extra>",
+        customdata=[]
+    )
+
+    axis = go.Scatter(
+        x=[0, span],
+        y=[0, 0],
+        mode='lines',
+        line_color='black'
+    )
+
+    # envelope band of the uncertainty analysis, the last two traces of each 2D graph (empty without one)
+    def band():
+        lower = go.Scatter(
+            x=[],
+            y=[],
+            mode='lines',
+            name='lower percentile',
+            line=dict(width=1, color='rgba(65, 105, 225, 0.6)', dash='dot')
+        )
+        upper = go.Scatter(
+            x=[],
+            y=[],
+            mode='lines',
+            name='upper percentile',
+            line=dict(width=1, color='rgba(65, 105, 225, 0.6)', dash='dot'),
+            fill='tonexty',
+            fillcolor='rgba(65, 105, 225, 0.15)'
+        )
+        return [lower, upper]
+
+    deflection = go.Figure(data=[line_deflection, axis] + band(), layout=layout_deflection)
+    shear = go.Figure(data=[line_shear_stress] + band(), layout=layout_shear_stress)
+    bending = go.Figure(data=[line_bending_stress] + band(), layout=layout_bending_stress)
+    vonmises = go.Figure(data=[line_vonmises_stress] + band(), layout=layout_vonmises_stress)
+    deflection_3d = go.Figure(data=[mesh_3d_deflection, pressure_point], layout=layout_deflection_3d)
+
+    deflection_3d.update_layout(
+        updatemenus=[
+            dict(
+                buttons=list([
+                    dict(
+                        args=[{"intensity": [[]], "colorbar.title.text": "Deflection (m)"}, [0]],
+                        label="Deflection",
+                        method="restyle"
+                    ),
+                    dict(
+                        args=[{"intensity": [[]], "colorbar.title.text": "Stress (Pa)"}, [0]],
+                        label="Von Mises",
+                        method="restyle"
+                    )
+                ]),
+                direction="down",
+                pad={"r": 10, "t": 10},
+                showactive=True,
+                x=0.14,
+                xanchor="left",
+                y=1.13,
+                yanchor="top"
+            )
+        ],
+        annotations=[
+            dict(text="Color bar:", showarrow=False,
+                 x=0, y=1.085, yref="paper", align="left")
+        ]
+    )
+
+    deflection.update_layout(transition_duration=50)
+
+    return tuple(figure.to_plotly_json() for figure in (deflection, shear, bending, vonmises, deflection_3d))
+
+
+# The parts of the templates that depend on the beam: the span sets the axis ranges, the section the outline
+# of the 3D mesh (y, z in m from the centroid) and the factors that give the normal and shear stress at the
+# outline points from the bending and shear stress curves (see beam_field.section_factors).
+def figure_geometry(L, xsection):
+    y, z = section_outline(xsection)
+    normal, shear = section_factors(xsection, y)
+    return {
+        'span': L,
+        'section': {'y': y.tolist(), 'z': z.tolist(), 'normal': normal.tolist(), 'shear': shear.tolist()},
+    }
+
+
+FIGURE_TEMPLATES = figure_templates()
+
+# (args, kwargs, function) of every callback, registered on each app made by create_app
+CALLBACKS = []
+CLIENTSIDE_CALLBACKS = []
+
+
+# registers a callback, counting its calls, errors and latency (see beam_metrics.instrument)
+def callback(*args, **kwargs):
+    def register(function):
+        function = instrument(expected=(PreventUpdate,))(function)
+        CALLBACKS.append((args, kwargs, function))
+        return function
+
+    return register
+
+
+def clientside_callback(function, *args, **kwargs):
+    CLIENTSIDE_CALLBACKS.append((function, args, kwargs))
+
+
+# App factory. Building the app loads dash, plotly and Flask, so beam_bending only calls this when the app
+# is first used (see beam_bending.get_app).
+def create_app():
+    # responses are gzip compressed when Flask-Compress is installed
+    app = dash.Dash(__name__, external_stylesheets=['https://codepen.io/chriddyp/pen/bWLwgP.css'],
+                    compress=flask_compress is not None)
+    app.layout = LAYOUT
+    for args, kwargs, function in CALLBACKS:
+        app.callback(*args, **kwargs)(function)
+    for function, args, kwargs in CLIENTSIDE_CALLBACKS:
+        app.clientside_callback(function, *args, **kwargs)
+    # JSON evaluation endpoint for other services (see beam_api)
+    app.server.register_blueprint(api)
+    app.server.add_url_rule('/metrics', 'metrics', metrics)
+    app.server.before_request(_start_request)
+    app.server.after_request(_end_request)
+    return app
+
+
+# WSGI application for multi-process servers, for example gunicorn -w 4 'beam_bending:create_server()'.
+# Every worker creates its own app; warm runs warm_up first, which with BEAM_CACHE only computes in the
+# first worker and reads the shared cache in the others.
+def create_server(warm=True):
+    app = create_app()
+    if warm:
+        warm_up()
+    return app.server
+
+
+# value (or data, for stores) of every component of the layout with an id, as the page first loads it
+def default_inputs(component=None, values=None):
+    component = LAYOUT if component is None else component
+    values = {} if values is None else values
+    if getattr(component, 'id', None) is not None:
+        values[component.id] = getattr(component, 'value', getattr(component, 'data', None))
+    children = getattr(component, 'children', None)
+    for child in children if isinstance(children, (list, tuple)) else [children]:
+        if hasattr(child, 'to_plotly_json'):
+            default_inputs(child, values)
+    return values
+
+
+# Runs the update of the graphs for the page as it first loads, so the first visitor finds it in the caches
+# (and the influence surface of the default beam built, with the default slider mode).
+def warm_up():
+    inputs = default_inputs()
+    with span('warm_up', 'compute'):
+        update_graph(*(inputs[name] for name in ('support-type', 'beam-length', 'xsection', 'force-location', 'b',
+                                                  'h', 'r', 't', 'tw', 'tf', 'extra-loads', 'slider-mode')))
+
+
+def _start_request():
+    request.environ['beam.start'] = time.perf_counter()
+
+
+def _end_request(response):
+    start = request.environ.get('beam.start')
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUESTS.observe(time.perf_counter() - start, route=route, status=response.status_code)
+    return response
+
+
+# Prometheus scrape endpoint (text format 0.0.4) with the metrics of this process
+def metrics():
+    if not METRICS_ALLOW_REMOTE and request.remote_addr not in ('127.0.0.1', '::1'):
+        return Response('Forbidden\n', status=403, mimetype='text/plain')
+    return Response(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+LAYOUT = html.Div(
+    [
+        #
+        # Header
+        #
+        html.H1(
+            children="Beam Bending Visualization",
+            style={
+                'textAlign': 'center',
+            }),
+        #
+        # Inputs
+        #
+        html.H2("Input Parameters"),
+        html.Div([
+            html.Div([
+                html.Label('Material', style={'color': 'black', 'fontSize': 20, 'font-weight': 'bold'}),
+                dcc.RadioItems(
+                    id='material-type',
+                    options=[{'label': MATERIAL_LABELS.get(name, name), 'value': name} for name in E],
+                    labelStyle={'display': 'block'},
+                    value='aluminum'
+                ),
+                dcc.Checklist(
+                    id='material-compare',
+                    options=[{'label': ' Compare all', 'value': 'compare'}],
+                    value=[]
+                ),
+            ], style={'width': '10%'}),
+            html.Div([
+                html.Label('Beam Length (m)', style={'color': 'black', 'fontSize': 20, 'font-weight': 'bold'}),
+                dcc.Input(id="beam-length", type="text", step=0.001, value=10.0, style={'width': '100%'}),
+                html.Label('Beam Cross Section', style={'color': 'black', 'fontSize': 20, 'font-weight': 'bold'}),
+                dcc.Dropdown(
+                    id='xsection',
+                    options=[
+                        {'label': 'Rectangular', 'value': 'rectangular'},
+                        {'label': 'Circle', 'value': 'circle'},
+                        {'label': 'Tube', 'value': 'tube'},
+                        {'label': 'Box', 'value': 'box'},
+                        {'label': 'I-Beam', 'value': 'i_beam'},
+                        {'label': 'T-Beam', 'value': 'tee'}
+                    ],
+                    value='rectangular'
+                ),
+                html.Div(id='xsection-container', children=
+                [
+                    dcc.Input(id="b", type="text", step=0.1, value=0.1),
+                    dcc.Input(id="h", type="text", step=0.1, value=0.1),
+                    dcc.Input(id="r", type="text", value=0.1),
+                    dcc.Input(id="t", type="text", value=0.01),
+                    dcc.Input(id="tw", type="text", value=0.01),
+                    dcc.Input(id="tf", type="text", value=0.01)
+                ]),
+            ], style={'paddingRight': 40, 'width': '20%'}),
+            html.Div([
+                html.Label('Force Magnitude (N)', style={'color': 'black', 'fontSize': 20, 'font-weight': 'bold'}),
+                dcc.Input(id="force-mag", type="text", step=0.001, value=50000.0, style={'width': '100%'}),
+                html.Br(),
+                html.Label('Force Location (x)', style={'color': 'black', 'fontSize': 20, 'font-weight': 'bold'}),
+                dcc.Slider(
+                    id='force-location',
+                    min=0,
+                    step=0.001,
+                    max=10,
+                    marks={
+                        0: {'label': '0m', 'style': {'color': '#77b0b1'}}},
+                    tooltip={"placement": "bottom", "always_visible": True},
+                    value=10,
+                    # value changes on release only, drag_value while dragging (see update_preview)
+                    updatemode='mouseup',
+                ),
+                dcc.Checklist(
+                    id='slider-mode',
+                    options=[{'label': ' Precomputed influence surface', 'value': 'influence'}],
+                    value=['influence']
+                )
+            ], style={'paddingRight': 40, 'width': '20%'}),
+            html.Div([
+                html.Label('Support Type', style={'color': 'black', 'fontSize': 20, 'font-weight': 'bold'}),
+                dcc.RadioItems(
+                    id='support-type',
+                    options=[
+                        {'label': 'Simply Supported', 'value': 'simply_supported'},
+                        {'label': 'Cantilever', 'value': 'cantilever'},
+                        {'label': 'Fixed-Fixed', 'value': 'fixed_fixed'},
+                        {'label': 'Propped Cantilever', 'value': 'propped_cantilever'},
+                    ],
+                    labelStyle={'display': 'block'},
+                    value='simply_supported'
+                ),
+                html.Div(id='support-type-image', children=[]),
+            ], style={'width': '50%'}),
+        ], style={'display': 'flex', 'flex-direction': 'row'}),
+        html.Div([
+            html.Div([
+                html.Label('Additional Loads', style={'color': 'black', 'fontSize': 20, 'font-weight': 'bold'}),
+                dcc.Dropdown(
+                    id='load-type',
+                    options=[
+                        {'label': 'Point Load (N)', 'value': 'point'},
+                        {'label': 'Moment (N*m)', 'value': 'moment'},
+                        {'label': 'Distributed Load (N/m)', 'value': 'distributed'}
+                    ],
+                    value='point',
+                    clearable=False
+                ),
+                dcc.Input(id="load-magnitude", type="text", placeholder='Magnitude'),
+                dcc.Input(id="load-position", type="text", placeholder='x (m)'),
+                dcc.Input(id="load-end-magnitude", type="text", placeholder='End magnitude (N/m)'),
+                dcc.Input(id="load-end-position", type="text", placeholder='End x (m)'),
+                html.Button('Add Load', id='add-load', n_clicks=0),
+            ], style={'paddingRight': 40, 'width': '30%'}),
+            html.Div(id='load-list', children=[], style={'width': '70%'}),
+            dcc.Store(id='extra-loads', data=[]),
+        ], style={'display': 'flex', 'flex-direction': 'row'}),
+        html.Div([
+            html.Div([
+                html.Label('Section Design', style={'color': 'black', 'fontSize': 20, 'font-weight': 'bold'}),
+                dcc.Input(id="design-max-deflection", type="text", placeholder='Max deflection (m)'),
+                dcc.Input(id="design-max-stress", type="text", placeholder='Allowable stress (Pa), blank for yield'),
+                dcc.Input(id="design-aspect", type="text", value=2.0, placeholder='Rectangle h / b'),
+                dcc.RadioItems(
+                    id='design-objective',
+                    options=[
+                        {'label': 'Lightest', 'value': 'weight'},
+                        {'label': 'Smallest area', 'value': 'area'},
+                    ],
+                    value='weight',
+                    labelStyle={'display': 'inline-block'}
+                ),
+                html.Button('Find Sections', id='design-button', n_clicks=0),
+            ], style={'paddingRight': 40, 'width': '30%'}),
+            html.Div(id='design-results', children=[], style={'width': '70%'}),
+        ], style={'display': 'flex', 'flex-direction': 'row'}),
+        html.Div([
+            html.Div([
+                html.Label('Uncertainty', style={'color': 'black', 'fontSize': 20, 'font-weight': 'bold'}),
+                html.Label('Force magnitude CoV (%)'),
+                dcc.Input(id="uncertainty-force-cov", type="text", value=10.0),
+                html.Label('Force location std (m)'),
+                dcc.Input(id="uncertainty-location-std", type="text", value=0.0),
+                html.Label("Young's modulus CoV (%)"),
+                dcc.Input(id="uncertainty-modulus-cov", type="text", value=10.0),
+                html.Label('Section dimensions CoV (%)'),
+                dcc.Input(id="uncertainty-dims-cov", type="text", value=2.0),
+                html.Label('Samples'),
+                dcc.Input(id="uncertainty-samples", type="text", value=100000),
+                dcc.Input(id="uncertainty-max-deflection", type="text", placeholder='Max deflection (m)'),
+                dcc.Input(id="uncertainty-max-stress", type="text",
+                          placeholder='Allowable stress (Pa), blank for yield'),
+                html.Button('Run Monte Carlo', id='uncertainty-button', n_clicks=0),
+                html.Button('Cancel', id='uncertainty-cancel', n_clicks=0),
+            ], style={'paddingRight': 40, 'width': '30%'}),
+            html.Div(id='uncertainty-results', children=[], style={'width': '70%'}),
+            dcc.Store(id='uncertainty-bands'),
+            # the background job of the analysis shown, kept over page reloads (see update_uncertainty)
+            dcc.Store(id='uncertainty-job', storage_type='session'),
+            dcc.Interval(id='uncertainty-poll', interval=JOB_POLL_INTERVAL * 1000, disabled=True),
+        ], style={'display': 'flex', 'flex-direction': 'row'}),
+        html.Div([
+            html.Div([
+                html.Label('Dynamics', style={'color': 'black', 'fontSize': 20, 'font-weight': 'bold'}),
+                dcc.Dropdown(
+                    id='dynamic-load',
+                    options=[
+                        {'label': 'Suddenly applied force', 'value': 'step'},
+                        {'label': 'Impact (half sine pulse)', 'value': 'impact'},
+                        {'label': 'Harmonic force', 'value': 'harmonic'},
+                        {'label': 'Moving force', 'value': 'moving'}
+                    ],
+                    value='impact',
+                    clearable=False
+                ),
+                html.Label('Pulse length (s), frequency (Hz) or speed (m/s)'),
+                dcc.Input(id="dynamic-parameter", type="text", value=0.01),
+                html.Label('Damping ratio (%)'),
+                dcc.Input(id="dynamic-damping", type="text", value=2.0),
+                html.Label('Duration (s)'),
+                dcc.Input(id="dynamic-duration", type="text", value=1.0),
+                html.Button('Animate', id='dynamic-button', n_clicks=0),
+            ], style={'paddingRight': 40, 'width': '30%'}),
+            html.Div(id='dynamic-results', children=[], style={'width': '70%'}),
+        ], style={'display': 'flex', 'flex-direction': 'row'}),
+        #
+        # Visualization
+        #
+        html.H2("Visualization"),
+        dcc.Store(id='beam-data'),
+        dcc.Store(id='preview-request'),
+        dcc.Store(id='preview-data'),
+        dcc.Store(id='youngs-modulus', data=E),
+
+        html.Div([
+            html.Div([
+                dcc.Graph(
+                    id='deflection_3d',
+                    figure=FIGURE_TEMPLATES[4]
+                )
+            ], style={'width': '50%'}),
+            html.Div([
+                dcc.Graph(
+                    id='deflection_graph',
+                    figure=FIGURE_TEMPLATES[0]
+                )
+            ], style={'width': '50%'}),
+        ], style={'display': 'flex', 'flex-direction': 'row'}),
+        html.Div([
+            html.Div([
+                dcc.Graph(
+                    id='shear_stress_graph',
+                    figure=FIGURE_TEMPLATES[1]
+                )
+            ], style={'width': '33%'}),
+            html.Div([
+                dcc.Graph(
+                    id='bending_stress_graph',
+                    figure=FIGURE_TEMPLATES[2]
+                )
+            ], style={'width': '33%'}),
+            html.Div([
+                dcc.Graph(
+                    id='von_mises_graph',
+                    figure=FIGURE_TEMPLATES[3]
+                )
+            ], style={'width': '33%'})
+        ], style={'display': 'flex', 'flex-direction': 'row'}),
+        html.Div([
+            html.Div([dcc.Graph(id='material-comparison-graph')], style={'width': '60%'}),
+            html.Div(id='material-comparison-table', style={'width': '40%'}),
+        ], id='material-comparison', style={'display': 'none'}),
+    ],
+    className="column"
+)
+
+
+@callback(
+    Output('force-location', 'max'),
+    Output('force-location', 'value'),
+    # Output('force-location', 'marks'),
+    Input('beam-length', 'value')
+)
+def update_force_location_range(bl):
+    # marks={
+    #     0: {'label': '0m', 'style': {'color': '#77b0b1'}},
+    #     str(bl): {'label': f'{bl}m', 'style': {'color': '#f50'}}}
+    loc = float(bl) / 2
+    max = float(bl)
+    # print(max, loc, marks)
+    return [max, loc]
+
+
+@callback(
+    Output('xsection-container', 'children'),
+    Input('xsection', 'value')
+)
+def update_cross_section_container(value):
+    logger.debug('xsection=%s', value)
+
+    dims = SECTION_DIMS.get(value, ())
+    imageURL = XSECTION_IMAGES.get(value, '')
+
+    def style(*names):
+        if any(name in dims for name in names):
+            return {'display': 'block', 'width': '100%'}
+        return {'display': 'none'}
+
+    return [
+        html.Br(style=style('b', 'h')),
+        html.Img(src=imageURL, style={'objectFit': 'contain', 'width': '100%', 'maxWidth': '50%',
+                                      'display': 'block' if imageURL else 'none'}),
+        html.Label('b (m)', style=style('b')),
+        dcc.Input(id="b", type="text", step=0.001, value=0.1, style=style('b')),
+        html.Label('h (m)', style=style('h')),
+        dcc.Input(id="h", type="text", step=0.001, value=0.1, style=style('h')),
+        html.Br(style=style('r')),
+        html.Label('Radius (m)', style=style('r')),
+        dcc.Input(id="r", type="text", step=0.001, value=0.1, style=style('r')),
+        html.Label('Wall thickness t (m)', style=style('t')),
+        dcc.Input(id="t", type="text", step=0.001, value=0.01, style=style('t')),
+        html.Label('Web thickness tw (m)', style=style('tw')),
+        dcc.Input(id="tw", type="text", step=0.001, value=0.01, style=style('tw')),
+        html.Label('Flange thickness tf (m)', style=style('tf')),
+        dcc.Input(id="tf", type="text", step=0.001, value=0.01, style=style('tf')),
+    ]
+
+
+@callback(
+    Output('support-type-image', 'children'),
+    Input('support-type', 'value')
+)
+def update_support_type_image(value):
+    imageURL = ''
+    if value == 'cantilever':
+        imageURL = IMAGE_URL + 'cantilever.png'
+    elif value == 'simply_supported':
+        imageURL = IMAGE_URL + 'simply_supported.png'
+    else:
+        return []
+
+    return [html.Img(src=imageURL, style={'width': '100%', 'maxWidth': '40%'}), ]
+
+
+@callback(
+    Output('load-end-magnitude', 'style'),
+    Output('load-end-position', 'style'),
+    Input('load-type', 'value')
+)
+def update_load_inputs(value):
+    style = {'display': 'inline-block' if value == 'distributed' else 'none'}
+    return style, style
+
+
+@callback(
+    Output('extra-loads', 'data'),
+    Input('add-load', 'n_clicks'),
+    Input({'type': 'remove-load', 'index': ALL}, 'n_clicks'),
+    State('load-type', 'value'),
+    State('load-magnitude', 'value'),
+    State('load-position', 'value'),
+    State('load-end-magnitude', 'value'),
+    State('load-end-position', 'value'),
+    State('beam-length', 'value'),
+    State('extra-loads', 'data'),
+)
+def update_extra_loads(add_clicks, remove_clicks, kind, magnitude, position, end_magnitude, end_position, bl, loads):
+    triggered = dash.callback_context.triggered
+    if not triggered or not triggered[0]['value']:
+        raise PreventUpdate
+    prop_id = triggered[0]['prop_id'].rsplit('.', 1)[0]
+    loads = list(loads or [])
+
+    if prop_id == 'add-load':
+        try:
+            if kind == 'point':
+                load = PointLoad(float(magnitude), float(position))
+            elif kind == 'moment':
+                load = MomentLoad(float(magnitude), float(position))
+            else:
+                load = DistributedLoad(float(magnitude), float(position),
+                                       float(end_magnitude if end_magnitude not in (None, '') else magnitude),
+                                       float(end_position))
+                if load.x1 < load.x0:
+                    load = DistributedLoad(load.w1, load.x1, load.w0, load.x0)
+        except (TypeError, ValueError):
+            raise PreventUpdate
+        loads.append(load_to_dict(clip_load(load, float(bl))))
+    else:
+        index = json.loads(prop_id)['index']
+        if index >= len(loads):
+            raise PreventUpdate
+        loads.pop(index)
+    return loads
+
+
+@callback(
+    Output('load-list', 'children'),
+    Input('extra-loads', 'data')
+)
+def update_load_list(loads):
+    items = []
+    for i, load in enumerate(loads or []):
+        load = as_load(load)
+        if isinstance(load, PointLoad):
+            text = 'Point load {:g} N at x = {:g} m'.format(load.F, load.a)
+        elif isinstance(load, MomentLoad):
+            text = 'Moment {:g} N*m at x = {:g} m'.format(load.M, load.a)
+        else:
+            text = 'Distributed load {:g} to {:g} N/m from x = {:g} to {:g} m'.format(load.w0, load.w1, load.x0,
+                                                                                   load.x1)
+        items.append(html.Div([
+            html.Button('Remove', id={'type': 'remove-load', 'index': i}, n_clicks=0),
+            html.Span(' ' + text),
+        ]))
+    return items
+
+
+# Every material of the tables side by side (see beam_materials, with the materials of BEAM_MATERIALS): the
+# deflection of the current beam in each of them, and a table of the peaks, the share of the allowable stress
+# used and the weight. The unit curves are those of update_graph, read from figure_cache, and the materials
+# are evaluated from them in one (materials x stations) broadcast (see compare_materials).
+@callback(
+    Output('material-comparison', 'style'),
+    Output('material-comparison-graph', 'figure'),
+    Output('material-comparison-table', 'children'),
+    Input('material-compare', 'value'),
+    Input('beam-data', 'modified_timestamp'),
+    Input('force-mag', 'value'),
+    State('support-type', 'value'),
+    State('beam-length', 'value'),
+    State('xsection', 'value'),
+    State('force-location', 'value'),
+    State('b', 'value'),
+    State('h', 'value'),
+    State('r', 'value'),
+    State('t', 'value'),
+    State('tw', 'value'),
+    State('tf', 'value'),
+    State('extra-loads', 'data'),
+    State('slider-mode', 'value'),
+)
+def update_material_comparison(compare, timestamp, fm, st, bl, xs, fl, b, h, r, t=None, tw=None, tf=None, loads=None,
+                               mode=None):
+    if 'compare' not in (compare or ()):
+        return {'display': 'none'}, dash.no_update, dash.no_update
+    style = {'display': 'flex', 'flex-direction': 'row'}
+    try:
+        _, _, L, xsection, _, F, _, _ = normalize_inputs(None, st, bl, xs, fl, fm, b, h, r, t, tw, tf, loads, mode)
+        curves = decode_arrays(update_graph(st, bl, xs, fl, b, h, r, t, tw, tf, loads, mode)['curves'])
+        with span('update_material_comparison', 'compute'):
+            response = {'x': curves['x']}
+            for name in ('deflection_EI', 'shear_stress', 'bending_stress'):
+                response[name] = F * curves['main'][name] + (curves['extra'][name] if curves['extra'] else 0.0)
+            comparison = compare_materials(response, xsection, L)
+    except Exception as error:
+        return style, dash.no_update, html.Div('Cannot compare the materials: ' + str(error), style={'color': 'red'})
+
+    labels = [MATERIAL_LABELS.get(name, name) for name in comparison['materials']]
+    figure = {
+        'data': [{'type': 'scatter', 'mode': 'lines', 'name': label, 'x': comparison['x'], 'y': deflection}
+                 for label, deflection in zip(labels, comparison['deflection'])],
+        'layout': {'title': {'text': 'Deflection by material'}, 'xaxis': {'title': {'text': 'x (m)'}, 'range': [0, L]},
+                   'yaxis': {'title': {'text': 'Deflection (m)'}}},
+    }
+    header = ['Material', 'E (GPa)', 'Max |deflection| (m)', 'Stress / allowable', 'Weight (kg)', 'Passes']
+    rows = [html.Tr([html.Th(name) for name in header])]
+    for k, label in enumerate(labels):
+        rows.append(html.Tr([html.Td(value) for value in (
+            label, '{:.4g}'.format(E[comparison['materials'][k]] / 1e9),
+            '{:.3e}'.format(comparison['max_deflection'][k]), '{:.3g}'.format(comparison['utilization'][k]),
+            '{:.4g}'.format(comparison['weight'][k]), 'yes' if comparison['passes'][k] else 'no')]))
+    summary = 'The stresses do not depend on the material: peak von Mises stress {:.3e} Pa.'.format(
+        comparison['max_von_mises'])
+    return style, figure, [html.Table(rows), html.Div(summary)]
+
+
+# Lightest rectangular or circular section of every material for the current load case (see beam_design),
+# as a table. A blank allowable stress uses the yield strength of each material (ALLOWABLE_STRESS).
+@callback(
+    Output('design-results', 'children'),
+    Input('design-button', 'n_clicks'),
+    State('support-type', 'value'),
+    State('beam-length', 'value'),
+    State('force-location', 'value'),
+    State('force-mag', 'value'),
+    State('extra-loads', 'data'),
+    State('design-max-deflection', 'value'),
+    State('design-max-stress', 'value'),
+    State('design-aspect', 'value'),
+    State('design-objective', 'value'),
+)
+def update_design(n_clicks, st, bl, fl, fm, loads, max_deflection, max_stress, aspect, objective):
+    if not n_clicks:
+        raise PreventUpdate
+    try:
+        L = float(bl)
+        loads = tuple(clip_load(as_load(load), L) for load in loads or ())
+        designs = design_sections(float(fm), float(fl), L, st,
+                                  max_deflection=float(max_deflection) if max_deflection not in (None, '') else None,
+                                  allowable_stress=ALLOWABLE_STRESS if max_stress in (None, '') else float(max_stress),
+                                  objective=objective, aspect=float(aspect or 2.0), loads=loads)
+    except Exception as error:
+        return html.Div('Cannot design a section: ' + str(error), style={'color': 'red'})
+
+    header = ['Material', 'Section', 'Area (cm^2)', 'Weight (kg)', 'Max deflection (m)', 'Max von Mises (Pa)',
+              'Governed by']
+    rows = []
+    for design in designs:
+        xsection = design['xsection']
+        if xsection is None:
+            section = 'none up to the largest size searched'
+        elif xsection['type'] == 'circle':
+            section = 'circle r = {:.4g} m'.format(xsection['r'])
+        else:
+            section = 'rectangle b = {:.4g} m, h = {:.4g} m'.format(xsection['b'], xsection['h'])
+        rows.append(html.Tr([html.Td(value) for value in (
+            design['material'], section, '{:.4g}'.format(design['area'] * 1e4), '{:.4g}'.format(design['weight']),
+            '{:.3e}'.format(design['max_deflection']), '{:.3e}'.format(design['max_von_mises']),
+            design['governing'] if design['feasible'] else '-')]))
+    return html.Table([html.Tr([html.Th(name) for name in header])] + rows)
+
+
+# Monte Carlo analysis of the current beam (see beam_uncertainty): the force magnitude and the force location
+# are normal, Young's modulus and the section dimensions lognormal around the inputs. Shows the statistics of
+# the peaks and sends the envelope bands of the curves to the graphs (see rescale_figures). Any change of the
+# beam, the material or the force clears the bands, which no longer belong to the inputs.
+#
+# With JOBS the analysis runs as a background job: the button submits it and uncertainty-poll reads its progress
+# until it is done. uncertainty-job holds {'id', 'spec'} of the job whose results are shown, for the session,
+# so a reloaded page picks up the running job or the finished result without running it again, and running
+# the same analysis again reads the result of the job already done (see beam_jobs). Changing the inputs only
+# leaves the job, which keeps running for the next time it is asked for; Cancel stops it.
+@callback(
+    Output('uncertainty-bands', 'data'),
+    Output('uncertainty-results', 'children'),
+    Output('uncertainty-job', 'data'),
+    Output('uncertainty-poll', 'disabled'),
+    Input('uncertainty-button', 'n_clicks'),
+    Input('beam-data', 'data'),
+    Input('material-type', 'value'),
+    Input('force-mag', 'value'),
+    Input('uncertainty-poll', 'n_intervals'),
+    Input('uncertainty-cancel', 'n_clicks'),
+    State('support-type', 'value'),
+    State('beam-length', 'value'),
+    State('xsection', 'value'),
+    State('force-location', 'value'),
+    State('b', 'value'),
+    State('h', 'value'),
+    State('r', 'value'),
+    State('t', 'value'),
+    State('tw', 'value'),
+    State('tf', 'value'),
+    State('extra-loads', 'data'),
+    State('uncertainty-force-cov', 'value'),
+    State('uncertainty-location-std', 'value'),
+    State('uncertainty-modulus-cov', 'value'),
+    State('uncertainty-dims-cov', 'value'),
+    State('uncertainty-samples', 'value'),
+    State('uncertainty-max-deflection', 'value'),
+    State('uncertainty-max-stress', 'value'),
+    State('uncertainty-bands', 'data'),
+    State('uncertainty-job', 'data'),
+)
+def update_uncertainty(n_clicks, data, mt, fm, n_intervals, n_cancels, st, bl, xs, fl, b, h, r, t, tw, tf, loads,
+                       force_cov, location_std, modulus_cov, dims_cov, n_samples, max_deflection, max_stress, bands,
+                       job=None):
+    triggered = dash.callback_context.triggered
+    trigger = triggered[0]['prop_id'].split('.')[0] if triggered else ''
+
+    def error(message):
+        return None, html.Div(message, style={'color': 'red'}), None, True
+
+    def spec():
+        return uncertainty_spec(mt, st, bl, xs, fl, fm, b, h, r, t, tw, tf, force_cov, location_std, modulus_cov,
+                                dims_cov, max_deflection, max_stress)
+
+    if trigger in ('', 'uncertainty-poll', 'uncertainty-cancel'):
+        if not job:
+            raise PreventUpdate
+        if JOBS is None:
+            return None, [], None, True
+        if trigger == 'uncertainty-cancel' and JOBS.cancel(job['id'])['state'] in (QUEUED, RUNNING):
+            return dash.no_update, html.Div('Cancelling...'), job, False
+        return poll_uncertainty(job)
+    if trigger != 'uncertainty-button' or not n_clicks:
+        if job:
+            # the graphs of a reloaded page arrive after the job was picked up, for the same inputs
+            try:
+                current = spec()
+            except Exception:
+                current = None
+            if current == job['spec']:
+                raise PreventUpdate
+        elif bands is None:
+            raise PreventUpdate
+        return None, [], None, True
+    if loads:
+        return error('The uncertainty analysis covers the single point load, remove the additional loads first.')
+    try:
+        uncertainty = spec()
+        n_samples = int(float(n_samples))
+        max_samples = UNCERTAINTY_MAX_SAMPLES if JOBS is None else UNCERTAINTY_MAX_JOB_SAMPLES
+        if not 0 < n_samples <= max_samples:
+            raise Exception('samples must be between 1 and {}'.format(max_samples))
+        if JOBS is not None:
+            with span('update_uncertainty', 'submit'):
+                id = JOBS.submit(monte_carlo_spec, spec=uncertainty, n_samples=n_samples,
+                                 percentiles=list(UNCERTAINTY_PERCENTILES))
+            return poll_uncertainty({'id': id, 'spec': uncertainty})
+        with span('update_uncertainty', 'compute'):
+            result = monte_carlo_spec(uncertainty, n_samples, percentiles=UNCERTAINTY_PERCENTILES)
+    except Exception as exception:
+        return error('Cannot run the uncertainty analysis: ' + str(exception))
+    return uncertainty_outputs(result) + (None, True)
+
+
+# The uncertain beam around the inputs in the form of beam_uncertainty.monte_carlo_spec, plain JSON data that
+# identifies a background job
+def uncertainty_spec(mt, st, bl, xs, fl, fm, b, h, r, t, tw, tf, force_cov, location_std, modulus_cov, dims_cov,
+                     max_deflection, max_stress):
+    _, st, L, section, a, F, _, _ = normalize_inputs(mt, st, bl, xs, fl, fm, b, h, r, t, tw, tf)
+    dims_cov = float(dims_cov) / 100
+    xsection = {name: {'dist': 'lognormal', 'mean': float(value), 'cov': dims_cov}
+                for name, value in zip(SECTION_DIMS[section.type], section.dims)}
+    return {
+        'F': {'dist': 'normal', 'mean': F, 'cov': float(force_cov) / 100},
+        'a': {'dist': 'normal', 'mean': a, 'std': float(location_std)},
+        'L': L,
+        'support_type': st,
+        'E': {'dist': 'lognormal', 'mean': E[mt], 'cov': float(modulus_cov) / 100},
+        'xsection': dict(xsection, type=section.type),
+        'max_deflection': float(max_deflection) if max_deflection not in (None, '') else None,
+        'max_stress': ALLOWABLE_STRESS[mt] if max_stress in (None, '') else float(max_stress),
+    }
+
+
+# The outputs of update_uncertainty for a background job: its results once it is done, its progress before
+def poll_uncertainty(job):
+    try:
+        status = JOBS.status(job['id'])
+    except Exception:
+        return None, html.Div('The uncertainty analysis is no longer available, run it again.',
+                              style={'color': 'red'}), None, True
+    if status['state'] == DONE:
+        with span('update_uncertainty', 'result'):
+            result = JOBS.result(job['id'])
+        return uncertainty_outputs(result) + (job, True)
+    if status['state'] == FAILED:
+        return None, html.Div('Cannot run the uncertainty analysis: ' + str(status['error']),
+                              style={'color': 'red'}), None, True
+    if status['state'] == CANCELLED:
+        return None, html.Div('The uncertainty analysis was cancelled.'), None, True
+    if status['state'] == QUEUED or not status['total']:
+        text = 'Waiting for a worker...'
+    else:
+        text = 'Running: {:.0f} %'.format(100.0 * status['done'] / status['total'])
+    return dash.no_update, html.Div(text), job, False
+
+
+# (bands, results): the envelope bands for the graphs and the tables of a monte_carlo result
+def uncertainty_outputs(result):
+    with span('update_uncertainty', 'serialize'):
+        lower, upper = 0, len(UNCERTAINTY_PERCENTILES) - 1
+        bands = result['bands']
+        data = {'x': bands['x'], 'percentiles': [UNCERTAINTY_PERCENTILES[lower], UNCERTAINTY_PERCENTILES[upper]]}
+        for name in ('deflection', 'shear_stress', 'bending_stress', 'von_mises'):
+            data[name] = [bands[name][lower], bands[name][upper]]
+        data = encode_arrays(data, ARRAY_ENCODING)
+
+    def percentile(q):
+        return 'P{:g}'.format(q)
+
+    header = ['Peak', 'Mean', 'Std'] + [percentile(q) for q in UNCERTAINTY_PERCENTILES] + ['P(exceed)']
+    rows = []
+    for name, label in (('deflection', '|Deflection| (m)'), ('von_mises', 'Von Mises (Pa)')):
+        stats = result[name]
+        exceedance = stats['exceedance']
+        rows.append(html.Tr([html.Td(value) for value in [label] + ['{:.4g}'.format(stats[key]) for key in (
+            'mean', 'std')] + ['{:.4g}'.format(stats['percentiles'][q]) for q in UNCERTAINTY_PERCENTILES] + [
+            '-' if exceedance is None else '{:.4g}'.format(exceedance)]]))
+    summary = '{} samples ({} rejected), probability of exceeding a limit {}. The bands on the graphs span ' \
+              '{} to {} of {} samples.'.format(result['samples'], result['rejected'],
+                                               '-' if result['failure'] is None else '{:.4g}'.format(result['failure']),
+                                               percentile(UNCERTAINTY_PERCENTILES[lower]),
+                                               percentile(UNCERTAINTY_PERCENTILES[upper]), bands['samples'])
+    return data, [html.Table([html.Tr([html.Th(name) for name in header])] + rows), html.Div(summary)]
+
+
+# Transient response of the beam to the force of the inputs varying in time (see beam_modal), drawn as an
+# animation in the 3D view with a table of the natural frequencies. The force acts at its location from t = 0
+# on the beam at rest, except the moving force, which crosses the beam from x = 0. The animation replaces the
+# static figure until the next change of the inputs redraws it (see rescale_figures).
+@callback(
+    Output('deflection_3d', 'figure', allow_duplicate=True),
+    Output('dynamic-results', 'children'),
+    Input('dynamic-button', 'n_clicks'),
+    State('material-type', 'value'),
+    State('force-mag', 'value'),
+    State('support-type', 'value'),
+    State('beam-length', 'value'),
+    State('xsection', 'value'),
+    State('force-location', 'value'),
+    State('b', 'value'),
+    State('h', 'value'),
+    State('r', 'value'),
+    State('t', 'value'),
+    State('tw', 'value'),
+    State('tf', 'value'),
+    State('dynamic-load', 'value'),
+    State('dynamic-parameter', 'value'),
+    State('dynamic-damping', 'value'),
+    State('dynamic-duration', 'value'),
+    prevent_initial_call=True,
+)
+def update_dynamics(n_clicks, mt, fm, st, bl, xs, fl, b, h, r, t, tw, tf, kind, parameter, damping, duration):
+    if not n_clicks:
+        raise PreventUpdate
+    try:
+        mt, st, L, xsection, a, F, _, _ = normalize_inputs(mt, st, bl, xs, fl, fm, b, h, r, t, tw, tf)
+        duration = float(duration)
+        if not duration > 0:
+            raise Exception('the duration must be positive')
+        with span('update_dynamics', 'compute'):
+            response = dynamic_response(st, L, xsection, mt, a, F, kind, float(parameter), float(damping) / 100,
+                                        duration)
+        with span('update_dynamics', 'figure'):
+            figure = dynamic_figure(FIGURE_TEMPLATES[4], figure_geometry(L, xsection), response)
+    except Exception as error:
+        return dash.no_update, html.Div('Cannot compute the dynamic response: ' + str(error), style={'color': 'red'})
+
+    frequencies = response['frequencies']
+    rows = [html.Tr([html.Th(name) for name in ('Mode', 'Frequency (Hz)', 'Period (s)')])]
+    for n, frequency in enumerate(frequencies[:10]):
+        rows.append(html.Tr([html.Td(value) for value in (n + 1, '{:.4g}'.format(frequency),
+                                                           '{:.4g}'.format(1 / frequency))]))
+    peak, static = response['peak'], response['static']
+    summary = 'Peak deflection {:.3e} m at x = {:.3f} m, t = {:.4f} s; {:.3e} m under the force at rest, a ' \
+              'dynamic amplification of {:.3g}. {} time steps x {} stations from {} modes, drawn with the ' \
+              'deflection scaled by {:.3g}.'.format(peak['value'], peak['x'], peak['t'], static,
+                                                    abs(peak['value'] / static) if static else float('nan'),
+                                                    DYNAMIC_STEPS, DYNAMIC_STATIONS, len(frequencies),
+                                                    response['scale'])
+    return figure, [html.Table(rows), html.Div(summary)]
+
+
+# Deflection of the beam over time under the force F of the kind of beam_modal.load_history, at DYNAMIC_STEPS
+# time steps over duration seconds and DYNAMIC_STATIONS stations. Returns
+#   {'t', 'x', 'deflection': (steps x stations), 'load': (steps,), 'positions': (steps,) of the force,
+#    'frequencies': natural frequencies in Hz, 'peak': {'value', 'x', 't'} of the largest |deflection|,
+#    'static': largest static |deflection| of F at the positions it takes, 'scale': of the drawn deflection}
+def dynamic_response(support_type, L, xsection, material, a, F, kind, parameter, damping, duration):
+    model = modal_model(support_type, L, xsection, material)
+    t, load, positions = load_history(kind, F, a, L, duration, DYNAMIC_STEPS, parameter)
+    positions = np.broadcast_to(positions, t.shape)
+    x = np.linspace(0.0, L, DYNAMIC_STATIONS)
+    deflection = model.transient(load, t[1], positions, x, damping)['deflection']
+    step, station = np.unravel_index(np.argmax(np.abs(deflection)), deflection.shape)
+    # the static deflection of the force at (up to 101 of) the positions it takes, in one product
+    at = np.unique(positions)
+    at = at[np.unique(np.linspace(0, len(at) - 1, 101).round().astype(int))]
+    static = np.max(np.abs((F * model.shapes(at).T / model.omega ** 2) @ model.shapes(x)))
+    peak = float(deflection[step, station])
+    return {
+        't': t,
+        'x': x,
+        'deflection': deflection,
+        'load': load,
+        'positions': positions,
+        'frequencies': model.frequencies,
+        'peak': {'value': peak, 'x': float(x[station]), 't': float(t[step])},
+        'static': float(static),
+        'scale': max(1.0, DYNAMIC_SCALE * L / abs(peak)) if peak else 1.0,
+    }
+
+
+# values rounded to 5 significant digits of the largest one, as much as the screen shows, which keeps the JSON
+# of the animation frames short
+def _display_round(values):
+    largest = np.max(np.abs(values))
+    return np.round(values, 4 - int(np.floor(np.log10(largest)))) if largest > 0 else values
+
+
+# The 3D template with the animation of a dynamic_response: the static traces are hidden and followed by a
+# coarser mesh (DYNAMIC_TRIANGLES) and the force marker, which DYNAMIC_FRAMES frames move, with play and pause
+# buttons and a time slider. The mesh is colored by the deflection on one scale for every frame.
+def dynamic_figure(template, geometry, response):
+    figure = copy.deepcopy(template)
+    x, t, scale = response['x'], response['t'], response['scale']
+    section = {name: np.asarray(values, dtype=float) for name, values in geometry['section'].items()}
+    n_outline = len(section['y'])
+    rings = mesh_rings(x, n_outline, DYNAMIC_TRIANGLES)
+    steps = np.unique(np.linspace(0, len(t) - 1, DYNAMIC_FRAMES).round().astype(int))
+    deflection = response['deflection'][steps]
+    ring_deflection = np.repeat(deflection[:, rings], n_outline, axis=1)
+    vy = _display_round(scale * ring_deflection + np.tile(section['y'], len(rings)))
+    ring_deflection = _display_round(ring_deflection)
+    positions = response['positions'][steps]
+    load_deflection = np.array([np.interp(p, x, y) for p, y in zip(positions, deflection)])
+    loads = response['load'][steps]
+
+    for trace in figure['data']:
+        trace['visible'] = False
+    i, j, k = mesh_faces(len(rings), n_outline)
+    mesh = go.Mesh3d(
+        x=np.repeat(x[rings], n_outline), y=vy[0], z=np.tile(section['z'], len(rings)), i=i, j=j, k=k,
+        intensity=ring_deflection[0], colorscale='thermal',
+        cmin=ring_deflection.min(), cmax=ring_deflection.max(),
+        colorbar=dict(title='Deflection (m)', exponentformat='e'),
+        hovertemplate="distance: %{x} m<br>deflection: %{intensity:.3e} m<extra></extra>")
+    marker = go.Scatter3d(
+        x=positions[:1], y=scale * load_deflection[:1], z=[0], customdata=loads[:1],
+        marker=dict(size=25, color='rgba(135, 206, 250, 0.8)', symbol='x'),
+        hovertemplate="<b>Force</b><br>distance: %{x} m<br>force: %{customdata:.3e} N<extra></extra>")
+    figure['data'] = list(figure['data']) + [mesh.to_plotly_json(), marker.to_plotly_json()]
+    n = len(figure['data'])
+    figure['frames'] = [{
+        'name': str(k),
+        'traces': [n - 2, n - 1],
+        'data': [{'y': vy[k], 'intensity': ring_deflection[k]},
+                 {'x': positions[k:k + 1], 'y': scale * load_deflection[k:k + 1], 'customdata': loads[k:k + 1]}],
+    } for k in range(len(steps))]
+
+    def animate(names, duration):
+        return [names, {'frame': {'duration': duration, 'redraw': True}, 'mode': 'immediate', 'fromcurrent': True,
+                        'transition': {'duration': 0}}]
+
+    layout = figure['layout']
+    layout['title']['text'] = '3D Deflection over time (deflection x {:.3g})'.format(scale)
+    layout['scene']['xaxis']['range'] = [-1, geometry['span']]
+    layout['scene']['yaxis']['range'] = [-1 * geometry['span'], geometry['span']]
+    layout['updatemenus'][0]['visible'] = False
+    layout['updatemenus'].append(dict(
+        type='buttons', direction='left', showactive=False, x=0.0, xanchor='left', y=0.0, yanchor='top',
+        pad={'r': 10, 't': 40},
+        buttons=[dict(label='Play', method='animate', args=animate(None, DYNAMIC_FRAME_DURATION)),
+                 dict(label='Pause', method='animate', args=animate([None], 0))]))
+    layout['sliders'] = [dict(
+        x=0.15, len=0.85, y=0.0, yanchor='top', pad={'t': 30},
+        currentvalue={'prefix': 't = ', 'suffix': ' s'},
+        steps=[dict(label='{:.4g}'.format(t[step]), method='animate', args=animate([str(k)], 0))
+               for k, step in enumerate(steps)])]
+    return figure
+
+
+# The server only sends the unit load curves and the geometry of the beam (see unit_curves and figure_geometry).
+# The browser writes them into the current figures (rescale_figures in assets/beam_bending.js), so changing
+# the force magnitude or the material rescales the curves without a round trip.
+@callback(
+    Output('beam-data', 'data'),
+    Input('support-type', 'value'),
+    Input('beam-length', 'value'),
+    Input('xsection', 'value'),
+    Input('force-location', 'value'),
+    Input('b', 'value'),
+    Input('h', 'value'),
+    Input('r', 'value'),
+    Input('t', 'value'),
+    Input('tw', 'value'),
+    Input('tf', 'value'),
+    Input('extra-loads', 'data'),
+    Input('slider-mode', 'value'),
+)
+def update_graph(st, bl, xs, fl, b, h, r, t=None, tw=None, tf=None, loads=None, mode=None):
+    logger.debug('update_graph support_type=%s L=%s xsection=%s a=%s b=%s h=%s r=%s t=%s tw=%s tf=%s loads=%s '
+                 'mode=%s', st, bl, xs, fl, b, h, r, t, tw, tf, loads, mode)
+    with span('update_graph', 'parse'):
+        _, st, L, xsection, a, _, loads, use_surface = normalize_inputs(None, st, bl, xs, fl, 1.0, b, h, r, t, tw,
+                                                                        tf, loads, mode)
+
+    def compute():
+        with span('update_graph', 'compute'):
+            curves = unit_curves(st, L, xsection, a, loads, use_surface)
+        with span('update_graph', 'figure'):
+            geometry = figure_geometry(L, xsection)
+        # the figures themselves are filled in the browser, so serializing the curves is the last step here
+        with span('update_graph', 'serialize'):
+            return {'geometry': geometry, 'curves': encode_arrays(curves, ARRAY_ENCODING)}
+
+    return figure_cache.get_or_compute((st, L, xsection, a, loads, use_surface), compute)
+
+
+# While the force location slider is dragged, its drag_value changes with every move but its value only on
+# release (updatemode='mouseup'), which runs update_graph once at full resolution. In between,
+# request_preview in assets/beam_bending.js asks for coarse curves (see preview_curves) with at most one
+# request in flight: positions passed while one is answered are coalesced into the newest one, sent when the
+# answer arrives. rescale_figures draws an answer only while the drag goes on, so a late preview never
+# replaces the full resolution curves. The answer carries the id of its request, and data None on errors, so
+# the browser always knows the request is done.
+@callback(
+    Output('preview-data', 'data'),
+    Input('preview-request', 'data'),
+    State('support-type', 'value'),
+    State('beam-length', 'value'),
+    State('xsection', 'value'),
+    State('b', 'value'),
+    State('h', 'value'),
+    State('r', 'value'),
+    State('t', 'value'),
+    State('tw', 'value'),
+    State('tf', 'value'),
+    State('extra-loads', 'data'),
+)
+def update_preview(preview, st, bl, xs, b, h, r, t=None, tw=None, tf=None, loads=None):
+    if not preview:
+        raise PreventUpdate
+    data = None
+    try:
+        with span('update_preview', 'compute'):
+            _, st, L, xsection, a, _, loads, _ = normalize_inputs(None, st, bl, xs, preview['a'], 1.0, b, h, r, t, tw,
+                                                                  tf, loads)
+            curves = preview_curves(st, L, xsection, a, loads)
+            data = {'geometry': figure_geometry(L, xsection), 'curves': encode_arrays(curves, ARRAY_ENCODING)}
+    except Exception:
+        logger.exception('update_preview failed for %s', preview)
+    return {'id': preview['id'], 'a': preview['a'], 'data': data}
+
+
+clientside_callback(
+    ClientsideFunction(namespace='beam', function_name='request_preview'),
+    Output('preview-request', 'data'),
+    Input('force-location', 'drag_value'),
+    Input('preview-data', 'data'),
+    State('force-location', 'value'),
+)
+
+
+clientside_callback(
+    ClientsideFunction(namespace='beam', function_name='rescale_figures'),
+    Output('deflection_graph', 'figure'),
+    Output('shear_stress_graph', 'figure'),
+    Output('bending_stress_graph', 'figure'),
+    Output('von_mises_graph', 'figure'),
+    Output('deflection_3d', 'figure'),
+    Input('beam-data', 'data'),
+    Input('material-type', 'value'),
+    Input('force-mag', 'value'),
+    Input('uncertainty-bands', 'data'),
+    Input('preview-data', 'data'),
+    Input('force-location', 'drag_value'),
+    State('youngs-modulus', 'data'),
+    State('force-location', 'value'),
+    State('deflection_graph', 'figure'),
+    State('shear_stress_graph', 'figure'),
+    State('bending_stress_graph', 'figure'),
+    State('von_mises_graph', 'figure'),
+    State('deflection_3d', 'figure'),
+)
+
+
+# Parses the raw Dash input values into the key used by the caches:
+# (material, support_type, L, Section, a, F, additional loads, use the influence surface).
+# Only the dimensions of the selected section are kept, so edits to hidden inputs do not change the key.
+# Additional loads are clipped to the beam in case it was shortened after they were added.
+def normalize_inputs(mt, st, bl, xs, fl, fm, b=None, h=None, r=None, t=None, tw=None, tf=None, loads=None,
+                     mode=None):
+    inputs = {'b': b, 'h': h, 'r': r, 't': t, 'tw': tw, 'tf': tf}
+    xsection = Section(xs, **{name: inputs[name] for name in SECTION_DIMS.get(xs, ())})
+    L = float(bl)
+    loads = tuple(clip_load(as_load(load), L) for load in loads or ())
+    return mt, st, L, xsection, float(fl), float(fm), loads, 'influence' in (mode or ())
+
+
+# Material independent response arrays for one load case. The deflection is kept multiplied by E * I so
+# that switching materials reuses the cached arrays. The additional loads are superposed on the point load F
+# at a (see beam_core.evaluate_case).
+# use_surface reads a single load from the influence surface of the beam instead (see lookup_response).
+def compute_response(support_type, L, xsection, a, F, loads=(), use_surface=False):
+    if use_surface and not loads:
+        return lookup_response(support_type, L, xsection, a, F)
+
+    def compute():
+        if loads:
+            X = sample_load_case_stations(LoadCase((PointLoad(F, a),) + tuple(loads), L, support_type))
+        else:
+            X = sample_stations(support_type, L, a)
+        response = evaluate_case(F=F, x=X, xsection=xsection, a=a, L=L, support_type=support_type, loads=loads)
+        for values in response.values():
+            values.flags.writeable = False
+        return response
+
+    return response_cache.get_or_compute((support_type, L, xsection, a, F, tuple(loads)), compute)
+
+
+# The surface of (support_type, L) from the design store (see beam_store) when it holds the beam, built here
+# otherwise.
+def influence_surface(support_type, L):
+    def compute():
+        surface = STORE.surface(support_type, L) if STORE is not None else None
+        return surface or InfluenceSurface(unit_response(support_type, L), L)
+
+    return surface_cache.get_or_compute((support_type, L), compute)
+
+
+# Response read from the influence surface of (support_type, L): a row lookup or an interpolation between
+# two rows, so dragging the force location slider does not evaluate the closed forms at every station.
+# The load point and the station just past it are evaluated exactly so the load marker and the shear jump
+# stay sharp.
+def lookup_response(support_type, L, xsection, a, F):
+    section = as_section(xsection)
+    response = influence_surface(support_type, L).lookup(a, F)
+
+    exact = np.array([a, np.nextafter(a, np.inf)])
+    index = np.searchsorted(response['x'], exact)
+    response['x'] = np.insert(response['x'], index, clip_stations(exact, L))
+    response['shear_force'] = np.insert(response['shear_force'], index, _shear_force(F, exact, a, L, support_type))
+    response['bending_moment'] = np.insert(response['bending_moment'], index,
+                                           _bending_moment(F, exact, a, L, support_type))
+    response['deflection_EI'] = np.insert(response['deflection_EI'], index,
+                                          _deflection_EI(F, exact, a, L, support_type))
+
+    response['shear_stress'] = response['shear_force'] / section.A
+    response['bending_stress'] = response['bending_moment'] / section.S
+    response['von_mises'] = np.sqrt(response['bending_stress'] ** 2 + 3 * response['shear_stress'] ** 2)
+    return response
+
+
+# Stations for the graphs, refined where the curves bend the most (see beam_sampling.adaptive_stations).
+# The supports, the load point and the exact extrema are always included, and a second station just past
+# the load point keeps the jump in the shear stress vertical. The shapes do not depend on F, the material
+# or the section, so a unit model is enough.
+def sample_stations(support_type, L, a, max_points=MAX_STATIONS):
+    model = BeamResponse(F=1.0, a=a, L=L, support_type=support_type)
+    breakpoints = [0.0, a, np.nextafter(a, np.inf), L,
+                   model.max_deflection()[0], model.max_von_mises()[0]]
+    return adaptive_stations([model.deflection, model.von_mises], 0.0, L, breakpoints, max_points=max_points)
+
+
+def sample_load_case_stations(case, max_points=MAX_STATIONS):
+    breakpoints = case.breakpoints()
+    breakpoints = np.concatenate([breakpoints, np.nextafter(breakpoints, np.inf)])
+    funcs = [lambda x: case.superpose(x)[2], lambda x: case.superpose(x)[1]]
+    return adaptive_stations(funcs, 0.0, case.L, breakpoints, max_points=max_points)
+
+
+# Unit load curves of one beam, the part of the graphs that depends on the geometry and the load position.
+# Every quantity is linear in the force magnitude, and only the deflection depends on the material:
+#   deflection = (F * main['deflection_EI'] + extra['deflection_EI']) / (E * I)
+#   stress = F * main[stress] + extra[stress]
+# main is the response to a unit force at a, extra the response to the additional loads (None without them).
+# peaks holds the exact unit peaks (x, value) of the single load model, None with additional loads. rings are
+# the stations of the 3D mesh (see beam_field.mesh_rings).
+# Support types without closed forms (fixed_fixed, propped_cantilever) are solved by beam_fem.
+# stations: fixed stations instead of the sampled ones, for a quick preview (see preview_curves). There are
+# no exact peaks then.
+def unit_curves(support_type, L, xsection, a, loads=(), use_surface=False, stations=None):
+    xsection = as_section(xsection)
+    names = ('deflection_EI', 'shear_stress', 'bending_stress')
+    peaks = None
+    if support_type not in ('cantilever', 'simply_supported'):
+        X, main, extra = model_curves(support_type, L, xsection, a, loads, stations)
+    elif loads or stations is not None:
+        if stations is not None:
+            X = stations
+        else:
+            X = sample_load_case_stations(LoadCase((PointLoad(1.0, a),) + tuple(loads), L, support_type))
+        main = evaluate_case(F=1.0, x=X, xsection=xsection, a=a, L=L, support_type=support_type)
+        extra = None
+        if loads:
+            extra = evaluate_loads(loads, X, xsection=xsection, L=L, support_type=support_type)
+            extra = {name: extra[name] for name in names}
+    else:
+        main = compute_response(support_type, L, xsection, a, 1.0, use_surface=use_surface)
+        X = main['x']
+        extra = None
+        # EI = I, so the unit deflection peak is per newton and per pascal of E
+        model = BeamResponse(F=1.0, a=a, L=L, support_type=support_type, EI=xsection.I, A=xsection.A,
+                             S=xsection.S)
+        peaks = {
+            'deflection': model.max_deflection(),
+            'shear_stress': model.shear_stress.abs_max(),
+            'bending_stress': model.max_bending_stress(),
+            'von_mises': model.max_von_mises(),
+        }
+    main = {name: main[name] for name in names}
+
+    if DISPLAY_POINTS and len(X) > DISPLAY_POINTS:
+        keep = np.searchsorted(X, [a, np.nextafter(a, np.inf)])
+        vonmises = np.hypot(main['bending_stress'], np.sqrt(3) * main['shear_stress'])
+        index = np.union1d(lttb_indices(X, main['deflection_EI'], DISPLAY_POINTS, keep),
+                           lttb_indices(X, vonmises, DISPLAY_POINTS))
+        X = X[index]
+        main = {name: values[index] for name, values in main.items()}
+        extra = extra and {name: values[index] for name, values in extra.items()}
+
+    load_index = int(np.searchsorted(X, a))
+    return {
+        'x': X,
+        'a': a,
+        'load_index': load_index,
+        'rings': mesh_rings(X, max_triangles=MESH_TRIANGLES, keep=[min(load_index, len(X) - 1)]),
+        'I': xsection.I,
+        'main': main,
+        'extra': extra,
+        'peaks': peaks,
+    }
+
+
+# Unit curves of a finite element model (see beam_fem) with EI = 1, so its deflection is E * I * y. Stations
+# as in sample_load_case_stations, around the supports and the loads, unless given.
+def model_curves(support_type, L, xsection, a, loads=(), stations=None):
+    model = BeamModel(L, preset_supports(support_type, L), 1.0, xsection.A, xsection.S)
+    solutions = [model.solve([PointLoad(1.0, a)])] + ([model.solve(loads)] if loads else [])
+    breakpoints = np.unique(np.concatenate([solution.nodes for solution in solutions]))
+    breakpoints = np.concatenate([breakpoints, np.nextafter(breakpoints, np.inf)])
+
+    def total(name):
+        return lambda x: sum(solution.evaluate(x)[name] for solution in solutions)
+
+    X = stations
+    if X is None:
+        X = adaptive_stations([total('deflection'), total('von_mises')], 0.0, L, breakpoints,
+                              max_points=MAX_STATIONS)
+    curves = []
+    for solution in solutions:
+        response = solution.evaluate(X)
+        curves.append({'deflection_EI': response['deflection'], 'shear_stress': response['shear_stress'],
+                       'bending_stress': response['bending_stress']})
+    return X, curves[0], curves[1] if loads else None
+
+
+# Coarse unit curves for the preview while the force location slider is dragged: PREVIEW_STATIONS even
+# stations plus the load point, evaluated directly, without the adaptive sampling and the exact peaks.
+# This is cheaper than a lookup of the influence surface, which interpolates all of its stations.
+def preview_curves(support_type, L, xsection, a, loads=()):
+    stations = np.union1d(np.linspace(0.0, L, PREVIEW_STATIONS), clip_stations([a, np.nextafter(a, np.inf)], L))
+    return unit_curves(support_type, L, xsection, a, loads, stations=stations)
+
+
+# Applies a force magnitude F and a Young's modulus to unit curves. Returns the arrays of the graphs and the
+# (x, value) peak of each one. This is the reference for rescale_figures in assets/beam_bending.js.
+# curves may hold typed array encodings (see ARRAY_ENCODING).
+def scale_curves(curves, modulus, F):
+    curves = decode_arrays(curves)
+    main, extra = curves['main'], curves['extra']
+
+    def combine(name):
+        values = F * np.asarray(main[name], dtype=float)
+        return values + np.asarray(extra[name], dtype=float) if extra else values
+
+    scaled = {
+        'x': np.asarray(curves['x'], dtype=float),
+        'deflection': combine('deflection_EI') / (modulus * curves['I']),
+        'shear_stress': combine('shear_stress'),
+        'bending_stress': combine('bending_stress'),
+    }
+    scaled['von_mises'] = np.sqrt(scaled['bending_stress'] ** 2 + 3 * scaled['shear_stress'] ** 2)
+
+    peaks = {}
+    for name in ('deflection', 'shear_stress', 'bending_stress', 'von_mises'):
+        if curves['peaks']:
+            x, value = curves['peaks'][name]
+            scale = {'deflection': F / modulus, 'von_mises': abs(F)}.get(name, F)
+            peaks[name] = (x, value * scale)
+        else:
+            i = int(np.argmax(np.abs(scaled[name])))
+            peaks[name] = (float(scaled['x'][i]), float(scaled[name][i]))
+    return scaled, peaks
+
+
+# Server side equivalent of the browser update: fills copies of the templates with the geometry of the beam
+# and the curves scaled by F and the modulus, titles included. bands: the envelope bands sent by
+# update_uncertainty, None for none.
+def fill_figures(templates, geometry, curves, modulus, F, bands=None):
+    deflection, shear, bending, vonmises, deflection_3d = copy.deepcopy(templates)
+    bands = decode_arrays(bands)
+    curves = decode_arrays(curves)
+    scaled, peaks = scale_curves(curves, modulus, F)
+    X, Y, vonmises_stress = scaled['x'], scaled['deflection'], scaled['von_mises']
+    span = geometry['span']
+
+    for figure, name, key, unit in ((deflection, 'Deflection', 'deflection', 'm'),
+                                    (shear, 'Shear Stress', 'shear_stress', 'Pa'),
+                                    (bending, 'Bending Stress', 'bending_stress', 'Pa'),
+                                    (vonmises, 'Von Mises Stress', 'von_mises', 'Pa')):
+        x, value = peaks[key]
+        figure['layout']['title']['text'] = '{}<br><sup>max {:.3e} {} at x = {:.3f} m</sup>'.format(name, value,
+                                                                                                   unit, x)
+        figure['layout']['xaxis']['range'] = [0, span]
+        figure['data'][0].update(x=X, y=scaled[key])
+        lower, upper = figure['data'][-2:]
+        lower.update(x=bands['x'] if bands else [], y=bands[key][0] if bands else [])
+        upper.update(x=bands['x'] if bands else [], y=bands[key][1] if bands else [])
+    deflection['data'][0]['marker'].update(color=Y, cmin=Y.min() * 2, cmax=Y.max())
+    deflection['data'][1]['x'] = [0, span]
+
+    # the section outline at every ring, moved down by the deflection there. the stresses of the outline points
+    # are the stress curves times the factors of the section.
+    fl_index = min(curves['load_index'], len(X) - 1)
+    mesh, pressure_point = deflection_3d['data']
+    section = {name: np.asarray(values, dtype=float) for name, values in geometry['section'].items()}
+    rings = np.asarray(curves['rings'], dtype=int)
+    n_outline = len(section['y'])
+    ring_deflection = np.repeat(Y[rings], n_outline)
+    ring_stress = np.sqrt((scaled['bending_stress'][rings, None] * section['normal']) ** 2 +
+                          3 * (scaled['shear_stress'][rings, None] * section['shear']) ** 2).ravel()
+    i, j, k = mesh_faces(len(rings), n_outline)
+    mesh.update(x=np.repeat(X[rings], n_outline), y=ring_deflection + np.tile(section['y'], len(rings)),
+                z=np.tile(section['z'], len(rings)), i=i, j=j, k=k, intensity=ring_deflection,
+                customdata=np.stack([ring_deflection, ring_stress], axis=1))
+    pressure_point.update(x=[curves['a']], y=[Y[fl_index]], customdata=[vonmises_stress[fl_index]])
+    scene = deflection_3d['layout']['scene']
+    scene['xaxis']['range'] = [-1, span]
+    scene['yaxis']['range'] = [-1 * span, span]
+    buttons = deflection_3d['layout']['updatemenus'][0]['buttons']
+    for button, intensity in zip(buttons, (ring_deflection, ring_stress)):
+        button['args'][0]['intensity'] = [intensity]
+    return deflection, shear, bending, vonmises, deflection_3d
+
+
+# Complete figures for one set of inputs, rendered on the server
+def build_figures(mt, st, L, xsection, a, F, loads=(), use_surface=False):
+    with span('build_figures', 'compute'):
+        curves = unit_curves(st, L, xsection, a, loads, use_surface)
+    with span('build_figures', 'figure'):
+        return fill_figures(FIGURE_TEMPLATES, figure_geometry(L, xsection), curves, E[mt], F)
+
@@ -0,0 +1,262 @@
+import argparse
+import collections
+import csv
+import functools
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+
+import numpy as np
+
+from beam_core import E, SECTION_DIMS, Section, _bending_moment, _deflection_EI, _shear_force
+
+error_msg_row = 'Invalid beam: '
+error_msg_format = 'Unknown input format: '
+
+# Headless batch evaluation of single point load beams, without the Dash app.
+#
+# Input rows (CSV columns or JSON Lines keys):
+#   id (optional, defaults to the row number), F, a, L, material, support_type,
+#   xsection: the section type, with its dimensions in the columns b, h, r, t, tw, tf (see SECTION_DIMS).
+#             in JSON Lines it may also be a dict such as {'type': 'circle', 'r': 0.05}.
+#   max_deflection, max_stress (optional): limits of this beam, overriding the command line limits.
+#
+# Output rows: id, max_deflection, max_deflection_x, max_von_mises, max_von_mises_x, pass, error.
+# pass is empty when no limit applies to the beam, error is set (and the rest empty) for invalid rows.
+#
+# Rows are read and evaluated in chunks, so memory stays bounded for any file size. Each chunk is evaluated
+# with the vectorized kernels of beam_core, (beams x candidate stations) at once, in a pool of worker
+# processes. Results are written in input order as soon as their chunk is done.
+
+FIELDS = ('id', 'max_deflection', 'max_deflection_x', 'max_von_mises', 'max_von_mises_x', 'pass', 'error')
+
+
+# Stations where the peaks of the single load closed forms can occur, as a (beams, 6) array: both ends, both
+# sides of the load point and the roots of the slope on either side of the load. The moment is linear and
+# the shear constant between the load and the supports, so the von Mises stress peaks at an end or at the
+# load, and the deflection at an end, at the load or where the slope vanishes. Evaluating these is exact.
+# The station just past the load is not clipped to L, so a load on the right support still reports the jump
+# of the shear force there, like the peaks of beam_response.BeamResponse.
+def candidate_stations(a, L):
+    b = L - a
+    after = np.nextafter(a, np.inf)
+    # simply supported: zero slope at sqrt((L^2 - b^2) / 3) left of the load or mirrored right of it
+    left = np.clip(np.sqrt(np.maximum(L ** 2 - b ** 2, 0.0) / 3), 0.0, a)
+    right = np.clip(L - np.sqrt(np.maximum(L ** 2 - a ** 2, 0.0) / 3), a, L)
+    return np.stack([np.zeros_like(a), a, after, L, left, right], axis=1)
+
+
+# Peak responses of many beams. Every argument is an array with one entry per beam, support_type is a single
+# support type. Returns (deflection x, deflection, von Mises x, von Mises), each an array per beam.
+def beam_peaks(F, a, L, EI, A, S, support_type):
+    F, a, L, EI, A, S = (np.asarray(v, dtype=float)[:, None] for v in (F, a, L, EI, A, S))
+    x = candidate_stations(a[:, 0], L[:, 0])
+    deflection = _deflection_EI(F, x, a, L, support_type) / EI
+    shear_stress = _shear_force(F, x, a, L, support_type) / A
+    bending_stress = _bending_moment(F, x, a, L, support_type) / S
+    von_mises = np.sqrt(bending_stress ** 2 + 3 * shear_stress ** 2)
+
+    rows = np.arange(len(x))
+    i = np.argmax(np.abs(deflection), axis=1)
+    j = np.argmax(von_mises, axis=1)
+    x = np.minimum(x, L)
+    return x[rows, i], deflection[rows, i], x[rows, j], von_mises[rows, j]
+
+
+def _float(row, name):
+    value = row.get(name)
+    if value in (None, ''):
+        raise KeyError(name)
+    return float(value)
+
+
+def _optional_float(row, name, default=None):
+    value = row.get(name)
+    return default if value in (None, '') else float(value)
+
+
+# an inventory reuses a few sections for many beams, so sections are built once per worker
+@functools.lru_cache(maxsize=4096)
+def _section(type, dims):
+    return Section(type, **dict(dims))
+
+
+# (F, a, L, E * I, A, S, support_type, max_deflection, max_stress) of one input row
+def parse_row(row, limits):
+    try:
+        xsection = row['xsection']
+        if isinstance(xsection, str):
+            xsection = dict({name: row.get(name) for name in SECTION_DIMS.get(xsection, ())}, type=xsection)
+        xsection = dict(xsection)
+        section = _section(xsection.pop('type', None), tuple(sorted(xsection.items())))
+        F, a, L = _float(row, 'F'), _float(row, 'a'), _float(row, 'L')
+        modulus = E[row['material']]
+        support_type = row['support_type']
+    except KeyError as error:
+        raise Exception(error_msg_row + 'missing ' + str(error))
+    except (TypeError, ValueError) as error:
+        raise Exception(error_msg_row + str(error))
+    if support_type not in ('cantilever', 'simply_supported'):
+        raise Exception(error_msg_row + 'invalid support_type ' + str(support_type))
+    if not 0.0 <= a <= L:
+        raise Exception(error_msg_row + 'a must be between 0 and L')
+
+    max_deflection = _optional_float(row, 'max_deflection', limits.get('max_deflection'))
+    if limits.get('span_ratio'):
+        span_limit = L / limits['span_ratio']
+        max_deflection = span_limit if max_deflection is None else min(max_deflection, span_limit)
+    max_stress = _optional_float(row, 'max_stress', limits.get('max_stress'))
+    return F, a, L, modulus * section.I, section.A, section.S, support_type, max_deflection, max_stress
+
+
+# Evaluates one chunk of (row number, row) pairs. Runs in the worker processes.
+def evaluate_chunk(chunk, limits=None):
+    limits = limits or {}
+    results = []
+    parsed = []
+    for number, row in chunk:
+        result = {'id': row.get('id', number)}
+        try:
+            parsed.append((len(results), parse_row(row, limits)))
+        except Exception as error:
+            result['error'] = str(error)
+        results.append(result)
+
+    for support_type in ('cantilever', 'simply_supported'):
+        group = [(k, p) for k, p in parsed if p[6] == support_type]
+        if not group:
+            continue
+        columns = list(zip(*(p for _, p in group)))
+        peaks = beam_peaks(*columns[:6], support_type=support_type)
+        for (k, p), dx, d, vx, v in zip(group, *peaks):
+            max_deflection, max_stress = p[7], p[8]
+            checks = []
+            if max_deflection is not None:
+                checks.append(abs(d) <= max_deflection)
+            if max_stress is not None:
+                checks.append(v <= max_stress)
+            results[k].update(max_deflection=float(d), max_deflection_x=float(dx), max_von_mises=float(v),
+                              max_von_mises_x=float(vx))
+            results[k]['pass'] = all(checks) if checks else None
+    return results
+
+
+def read_rows(stream, fmt):
+    if fmt == 'csv':
+        return csv.DictReader(stream)
+    elif fmt == 'jsonl':
+        return (json.loads(line) for line in stream if line.strip())
+    raise Exception(error_msg_format + str(fmt))
+
+
+def chunked(rows, size):
+    numbered = enumerate(rows, start=1)
+    while True:
+        chunk = list(itertools.islice(numbered, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# like Pool.imap, but keeps at most window chunks in flight so a large input is never read ahead of the
+# workers (Pool.imap consumes its whole input as fast as it can)
+def _imap_bounded(pool, func, chunks, window):
+    pending = collections.deque()
+    for chunk in chunks:
+        pending.append(pool.apply_async(func, (chunk,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def evaluate_stream(rows, limits=None, chunk_size=1000, workers=None):
+    func = _ChunkEvaluator(limits)
+    chunks = chunked(rows, chunk_size)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for chunk in chunks:
+            for result in func(chunk):
+                yield result
+        return
+    with multiprocessing.Pool(workers) as pool:
+        for results in _imap_bounded(pool, func, chunks, 2 * workers):
+            for result in results:
+                yield result
+
+
+# picklable evaluate_chunk with fixed limits, for the worker processes
+class _ChunkEvaluator(object):
+    def __init__(self, limits=None):
+        self.limits = limits or {}
+
+    def __call__(self, chunk):
+        return evaluate_chunk(chunk, self.limits)
+
+
+class _CsvWriter(object):
+    def __init__(self, stream):
+        self.writer = csv.DictWriter(stream, FIELDS, extrasaction='ignore')
+        self.writer.writeheader()
+
+    def write(self, result):
+        row = dict(result)
+        if row.get('pass') is not None:
+            row['pass'] = 'pass' if row['pass'] else 'fail'
+        for name in FIELDS[1:5]:
+            if name in row:
+                row[name] = repr(row[name])
+        self.writer.writerow(row)
+
+
+class _JsonlWriter(object):
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, result):
+        self.stream.write(json.dumps(result) + '\n')
+
+
+def _guess_format(path):
+    return 'jsonl' if os.path.splitext(path)[1].lower() in ('.jsonl', '.ndjson', '.json') else 'csv'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Evaluate many beams without the Dash app.',
+                                     epilog='The exit status is 1 when any beam fails a limit or is invalid.')
+    parser.add_argument('input', help="CSV or JSON Lines file of beams, '-' for stdin")
+    parser.add_argument('-o', '--output', default='-', help="output file, '-' for stdout (default)")
+    parser.add_argument('--input-format', choices=('csv', 'jsonl'), help='default: from the file extension')
+    parser.add_argument('--output-format', choices=('csv', 'jsonl'), help='default: from the file extension')
+    parser.add_argument('--max-deflection', type=float, help='deflection limit in m')
+    parser.add_argument('--span-ratio', type=float, help='deflection limit as L / ratio, e.g. 360')
+    parser.add_argument('--max-stress', type=float, help='von Mises stress limit in Pa')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='beams per chunk (default 1000)')
+    parser.add_argument('-j', '--workers', type=int, help='worker processes (default: number of cores)')
+    args = parser.parse_args(argv)
+
+    limits = {'max_deflection': args.max_deflection, 'span_ratio': args.span_ratio, 'max_stress': args.max_stress}
+    input_format = args.input_format or ('csv' if args.input == '-' else _guess_format(args.input))
+    output_format = args.output_format or ('csv' if args.output == '-' else _guess_format(args.output))
+
+    source = sys.stdin if args.input == '-' else open(args.input, newline='')
+    target = sys.stdout if args.output == '-' else open(args.output, 'w', newline='')
+    failed = 0
+    try:
+        writer = (_JsonlWriter if output_format == 'jsonl' else _CsvWriter)(target)
+        for result in evaluate_stream(read_rows(source, input_format), limits, args.chunk_size, args.workers):
+            writer.write(result)
+            if result.get('pass') is False or 'error' in result:
+                failed += 1
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
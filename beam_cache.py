@@ -0,0 +1,220 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+# Bounded, thread-safe LRU cache with an optional time-to-live.
+# maxsize: maximum number of entries. the least recently used entry is evicted when it is exceeded.
+# ttl: seconds an entry stays valid after it is stored. None keeps entries until they are evicted.
+#
+# Counters (see stats()) are updated under the same lock as the entries, so they are consistent when read
+# from the multi-threaded Flask server. Values are computed outside the lock, so a slow computation never
+# blocks readers of other keys.
+class LRUCache(object):
+    def __init__(self, maxsize=128, ttl=None, timer=time.monotonic):
+        if maxsize < 1:
+            raise Exception('maxsize must be at least 1')
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING, count=False) is not _MISSING
+
+    def get(self, key, default=None, count=True):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] is not None and entry[0] <= self._timer():
+                del self._entries[key]
+                self.expirations += 1
+                entry = _MISSING
+
+            if entry is _MISSING:
+                if count:
+                    self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            if count:
+                self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        expires_at = None if self.ttl is None else self._timer() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    # returns the cached value for key, calling compute() and storing its result on a miss
+    def get_or_compute(self, key, compute):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = self.set(key, compute())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Cache shared by every process that opens the same directory path (created if needed), with the interface
+# of LRUCache. Each entry is a pickle file named by a hash of repr(key), so keys need a repr that is the same in
+# every process: numbers, strings, and tuples or namedtuples of them. Files are replaced atomically, so a
+# reader never sees a half written entry. A directory under /dev/shm keeps the entries in memory.
+#
+# maxsize and ttl hold across processes: a hit refreshes the modification time of the entry, and every
+# maxsize // 8 stores of a process remove the least recently used files beyond maxsize. The counters are those
+# of this process. Two processes that miss the same key at once both compute it, and the last store wins.
+#
+# Entries are unpickled, and unpickling a file written by someone else can run any code, so the directory must
+# be private to the user of the app: it is created with mode 0o700 (an existing one is restricted to it), and
+# a directory owned by another user is refused.
+class DiskCache(object):
+    def __init__(self, path=None, maxsize=1024, ttl=None, timer=time.time):
+        if maxsize < 1:
+            raise Exception('maxsize must be at least 1')
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        if hasattr(os, 'getuid'):
+            if os.stat(path).st_uid != os.getuid():
+                raise Exception('cache directory not owned by this user: ' + str(path))
+            os.chmod(path, 0o700)
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._stores = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _file(self, key):
+        return os.path.join(self.path, hashlib.sha1(repr(key).encode('utf-8')).hexdigest() + '.pickle')
+
+    def _files(self):
+        return [os.path.join(self.path, name) for name in os.listdir(self.path) if name.endswith('.pickle')]
+
+    def _count(self, name, count=True):
+        if count:
+            with self._lock:
+                setattr(self, name, getattr(self, name) + 1)
+
+    def __len__(self):
+        return len(self._files())
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING, count=False) is not _MISSING
+
+    def get(self, key, default=None, count=True):
+        file = self._file(key)
+        try:
+            with open(file, 'rb') as f:
+                expires_at, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self._count('misses', count)
+            return default
+        if expires_at is not None and expires_at <= self._timer():
+            self._remove(file)
+            self._count('expirations')
+            self._count('misses', count)
+            return default
+        try:
+            os.utime(file)
+        except OSError:
+            pass
+        self._count('hits', count)
+        return value
+
+    def set(self, key, value):
+        expires_at = None if self.ttl is None else self._timer() + self.ttl
+        handle, temporary = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                pickle.dump((expires_at, value), f, pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, self._file(key))
+        except BaseException:
+            self._remove(temporary)
+            raise
+        with self._lock:
+            self._stores += 1
+            prune = self._stores % (self.maxsize // 8 + 1) == 0
+        if prune:
+            self._prune()
+        return value
+
+    # returns the cached value for key, calling compute() and storing its result on a miss
+    def get_or_compute(self, key, compute):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = self.set(key, compute())
+        return value
+
+    def _remove(self, file):
+        try:
+            os.remove(file)
+            return True
+        except OSError:
+            return False
+
+    def _prune(self):
+        entries = []
+        for file in self._files():
+            try:
+                entries.append((os.path.getmtime(file), file))
+            except OSError:
+                pass
+        for _, file in sorted(entries)[:max(len(entries) - self.maxsize, 0)]:
+            if self._remove(file):
+                self._count('evictions')
+
+    def clear(self):
+        for file in self._files():
+            self._remove(file)
+
+    def stats(self):
+        size = len(self)
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'size': size,
+                'maxsize': self.maxsize,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,323 @@
+import numpy as np
+
+from beam_loads import LoadCase, PointLoad, _bending_moment, _deflection_EI, _shear_force
+from beam_response import BeamResponse
+
+# Young's modulus constant in Pascal
+E = {
+    'aluminum': 68.0 * 10 ** 9,
+    'wood': 10.0 * 10 ** 9,
+    'titanium': 116.0 * 10 ** 9,
+    'steel': 200.0 * 10 ** 9, }
+
+# Density in kg/m^3
+DENSITY = {
+    'aluminum': 2700.0,
+    'wood': 600.0,
+    'titanium': 4500.0,
+    'steel': 7850.0, }
+
+# Allowable stress in Pascal: the yield strength of a common grade (6061-T6 aluminum, structural softwood
+# along the grain, Ti-6Al-4V, A36 steel), without a safety factor
+ALLOWABLE_STRESS = {
+    'aluminum': 276.0 * 10 ** 6,
+    'wood': 40.0 * 10 ** 6,
+    'titanium': 880.0 * 10 ** 6,
+    'steel': 250.0 * 10 ** 6, }
+
+error_msg_a = 'Is a between 0 and L? a: '
+error_msg_support_type = 'Invalid support_type'
+error_msg_xsection = 'Invalid xsection'
+error_msg_xsection_dims = 'Invalid xsection dimensions: '
+
+
+# F: force magnitude in newtons. this is a float.
+# x: inspection location, beam deflection at this location, in meters. this is a float.
+# material: will affect E (Young's modulus). expected value: 'aluminum', 'wood', 'titanium', 'steel'
+# xsection: beam cross section geometry in meters. will affect I. expected value: a Section, or a dict such as
+#           {'type': 'rectangular', 'b': float, 'h': float}, {'type': 'circle', 'r': float} (see SECTION_DIMS)
+# a: force location from left end of beam in meters. this is a float.
+# L: total length of beam in meters. this is a float.
+# support_type: type of beam support. expected value: 'cantilever', 'simply_supported'
+#
+# The scalar functions below are thin wrappers around the *_array kernels, which take x as a float or
+# a numpy array of inspection locations and evaluate every location in one pass.
+
+def beam_deflection(F=None, x=None, material=None, xsection=None, a=None, L=None, support_type=None):
+    return float(beam_deflection_array(F, x, material, xsection, a, L, support_type))
+
+
+def calc_I(xsection=None):
+    return as_section(xsection).I
+
+
+def beam_shear_force(F=None, x=None, a=None, L=None, support_type=None):
+    return float(beam_shear_force_array(F, x, a, L, support_type))
+
+
+def beam_bending_moment(F=None, x=None, a=None, L=None, support_type=None):
+    return float(beam_bending_moment_array(F, x, a, L, support_type))
+
+
+def calc_A(xsection=None):
+    return as_section(xsection).A
+
+
+def beam_shear_stress(F=None, x=None, xsection=None, a=None, L=None, support_type=None):
+    return float(beam_shear_stress_array(F, x, xsection, a, L, support_type))
+
+
+def calc_c(xsection=None):
+    return as_section(xsection).c
+
+
+def beam_bending_stress(F=None, x=None, xsection=None, a=None, L=None, support_type=None):
+    return float(beam_bending_stress_array(F, x, xsection, a, L, support_type))
+
+
+def von_mises_stress(F=None, x=None, xsection=None, a=None, L=None, support_type=None):
+    return float(von_mises_stress_array(F, x, xsection, a, L, support_type))
+
+
+#######################################################################
+# Cross sections
+#######################################################################
+
+# dimension names of every section type, in the order Section stores them
+# rectangular: width b, height h
+# circle: radius r
+# tube: outer radius r, wall thickness t
+# box: outer width b, outer height h, wall thickness t
+# i_beam: flange width b, overall height h, web thickness tw, flange thickness tf
+# tee: flange width b, overall height h, web thickness tw, flange thickness tf (flange on top)
+SECTION_DIMS = {
+    'rectangular': ('b', 'h'),
+    'circle': ('r',),
+    'tube': ('r', 't'),
+    'box': ('b', 'h', 't'),
+    'i_beam': ('b', 'h', 'tw', 'tf'),
+    'tee': ('b', 'h', 'tw', 'tf'),
+}
+
+
+# Immutable cross section. I (second moment of area), A (area), c (distance from the neutral axis to the
+# extreme fiber) and S (elastic section modulus I / c) are computed once when the section is created.
+class Section(object):
+    __slots__ = ('type', 'dims', 'I', 'A', 'c', 'S')
+
+    def __init__(self, type=None, **dims):
+        if type not in SECTION_DIMS:
+            raise Exception(error_msg_xsection)
+        try:
+            values = tuple(float(dims[name]) for name in SECTION_DIMS[type])
+        except (KeyError, TypeError, ValueError):
+            raise Exception(error_msg_xsection_dims + str(dims))
+        if not all(v > 0 for v in values):
+            raise Exception(error_msg_xsection_dims + str(dims))
+
+        I, A, c = _section_properties(type, *values)
+        for name, value in (('type', type), ('dims', values), ('I', I), ('A', A), ('c', c), ('S', I / c)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Section is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('Section is immutable')
+
+    def __eq__(self, other):
+        return isinstance(other, Section) and (self.type, self.dims) == (other.type, other.dims)
+
+    def __hash__(self):
+        return hash((self.type, self.dims))
+
+    def __repr__(self):
+        return 'Section({})'.format(', '.join(['{!r}'.format(self.type)] + [
+            '{}={!r}'.format(name, value) for name, value in zip(SECTION_DIMS[self.type], self.dims)]))
+
+    def __reduce__(self):
+        return _section_from_dict, (self.to_dict(),)
+
+    def to_dict(self):
+        xsection = dict(zip(SECTION_DIMS[self.type], self.dims))
+        xsection['type'] = self.type
+        return xsection
+
+    @classmethod
+    def rectangular(cls, b, h):
+        return cls('rectangular', b=b, h=h)
+
+    @classmethod
+    def circle(cls, r):
+        return cls('circle', r=r)
+
+    @classmethod
+    def tube(cls, r, t):
+        return cls('tube', r=r, t=t)
+
+    @classmethod
+    def box(cls, b, h, t):
+        return cls('box', b=b, h=h, t=t)
+
+    @classmethod
+    def i_beam(cls, b, h, tw, tf):
+        return cls('i_beam', b=b, h=h, tw=tw, tf=tf)
+
+    @classmethod
+    def tee(cls, b, h, tw, tf):
+        return cls('tee', b=b, h=h, tw=tw, tf=tf)
+
+
+def _section_from_dict(xsection):
+    return Section(**xsection)
+
+
+# returns (I, A, c) about the horizontal centroidal axis. dims may also be arrays of one shape, for many
+# sections of one type at once (see beam_uncertainty).
+def _section_properties(type, *dims):
+    if type == 'rectangular':
+        b, h = dims
+        return (b * h ** 3) / 12, b * h, 0.5 * h
+    elif type == 'circle':
+        r, = dims
+        return (np.pi * r ** 4) / 4, np.pi * r ** 2, r
+    elif type == 'tube':
+        r, t = dims
+        # a wall as thick as the radius is a solid circle
+        ri = np.maximum(r - t, 0.0)
+        return (np.pi * (r ** 4 - ri ** 4)) / 4, np.pi * (r ** 2 - ri ** 2), r
+    elif type == 'box':
+        b, h, t = dims
+        # walls meeting in the middle make a solid rectangle
+        bi, hi = np.maximum(b - 2 * t, 0.0), np.maximum(h - 2 * t, 0.0)
+        return (b * h ** 3 - bi * hi ** 3) / 12, b * h - bi * hi, 0.5 * h
+    elif type == 'i_beam':
+        b, h, tw, tf = dims
+        if np.any(tw > b) or np.any(2 * tf > h):
+            raise Exception(error_msg_xsection_dims + str(dims))
+        hw = h - 2 * tf
+        return (b * h ** 3 - (b - tw) * hw ** 3) / 12, 2 * b * tf + hw * tw, 0.5 * h
+    elif type == 'tee':
+        b, h, tw, tf = dims
+        if np.any(tw > b) or np.any(tf > h):
+            raise Exception(error_msg_xsection_dims + str(dims))
+        hw = h - tf
+        A_f, A_w = b * tf, tw * hw
+        y_f, y_w = h - 0.5 * tf, 0.5 * hw  # centroids measured from the bottom of the web
+        y_bar = (A_f * y_f + A_w * y_w) / (A_f + A_w)
+        I = (b * tf ** 3) / 12 + A_f * (y_f - y_bar) ** 2 + (tw * hw ** 3) / 12 + A_w * (y_w - y_bar) ** 2
+        return I, A_f + A_w, np.maximum(y_bar, h - y_bar)
+    else:
+        raise Exception(error_msg_xsection)
+
+
+# converts the dict form of a cross section to a Section. Sections are returned unchanged.
+def as_section(xsection=None):
+    if isinstance(xsection, Section):
+        return xsection
+    try:
+        return _section_from_dict(xsection)
+    except TypeError:
+        raise Exception(error_msg_xsection)
+
+
+#######################################################################
+# Vectorized kernels
+#######################################################################
+
+# x is clamped to the beam like the scalar functions always did
+def clip_stations(x=None, L=None):
+    return np.clip(np.asarray(x, dtype=float), 0.0, L)
+
+
+def beam_deflection_array(F=None, x=None, material=None, xsection=None, a=None, L=None, support_type=None):
+    x = clip_stations(x, L)
+    return _deflection_EI(F, x, a, L, support_type) / (E[material] * as_section(xsection).I)
+
+
+def beam_shear_force_array(F=None, x=None, a=None, L=None, support_type=None):
+    return _shear_force(F, clip_stations(x, L), a, L, support_type)
+
+
+def beam_bending_moment_array(F=None, x=None, a=None, L=None, support_type=None):
+    return _bending_moment(F, clip_stations(x, L), a, L, support_type)
+
+
+def beam_shear_stress_array(F=None, x=None, xsection=None, a=None, L=None, support_type=None):
+    return beam_shear_force_array(F, x, a, L, support_type) / as_section(xsection).A
+
+
+def beam_bending_stress_array(F=None, x=None, xsection=None, a=None, L=None, support_type=None):
+    return beam_bending_moment_array(F, x, a, L, support_type) / as_section(xsection).S
+
+
+def von_mises_stress_array(F=None, x=None, xsection=None, a=None, L=None, support_type=None):
+    return evaluate_beam(F, x, None, xsection, a, L, support_type)['von_mises']
+
+
+# Fused evaluation of every quantity the graphs need over a whole array of stations.
+# Section properties are computed once and the stresses reuse the shear force and moment arrays.
+# material may be None when the deflection is not needed.
+def evaluate_beam(F=None, x=None, material=None, xsection=None, a=None, L=None, support_type=None):
+    x = clip_stations(x, L)
+    section = as_section(xsection)
+
+    shear_force = _shear_force(F, x, a, L, support_type)
+    bending_moment = _bending_moment(F, x, a, L, support_type)
+    shear_stress = shear_force / section.A
+    bending_stress = bending_moment / section.S
+
+    response = {
+        'x': x,
+        'shear_force': shear_force,
+        'bending_moment': bending_moment,
+        'shear_stress': shear_stress,
+        'bending_stress': bending_stress,
+        'von_mises': np.sqrt(bending_stress ** 2 + 3 * shear_stress ** 2),
+    }
+    if material is not None:
+        response['deflection'] = _deflection_EI(F, x, a, L, support_type) / (E[material] * section.I)
+    return response
+
+
+# Superposition of any number of point, moment and distributed loads (see beam_loads.LoadCase), with the
+# same keys as evaluate_beam plus 'deflection_EI'. material may be None when the deflection is not needed.
+def evaluate_loads(loads=None, x=None, material=None, xsection=None, L=None, support_type=None):
+    section = as_section(xsection)
+    EI = 1.0 if material is None else E[material] * section.I
+    response = LoadCase(loads, L, support_type).evaluate(x, EI=EI, A=section.A, S=section.S)
+    if material is None:
+        del response['deflection']
+    return response
+
+
+# Material independent response of a point load F at a and any additional loads (see beam_loads), with the
+# keys of evaluate_beam plus 'deflection_EI'. The point load comes from the closed forms above and the
+# additional loads are superposed on it, so the app, the material comparison and the API all evaluate a load
+# case the same way.
+def evaluate_case(F=None, x=None, xsection=None, a=None, L=None, support_type=None, loads=()):
+    section = as_section(xsection)
+    response = evaluate_beam(F=F, x=x, xsection=section, a=a, L=L, support_type=support_type)
+    response['deflection_EI'] = _deflection_EI(F, response['x'], a, L, support_type)
+    if loads:
+        V, M, EIy = LoadCase(loads, L, support_type).superpose(response['x'])
+        response['shear_force'] = response['shear_force'] + V
+        response['bending_moment'] = response['bending_moment'] + M
+        response['deflection_EI'] = response['deflection_EI'] + EIy
+        response['shear_stress'] = response['shear_force'] / section.A
+        response['bending_stress'] = response['bending_moment'] / section.S
+        response['von_mises'] = np.sqrt(response['bending_stress'] ** 2 + 3 * response['shear_stress'] ** 2)
+    return response
+
+
+# Piecewise polynomial model of the same closed forms (see beam_response.BeamResponse). It evaluates any
+# stations with Horner's scheme and gives the exact location and value of the peak responses.
+# With additional loads the point load F at a is superposed with them (see beam_loads.LoadCase).
+def beam_response_model(F=None, material=None, xsection=None, a=None, L=None, support_type=None, loads=()):
+    section = as_section(xsection)
+    EI = E[material] * section.I
+    if loads:
+        case = LoadCase((PointLoad(F, a),) + tuple(loads), L, support_type)
+        return BeamResponse.from_polynomials(*case.polynomials(), L=L, support_type=support_type, EI=EI,
+                                             A=section.A, S=section.S)
+    return BeamResponse(F=F, a=a, L=L, support_type=support_type, EI=EI, A=section.A, S=section.S)
@@ -0,0 +1,180 @@
+import numpy as np
+
+from beam_batch import candidate_stations
+from beam_core import (ALLOWABLE_STRESS, DENSITY, E, Section, _bending_moment, _deflection_EI, _section_properties,
+                       _shear_force)
+from beam_loads import LoadCase, PointLoad
+from beam_response import BeamResponse
+
+error_msg_constraints = 'Give max_deflection, allowable_stress or both'
+error_msg_objective = 'Invalid objective: '
+error_msg_design_type = 'Only rectangular and circle sections can be designed, got '
+
+# Lightest section of each material that carries a load case within a deflection limit and an allowable
+# von Mises stress.
+#
+# Each section type is scaled by one size s: a circle of radius s, or a rectangle of width s and height
+# aspect * s. Then A grows as s^2, S as s^3 and I as s^4, so the peak deflection (max |E I y| / (E I)) and
+# the peak von Mises stress (max over x of sqrt((M / S)^2 + 3 (V / A)^2)) both fall as s grows, and the
+# smallest feasible s is also the lightest section. V, M and E I y do not depend on the section, so they are
+# evaluated once. The search then
+#   1. evaluates every (material, type, size) of a geometric grid of sizes in one broadcast and finds the
+#      first feasible size of each (material, type),
+#   2. bisects every (material, type) at once between that size and the one before it, to rtol.
+#
+# Stresses are evaluated where they can peak: for a single point load at both ends and both sides of the load,
+# which is exact (the moment is linear and the shear constant between them), with additional loads at their
+# breakpoints and n_stations evenly spaced stations.
+
+DESIGN_TYPES = ('rectangular', 'circle')
+OBJECTIVES = ('weight', 'area')
+
+
+# (I, A, S) of the section type at size 1
+def _unit_properties(section_type, aspect):
+    if section_type == 'rectangular':
+        I, A, c = _section_properties('rectangular', 1.0, aspect)
+    elif section_type == 'circle':
+        I, A, c = _section_properties('circle', 1.0)
+    else:
+        raise Exception(error_msg_design_type + str(section_type))
+    return I, A, I / c
+
+
+def _section(section_type, size, aspect):
+    if section_type == 'rectangular':
+        return Section.rectangular(size, aspect * size)
+    return Section.circle(size)
+
+
+# Stations whose (|V|, |M|) no other station exceeds in both. The von Mises stress grows with |V| and |M| for
+# any section, so its peak is always at one of these, and the search only needs them.
+def _dominant(V, M):
+    V, M = np.abs(V), np.abs(M)
+    order = np.lexsort((-V, -M))
+    V, M = V[order], M[order]
+    keep = V > np.maximum.accumulate(np.concatenate([[-1.0], V[:-1]]))
+    return V[keep], M[keep]
+
+
+# (max |E I y|, |V|, |M|): the peak of E * I * deflection and the shear force and moment at the stations where
+# the stresses can peak
+def load_effects(F=None, a=None, L=None, support_type=None, loads=(), n_stations=2001):
+    # the point load from its closed forms and the additional loads on top, as beam_core.evaluate_case
+    if loads:
+        case = LoadCase((PointLoad(F, a),) + tuple(loads), L, support_type)
+        deflection = abs(BeamResponse.from_polynomials(*case.polynomials(), L=L,
+                                                       support_type=support_type).max_deflection()[1])
+        breakpoints = case.breakpoints()
+        x = np.clip(np.unique(np.concatenate([np.linspace(0.0, L, n_stations), breakpoints,
+                                              np.nextafter(breakpoints, np.inf)])), 0.0, L)
+        V_loads, M_loads, _ = LoadCase(loads, L, support_type).superpose(x)
+    else:
+        x = candidate_stations(np.array([float(a)]), np.array([float(L)]))[0]
+        deflection = np.max(np.abs(_deflection_EI(F, x, a, L, support_type)))
+        V_loads = M_loads = 0.0
+    return (deflection,) + _dominant(_shear_force(F, x, a, L, support_type) + V_loads,
+                                     _bending_moment(F, x, a, L, support_type) + M_loads)
+
+
+# Peak deflection and von Mises stress of sections of unit properties (I, A, S) scaled by sizes, for
+# the load effects of load_effects. Every argument broadcasts, the stations go along a new last axis.
+def _peaks(deflection_EI, V, M, modulus, I, A, S, size):
+    deflection = deflection_EI / (modulus * I * size ** 4)
+    size = np.expand_dims(size, -1)
+    bending = M / (np.expand_dims(S, -1) * size ** 3)
+    shear = V / (np.expand_dims(A, -1) * size ** 2)
+    return deflection, np.sqrt(np.max(bending ** 2 + 3 * shear ** 2, axis=-1))
+
+
+# Smallest size of every (material, section type) pair that meets the limits, within rtol.
+# Returns a list of dicts, one per pair, with the keys
+#   material, type, xsection (dict form of the section, None when infeasible), size, area (m^2),
+#   weight (kg), max_deflection (m), max_von_mises (Pa), deflection_ratio and stress_ratio (value / limit),
+#   governing ('deflection' or 'stress', the limit that sets the size) and feasible.
+# max_deflection: limit on |deflection| in m, None for no limit.
+# allowable_stress: von Mises limit in Pa, one number or a dict by material (default ALLOWABLE_STRESS).
+#                   None for no limit when max_deflection is given.
+# aspect: height / width of the rectangles.
+# min_size, max_size: range of the sizes searched, in m. a pair infeasible at max_size is reported with
+#                     feasible False.
+def size_sections(F=None, a=None, L=None, support_type=None, max_deflection=None, allowable_stress=ALLOWABLE_STRESS,
+                  materials=None, section_types=DESIGN_TYPES, aspect=2.0, loads=(), density=None, min_size=1e-3,
+                  max_size=10.0, grid=64, rtol=1e-9):
+    if max_deflection is None and allowable_stress is None:
+        raise Exception(error_msg_constraints)
+    materials = list(materials or E)
+    section_types = list(section_types)
+    density = density or DENSITY
+    deflection_EI, V, M = load_effects(F, a, L, support_type, loads)
+
+    # one row per (material, section type) pair
+    pairs = [(m, t) for m in materials for t in section_types]
+    modulus = np.array([E[m] for m, _ in pairs])
+    I, A, S = np.array([_unit_properties(t, aspect) for _, t in pairs]).T
+    deflection_limit = np.inf if max_deflection is None else float(max_deflection)
+    if allowable_stress is None:
+        stress_limit = np.full(len(pairs), np.inf)
+    elif isinstance(allowable_stress, dict):
+        stress_limit = np.array([allowable_stress[m] for m, _ in pairs], dtype=float)
+    else:
+        stress_limit = np.full(len(pairs), float(allowable_stress))
+
+    # size: (pairs,) or (pairs, grid)
+    def feasible(size):
+        shape = (-1,) + (1,) * (size.ndim - 1)
+        deflection, stress = _peaks(deflection_EI, V, M, *(v.reshape(shape) for v in (modulus, I, A, S)), size)
+        return (deflection <= deflection_limit) & (stress <= stress_limit.reshape(shape))
+
+    # 1. the grid, (pairs, grid) in one broadcast
+    sizes = np.geomspace(min_size, max_size, grid)
+    ok = feasible(np.broadcast_to(sizes, (len(pairs), grid)))
+    found = ok.any(axis=1)
+    first = np.argmax(ok, axis=1)
+
+    # 2. bisection between the last infeasible and the first feasible grid size
+    hi = np.where(found, sizes[first], max_size)
+    lo = np.where(first > 0, sizes[np.maximum(first - 1, 0)], sizes[0])
+    active = found & (first > 0)
+    while np.any(active & (hi - lo > rtol * hi)):
+        mid = 0.5 * (lo + hi)
+        good = feasible(mid)
+        hi = np.where(active & good, mid, hi)
+        lo = np.where(active & ~good, mid, lo)
+
+    deflection, stress = _peaks(deflection_EI, V, M, modulus, I, A, S, hi)
+    designs = []
+    for k, (material, section_type) in enumerate(pairs):
+        area = A[k] * hi[k] ** 2
+        deflection_ratio = deflection[k] / deflection_limit
+        stress_ratio = stress[k] / stress_limit[k]
+        designs.append({
+            'material': material,
+            'type': section_type,
+            'xsection': _section(section_type, hi[k], aspect).to_dict() if found[k] else None,
+            'size': float(hi[k]) if found[k] else None,
+            'area': float(area),
+            'weight': float(area * L * density[material]),
+            'max_deflection': float(deflection[k]),
+            'max_von_mises': float(stress[k]),
+            'deflection_ratio': float(deflection_ratio),
+            'stress_ratio': float(stress_ratio),
+            'governing': 'deflection' if deflection_ratio >= stress_ratio else 'stress',
+            'feasible': bool(found[k]),
+        })
+    return designs
+
+
+# The lightest feasible section of each material, as a list of the dicts of size_sections sorted by the
+# objective ('weight' in kg or 'area' in m^2). Materials without a feasible section come last, with their
+# best attempt at max_size.
+def design_sections(F=None, a=None, L=None, support_type=None, max_deflection=None,
+                    allowable_stress=ALLOWABLE_STRESS, objective='weight', **kwargs):
+    if objective not in OBJECTIVES:
+        raise Exception(error_msg_objective + str(objective))
+    best = {}
+    for design in size_sections(F, a, L, support_type, max_deflection, allowable_stress, **kwargs):
+        current = best.get(design['material'])
+        if current is None or (design['feasible'], -design[objective]) > (current['feasible'], -current[objective]):
+            best[design['material']] = design
+    return sorted(best.values(), key=lambda design: (not design['feasible'], design[objective]))
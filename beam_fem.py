@@ -0,0 +1,450 @@
+from collections import namedtuple
+
+import numpy as np
+
+from beam_core import E, as_section
+from beam_loads import DistributedLoad, PointLoad, as_load
+
+error_msg_support = 'Invalid support: '
+error_msg_support_type = 'Invalid support_type'
+error_msg_segment = 'Invalid segment: '
+error_msg_properties = 'EI, A and S must be positive, one value or one per element between the nodes'
+error_msg_nodes = 'nodes must increase from 0 to L'
+error_msg_load = 'Load outside the beam: '
+error_msg_unstable = 'The supports do not hold the beam: it needs two vertical supports, or one vertical support ' \
+                     'and one that holds the rotation'
+
+# Euler-Bernoulli finite element model of a beam on any number of pinned, fixed and spring supports, with a
+# bending stiffness, area and section modulus that may change from element to element.
+#
+# The elements between two neighbouring supports (or a support and a free end) are condensed into one exact
+# superelement: starting from the shear force, moment, slope and deflection at its left node, the deflection
+# anywhere follows from integrating the curvature M / EI element by element (cumulative sums over the
+# elements, with the exact polynomials of a linear line load inside each one). The stiffness of a superelement
+# and its fixed-end forces follow from the same integrals. The superelements form a symmetric block tridiagonal
+# (banded) stiffness matrix of 2 x 2 node blocks (deflection and slope), solved by block cyclic reduction.
+# Everything is vectorized over the elements, so the cost grows linearly with their number.
+#
+# Assembling the element stiffness matrices directly would give the same equations, but their condition number
+# grows as elements^4 (1e-5 relative error at 1000 elements, nothing left at 10^5); the superelements only
+# couple the supports and keep the results exact to round-off for any number of elements.
+#
+# Sign conventions match the closed forms of beam_core and beam_loads: y up, a positive point load or line
+# load points down, the bending moment M = EI y'' is positive when sagging and V = dM/dx. A station on a load
+# reports the value just left of it, like the closed forms.
+
+# Supports. Positions in m from the left end, stiffness k in N/m and kr in N*m/rad.
+# PinSupport: no deflection. FixedSupport: no deflection and no rotation. SpringSupport: elastic.
+PinSupport = namedtuple('PinSupport', ['x'])
+FixedSupport = namedtuple('FixedSupport', ['x'])
+SpringSupport = namedtuple('SpringSupport', ['x', 'k', 'kr'])
+# section and material on [x0, x1]: bending stiffness E * I, area A and section modulus S
+Segment = namedtuple('Segment', ['x0', 'x1', 'EI', 'A', 'S'])
+
+# named support types: the two with closed forms in beam_core and two statically indeterminate ones
+SUPPORT_TYPES = ('cantilever', 'simply_supported', 'fixed_fixed', 'propped_cantilever')
+
+
+# converts the dict form used by the JSON interfaces, for example {'type': 'pin', 'x': 0.0},
+# {'type': 'fixed', 'x': 0.0} or {'type': 'spring', 'x': 5.0, 'k': 1e6, 'kr': 0.0}. supports are returned
+# unchanged.
+def as_support(support):
+    if isinstance(support, (PinSupport, FixedSupport, SpringSupport)):
+        return support
+    try:
+        kind = support['type']
+        if kind == 'pin':
+            return PinSupport(float(support['x']))
+        elif kind == 'fixed':
+            return FixedSupport(float(support['x']))
+        elif kind == 'spring':
+            k, kr = float(support.get('k', 0.0)), float(support.get('kr', 0.0))
+            if k >= 0 and kr >= 0:
+                return SpringSupport(float(support['x']), k, kr)
+    except (KeyError, TypeError, ValueError):
+        pass
+    raise Exception(error_msg_support + str(support))
+
+
+def support_to_dict(support):
+    support = as_support(support)
+    kind = {PinSupport: 'pin', FixedSupport: 'fixed', SpringSupport: 'spring'}[type(support)]
+    return dict(support._asdict(), type=kind)
+
+
+# supports of a named support type on a beam of length L. cantilevers are fixed at x = 0 like the closed forms.
+def preset_supports(support_type=None, L=None):
+    if support_type == 'cantilever':
+        return (FixedSupport(0.0),)
+    elif support_type == 'simply_supported':
+        return PinSupport(0.0), PinSupport(L)
+    elif support_type == 'fixed_fixed':
+        return FixedSupport(0.0), FixedSupport(L)
+    elif support_type == 'propped_cantilever':
+        return FixedSupport(0.0), PinSupport(L)
+    raise Exception(error_msg_support_type)
+
+
+# (L, supports) of a continuous beam over spans of the given lengths, with pins between the spans. left and
+# right: 'pin', 'fixed' or None for a free end.
+def continuous_supports(spans=None, left='pin', right='pin'):
+    positions = np.concatenate([[0.0], np.cumsum(np.asarray(spans, dtype=float))])
+    supports = [PinSupport(float(x)) for x in positions[1:-1]]
+    for end, x in ((left, positions[0]), (right, positions[-1])):
+        if end is not None:
+            supports.append(as_support({'type': end, 'x': float(x)}))
+    return float(positions[-1]), tuple(supports)
+
+
+# converts {'x0', 'x1', 'material', 'xsection'} (or 'EI', 'A', 'S' instead of the material and section) to a
+# Segment. segments are returned unchanged.
+def as_segment(segment):
+    if isinstance(segment, Segment):
+        return segment
+    try:
+        x0, x1 = float(segment['x0']), float(segment['x1'])
+        if 'material' in segment:
+            section = as_section(segment['xsection'])
+            return Segment(x0, x1, E[segment['material']] * section.I, section.A, section.S)
+        return Segment(x0, x1, float(segment['EI']), float(segment.get('A', 1.0)), float(segment.get('S', 1.0)))
+    except (KeyError, TypeError, ValueError):
+        pass
+    raise Exception(error_msg_segment + str(segment))
+
+
+#######################################################################
+# Banded solver
+#######################################################################
+
+def _inv2(M):
+    det = M[:, 0, 0] * M[:, 1, 1] - M[:, 0, 1] * M[:, 1, 0]
+    inverse = np.empty_like(M)
+    inverse[:, 0, 0] = M[:, 1, 1]
+    inverse[:, 0, 1] = -M[:, 0, 1]
+    inverse[:, 1, 0] = -M[:, 1, 0]
+    inverse[:, 1, 1] = M[:, 0, 0]
+    return inverse / det[:, None, None]
+
+
+def _mv(M, v):
+    return np.einsum('nij,nj->ni', M, v)
+
+
+# Solves A[i] x[i - 1] + B[i] x[i] + C[i] x[i + 1] = d[i] for blocks A, B, C of shape (n, 2, 2) and d of
+# shape (n, 2) (A[0] and C[-1] are not used) by cyclic reduction: the odd rows are eliminated from the even
+# ones, which form a block tridiagonal system of half the size, and are then recovered from them. For a
+# symmetric positive definite matrix every reduced system is too, so no pivoting is needed.
+def _solve_block_tridiagonal(A, B, C, d):
+    n = len(B)
+    if n == 1:
+        return _mv(_inv2(B), d)
+    n_even, n_odd = (n + 1) // 2, n // 2
+    A_odd, B_odd, C_odd, d_odd = A[1::2], B[1::2], C[1::2], d[1::2]
+    inverse = _inv2(B_odd)
+
+    # even row 2k couples with the odd rows 2k - 1 (odd index k - 1) and 2k + 1 (odd index k)
+    alpha = A[2::2] @ inverse[:n_even - 1]
+    gamma = C[0:2 * n_odd:2] @ inverse
+    A_even = np.zeros((n_even, 2, 2))
+    C_even = np.zeros((n_even, 2, 2))
+    B_even = B[::2].copy()
+    d_even = d[::2].copy()
+    B_even[1:] -= alpha @ C_odd[:n_even - 1]
+    B_even[:n_odd] -= gamma @ A_odd
+    d_even[1:] -= _mv(alpha, d_odd[:n_even - 1])
+    d_even[:n_odd] -= _mv(gamma, d_odd)
+    A_even[1:] = -alpha @ A_odd[:n_even - 1]
+    C_even[:n_odd] = -gamma @ C_odd
+    x_even = _solve_block_tridiagonal(A_even, B_even, C_even, d_even)
+
+    rhs = d_odd - _mv(A_odd, x_even[:n_odd])
+    rhs[:n_even - 1] -= _mv(C_odd[:n_even - 1], x_even[1:])
+    x = np.empty((n, 2))
+    x[::2] = x_even
+    x[1::2] = _mv(inverse, rhs)
+    return x
+
+
+#######################################################################
+# Element integrals
+#######################################################################
+
+# sum of values over the earlier elements of the same superelement. first: index of the first element of the
+# superelement of every element.
+def _running_sum(values, first):
+    total = np.cumsum(values) - values
+    return total - total[first]
+
+
+# Shear force, moment, slope and deflection at the left end of every element, marching from the states at
+# the left node of each superelement (V0, M0, theta0, y0, arrays per element). l, EI: length and stiffness of
+# the elements, p and q the line load p + q * s (s from the left end of the element, downward), dV and dM the
+# jumps at the left end of the element from point and moment loads.
+def _march(l, EI, p, q, dV, dM, first, V0, M0, theta0, y0):
+    V = V0 + _running_sum(-(p * l + q * l * l / 2), first) + _running_sum(dV, first) + dV
+    M = M0 + _running_sum(V * l - (p * l * l / 2 + q * l ** 3 / 6), first) + _running_sum(dM, first) + dM
+    theta = theta0 + _running_sum((M * l + V * l * l / 2 - p * l ** 3 / 6 - q * l ** 4 / 24) / EI, first)
+    y = y0 + _running_sum(theta * l + (M * l * l / 2 + V * l ** 3 / 6 - p * l ** 4 / 24 - q * l ** 5 / 120) / EI,
+                          first)
+    return V, M, theta, y
+
+
+# (V, M, theta, y) at s from the left end of elements starting in the states (V, M, theta, y)
+def _element_values(s, EI, p, q, V, M, theta, y):
+    return (V - (p * s + q * s * s / 2),
+            M + V * s - (p * s * s / 2 + q * s ** 3 / 6),
+            theta + (M * s + V * s * s / 2 - p * s ** 3 / 6 - q * s ** 4 / 24) / EI,
+            y + theta * s + (M * s * s / 2 + V * s ** 3 / 6 - p * s ** 4 / 24 - q * s ** 5 / 120) / EI)
+
+
+#######################################################################
+# Model
+#######################################################################
+
+# A beam of length L on supports (see as_support). EI (bending stiffness), A (area) and S (section modulus)
+# are either single values or arrays of one value per element between nodes, increasing positions from 0 to L
+# (default: one element over the whole beam). Supports and loads add nodes where they are.
+class BeamModel(object):
+    def __init__(self, L=None, supports=(), EI=1.0, A=1.0, S=1.0, nodes=None):
+        self.L = float(L)
+        self.supports = tuple(as_support(support) for support in supports)
+        self.nodes = np.array([0.0, self.L]) if nodes is None else np.asarray(nodes, dtype=float)
+        n = len(self.nodes) - 1
+        if n < 1 or self.nodes[0] != 0.0 or self.nodes[-1] != self.L or np.any(np.diff(self.nodes) <= 0):
+            raise Exception(error_msg_nodes)
+        try:
+            self.EI, self.A, self.S = (np.broadcast_to(np.asarray(v, dtype=float), (n,)) for v in (EI, A, S))
+        except ValueError:
+            raise Exception(error_msg_properties)
+        if not (np.all(self.EI > 0) and np.all(self.A > 0) and np.all(self.S > 0)):
+            raise Exception(error_msg_properties)
+
+        for support in self.supports:
+            if not 0.0 <= support.x <= self.L:
+                raise Exception(error_msg_support + str(support))
+        # positions, rigid restraints and spring stiffnesses of the supports as arrays
+        springs = [s if isinstance(s, SpringSupport) else SpringSupport(s.x, 0.0, 0.0) for s in self.supports]
+        self.positions = np.array([s.x for s in self.supports])
+        self.pinned = np.array([not isinstance(s, SpringSupport) for s in self.supports], dtype=bool)
+        self.clamped = np.array([isinstance(s, FixedSupport) for s in self.supports], dtype=bool)
+        self.k = np.array([s.k for s in springs])
+        self.kr = np.array([s.kr for s in springs])
+        translations = np.unique(self.positions[self.pinned | (self.k > 0)])
+        if not (len(translations) >= 2 or (len(translations) and np.any(self.clamped | (self.kr > 0)))):
+            raise Exception(error_msg_unstable)
+
+    # a single material and section on preset supports (see preset_supports). material None gives EI = I.
+    @classmethod
+    def from_support_type(cls, support_type=None, L=None, material=None, xsection=None):
+        section = as_section(xsection)
+        modulus = 1.0 if material is None else E[material]
+        return cls(L, preset_supports(support_type, L), modulus * section.I, section.A, section.S)
+
+    # segments (see as_segment) covering the beam. where they overlap the later one applies.
+    @classmethod
+    def from_segments(cls, L=None, supports=(), segments=()):
+        segments = [as_segment(segment) for segment in segments]
+        nodes = np.unique([0.0, float(L)] + [x for segment in segments for x in (segment.x0, segment.x1)])
+        nodes = nodes[(nodes >= 0.0) & (nodes <= L)]
+        middle = 0.5 * (nodes[:-1] + nodes[1:])
+        EI, A, S = (np.full(len(middle), np.nan) for _ in range(3))
+        for segment in segments:
+            inside = (middle >= segment.x0) & (middle <= segment.x1)
+            EI[inside], A[inside], S[inside] = segment.EI, segment.A, segment.S
+        if np.any(np.isnan(EI)):
+            raise Exception(error_msg_segment + 'the segments must cover the beam')
+        return cls(L, supports, EI, A, S, nodes)
+
+    # Solves the model for loads (see beam_loads.as_load), returns a Solution.
+    def solve(self, loads=()):
+        loads = tuple(as_load(load) for load in loads)
+        for load in loads:
+            positions = (load.x0, load.x1) if isinstance(load, DistributedLoad) else (load.a,)
+            if not all(0.0 <= p <= self.L for p in positions) or positions[0] > positions[-1]:
+                raise Exception(error_msg_load + str(load))
+
+        # elements: the model nodes plus every support and load position. positions closer than 1e-12 * L to
+        # a node are moved onto it.
+        points = list(self.positions)
+        for load in loads:
+            points.extend((load.x0, load.x1) if isinstance(load, DistributedLoad) else (load.a,))
+        nodes = np.union1d(self.nodes, points)
+        nodes = nodes[np.concatenate([[True], np.diff(nodes) > 1e-12 * self.L])]
+        nodes[-1] = self.L
+        l = np.diff(nodes)
+        middle = 0.5 * (nodes[:-1] + nodes[1:])
+        properties = np.clip(np.searchsorted(self.nodes, middle) - 1, 0, len(self.EI) - 1)
+        EI, A, S = self.EI[properties], self.A[properties], self.S[properties]
+
+        # superelements between the key nodes: the ends and the supports
+        supports = _node(nodes, self.positions)
+        key = np.unique(np.concatenate([[0, len(nodes) - 1], supports]))
+        group = np.searchsorted(key, np.arange(len(l)), side='right') - 1
+        first = key[group]
+
+        # line loads p + q * s on every element, point and moment loads at the left end of the elements inside a
+        # superelement, and at the key nodes (upward force, counterclockwise moment)
+        p, q = np.zeros(len(l)), np.zeros(len(l))
+        dV, dM = np.zeros(len(l)), np.zeros(len(l))
+        nodal = np.zeros((len(key), 2))
+        is_key = np.zeros(len(nodes), dtype=bool)
+        is_key[key] = True
+        for load in loads:
+            if isinstance(load, DistributedLoad):
+                if load.x1 > load.x0:
+                    slope = (load.w1 - load.w0) / (load.x1 - load.x0)
+                    inside = (middle > load.x0) & (middle < load.x1)
+                    p[inside] += load.w0 + slope * (nodes[:-1][inside] - load.x0)
+                    q[inside] += slope
+                continue
+            i = _node(nodes, load.a)
+            if is_key[i]:
+                k = np.searchsorted(key, i)
+                if isinstance(load, PointLoad):
+                    nodal[k, 0] -= load.F
+                else:
+                    # a counterclockwise couple lowers the sagging moment to its right
+                    nodal[k, 1] -= load.M
+            elif isinstance(load, PointLoad):
+                dV[i] -= load.F
+            else:
+                dM[i] += load.M
+
+        # each superelement maps the moment M0 and shear V0 at its left end to the slope and deflection at its
+        # right end: theta1 - theta0 = a1 M0 + a2 V0 + aL, y1 - y0 - Ls theta0 = b1 M0 + b2 V0 + bL
+        zero = np.zeros(len(l))
+        ends = key[1:] - 1
+
+        def right_end(p, q, dV, dM, V0, M0):
+            V, M, theta, y = _march(l, EI, p, q, dV, dM, first, V0, M0, zero, zero)
+            return tuple(v[ends] for v in _element_values(l, EI, p, q, V, M, theta, y))
+
+        _, _, a1, b1 = right_end(zero, zero, zero, zero, zero, zero + 1.0)
+        _, _, a2, b2 = right_end(zero, zero, zero, zero, zero + 1.0, zero)
+        VL, ML, aL, bL = right_end(p, q, dV, dM, zero, zero)
+        Ls = nodes[key[1:]] - nodes[key[:-1]]
+
+        # [M0, V0] = H u - h for u = (y0, theta0, y1, theta1), and the end forces (upward force, counterclockwise
+        # moment at both ends) = (V0, -M0, -V1, M1) = K u - f
+        G_inverse = _inv2(np.stack([np.stack([a1, a2], axis=1), np.stack([b1, b2], axis=1)], axis=1))
+        T = np.zeros((len(Ls), 2, 4))
+        T[:, 0, 1], T[:, 0, 3] = -1.0, 1.0
+        T[:, 1, 0], T[:, 1, 1], T[:, 1, 2] = -1.0, -Ls, 1.0
+        H = G_inverse @ T
+        h = _mv(G_inverse, np.stack([aL, bL], axis=1))
+        P = np.zeros((len(Ls), 4, 2))
+        P[:, 0, 1], P[:, 1, 0], P[:, 2, 1] = 1.0, -1.0, -1.0
+        P[:, 3, 0], P[:, 3, 1] = 1.0, Ls
+        K = P @ H
+        K = 0.5 * (K + np.transpose(K, (0, 2, 1)))
+        f = _mv(P, h) - np.stack([0 * Ls, 0 * Ls, -VL, ML], axis=1)
+
+        # banded stiffness matrix of the key nodes
+        n = len(key)
+        B = np.zeros((n, 2, 2))
+        B[:-1] += K[:, :2, :2]
+        B[1:] += K[:, 2:, 2:]
+        C = np.zeros((n, 2, 2))
+        C[:-1] = K[:, :2, 2:]
+        A_ = np.zeros((n, 2, 2))
+        A_[1:] = K[:, 2:, :2]
+        d = nodal.copy()
+        d[:-1] += f[:, :2]
+        d[1:] += f[:, 2:]
+
+        fixed = np.zeros((n, 2), dtype=bool)
+        supports = np.searchsorted(key, supports)
+        np.add.at(B, (supports, 0, 0), self.k)
+        np.add.at(B, (supports, 1, 1), self.kr)
+        fixed[supports[self.pinned], 0] = True
+        fixed[supports[self.clamped], 1] = True
+
+        # fixed degrees of freedom become rows and columns of the identity with a zero load
+        rows = fixed[:, :, None]
+        B = np.where(rows | fixed[:, None, :], 0.0, B)
+        B[:, 0, 0] += fixed[:, 0]
+        B[:, 1, 1] += fixed[:, 1]
+        A_ = np.where(rows, 0.0, A_)
+        A_[1:] = np.where(fixed[:-1, None, :], 0.0, A_[1:])
+        C = np.where(rows, 0.0, C)
+        C[:-1] = np.where(fixed[1:, None, :], 0.0, C[:-1])
+        rhs = np.where(fixed, 0.0, d)
+
+        # symmetric diagonal scaling balances the deflections and the slopes
+        scale = 1.0 / np.sqrt(np.stack([B[:, 0, 0], B[:, 1, 1]], axis=1))
+        A_ = A_ * scale[:, :, None] * np.roll(scale, 1, axis=0)[:, None, :]
+        B = B * scale[:, :, None] * scale[:, None, :]
+        C = C * scale[:, :, None] * np.roll(scale, -1, axis=0)[:, None, :]
+        u = _solve_block_tridiagonal(A_, B, C, rhs * scale) * scale
+        if not np.all(np.isfinite(u)):
+            raise Exception(error_msg_unstable)
+
+        # end forces of the superelements, the reactions at the key nodes (springs included) and the states at
+        # the left end of every element
+        ue = np.concatenate([u[:-1], u[1:]], axis=1)
+        end_forces = _mv(K, ue) - f
+        reactions = -nodal
+        reactions[:-1] += end_forces[:, :2]
+        reactions[1:] += end_forces[:, 2:]
+        M0, V0 = (_mv(H, ue) - h).T
+        states = _march(l, EI, p, q, dV, dM, first, V0[group], M0[group], u[:-1, 1][group], u[:-1, 0][group])
+        return Solution(nodes, l, EI, A, S, p, q, states, nodes[key], reactions, self.supports)
+
+
+# index of the node nearest to x (one value or an array)
+def _node(nodes, x):
+    i = np.clip(np.searchsorted(nodes, x), 1, len(nodes) - 1)
+    return np.where(np.abs(nodes[i] - x) <= np.abs(x - nodes[i - 1]), i, i - 1)
+
+
+# Solved model. evaluate(x) gives the responses anywhere on the beam, reactions() the support forces.
+class Solution(object):
+    def __init__(self, nodes, l, EI, A, S, p, q, states, key_nodes, reactions, supports):
+        self.nodes = nodes
+        self.l = l
+        self.EI, self.A, self.S = EI, A, S
+        self.p, self.q = p, q
+        self.states = states
+        self.key_nodes = key_nodes
+        self.node_reactions = reactions
+        self.supports = supports
+
+    @property
+    def L(self):
+        return self.nodes[-1]
+
+    # Same keys as beam_core.evaluate_beam plus 'deflection' and 'slope'. A station on a node belongs to the
+    # element on its left, so the shear force just right of a point load needs a station just past it. At
+    # x = 0 the shear force and moment include the reaction there but no load, like the closed forms.
+    def evaluate(self, x):
+        x = np.clip(np.asarray(x, dtype=float), 0.0, self.L)
+        e = np.clip(np.searchsorted(self.nodes, x, side='left') - 1, 0, len(self.l) - 1)
+        V, M, theta, y = (state[e] for state in self.states)
+        shear_force, bending_moment, slope, deflection = _element_values(
+            x - self.nodes[e], self.EI[e], self.p[e], self.q[e], V, M, theta, y)
+        start = x <= 0.0
+        shear_force = np.where(start, self.node_reactions[0, 0], shear_force)
+        bending_moment = np.where(start, -self.node_reactions[0, 1], bending_moment)
+
+        shear_stress = shear_force / self.A[e]
+        bending_stress = bending_moment / self.S[e]
+        return {
+            'x': x,
+            'shear_force': shear_force,
+            'bending_moment': bending_moment,
+            'shear_stress': shear_stress,
+            'bending_stress': bending_stress,
+            'von_mises': np.sqrt(bending_stress ** 2 + 3 * shear_stress ** 2),
+            'deflection': deflection,
+            'slope': slope,
+        }
+
+    # one dict per support: the support, its position and the force (upward, N) and moment (counterclockwise,
+    # N*m) on the beam. supports at one position share one reaction.
+    def reactions(self):
+        result = []
+        for support, k in zip(self.supports, _node(self.key_nodes, [s.x for s in self.supports])):
+            force, moment = self.node_reactions[k]
+            result.append({'support': support_to_dict(support), 'x': float(self.key_nodes[k]),
+                           'force': float(force), 'moment': 0.0 if isinstance(support, PinSupport) else float(moment)})
+        return result
@@ -0,0 +1,185 @@
+import numpy as np
+
+from beam_core import as_section
+
+# Stresses over the cross section and the triangle mesh of the deformed beam for the 3D view.
+#
+# Coordinates in the section: y up from the centroid (the neutral axis), z across. At a station with shear
+# force V and bending moment M (sagging positive, see beam_core):
+#   normal stress  sigma(y) = -M * y / I, so the bottom fiber carries M / S like beam_core's bending_stress
+#   shear stress   tau(y) = V * Q(y) / (I * t(y)) (Jourawski), with Q the first moment of the area above y
+#                  and t the width of material at y. beam_core's shear_stress is the average V / A.
+# Both are the beam_core curves times a factor of the point of the section (see section_factors), so the
+# stresses anywhere follow from the curves without evaluating the beam again.
+
+# points of the section outline of the 3D mesh
+OUTLINE_POINTS = 32
+# default triangles of a mesh (see mesh_rings)
+MAX_TRIANGLES = 8000
+
+
+# The section as an outer shape less a hole: ('rectangle', b, bottom, top, hole width, hole bottom, hole top)
+# with heights from the centroid, or ('circle', r, inner radius). Rectangles cover the box (a rectangular
+# hole), the I beam (two side notches, the same widths as one hole) and the tee (one notch below the flange).
+def _shape(section):
+    dims = section.dims
+    if section.type == 'rectangular':
+        b, h = dims
+        return 'rectangle', b, -h / 2, h / 2, 0.0, 0.0, 0.0
+    elif section.type == 'box':
+        b, h, t = dims
+        hi = max(h - 2 * t, 0.0)
+        return 'rectangle', b, -h / 2, h / 2, max(b - 2 * t, 0.0), -hi / 2, hi / 2
+    elif section.type == 'i_beam':
+        b, h, tw, tf = dims
+        return 'rectangle', b, -h / 2, h / 2, b - tw, -(h / 2 - tf), h / 2 - tf
+    elif section.type == 'tee':
+        b, h, tw, tf = dims
+        bottom = -_tee_centroid(section)
+        return 'rectangle', b, bottom, bottom + h, b - tw, bottom, bottom + h - tf
+    elif section.type == 'circle':
+        return 'circle', dims[0], 0.0
+    r, t = dims
+    return 'circle', r, max(r - t, 0.0)
+
+
+# height of the centroid of a tee above the bottom of its web
+def _tee_centroid(section):
+    b, h, tw, tf = section.dims
+    A_f, A_w = b * tf, tw * (h - tf)
+    return (A_f * (h - 0.5 * tf) + A_w * 0.5 * (h - tf)) / (A_f + A_w)
+
+
+# width t(y) and first moment Q(y) of the area above y, for y within the section
+def _width_and_moment(shape, y):
+    if shape[0] == 'circle':
+        _, r, ri = shape
+        outer = np.maximum(r * r - y * y, 0.0)
+        inner = np.maximum(ri * ri - y * y, 0.0)
+        return 2 * (np.sqrt(outer) - np.sqrt(inner)), 2.0 / 3.0 * (outer ** 1.5 - inner ** 1.5)
+
+    _, b, bottom, top, wh, hole_bottom, hole_top = shape
+
+    def band(width, lo, hi):
+        inside = (y >= lo) & (y <= hi)
+        return width * inside, np.where(y < hi, width * (hi * hi - np.maximum(y, lo) ** 2) / 2, 0.0)
+
+    t, Q = band(b, bottom, top)
+    t_hole, Q_hole = band(wh, hole_bottom, hole_top)
+    return t - t_hole, Q - Q_hole
+
+
+# (normal, shear): the normal stress and the shear stress at heights y of the section per unit of beam_core's
+# bending_stress (M / S) and shear_stress (V / A). The shear factor is 0 where the section has no width.
+def section_factors(xsection=None, y=None):
+    section = as_section(xsection)
+    y = np.asarray(y, dtype=float)
+    t, Q = _width_and_moment(_shape(section), y)
+    shear = np.divide(section.A * Q, section.I * t, out=np.zeros(np.shape(t)), where=t > 1e-12 * section.c)
+    return -y / section.c, shear
+
+
+# (y, z) of a closed outline of the section with about n points: the corners of the outer shape plus points
+# spread along its edges. the hole of a tube or a box does not show from outside and is left out.
+def section_outline(xsection=None, n=OUTLINE_POINTS):
+    section = as_section(xsection)
+    shape = _shape(section)
+    if shape[0] == 'circle':
+        angle = np.linspace(0.0, 2 * np.pi, n, endpoint=False)
+        return shape[1] * np.sin(angle), shape[1] * np.cos(angle)
+
+    _, b, bottom, top, wh, hole_bottom, hole_top = shape
+    if section.type in ('i_beam', 'tee'):
+        tw = b - wh
+        corners = [(bottom, -b / 2), (bottom, b / 2)]
+        if section.type == 'i_beam':
+            corners += [(hole_bottom, b / 2), (hole_bottom, tw / 2)]
+        else:
+            corners = [(bottom, -tw / 2), (bottom, tw / 2)]
+        corners += [(hole_top, tw / 2), (hole_top, b / 2), (top, b / 2), (top, -b / 2), (hole_top, -b / 2),
+                    (hole_top, -tw / 2)]
+        if section.type == 'i_beam':
+            corners += [(hole_bottom, -tw / 2), (hole_bottom, -b / 2)]
+    else:
+        corners = [(bottom, -b / 2), (bottom, b / 2), (top, b / 2), (top, -b / 2)]
+
+    corners = np.array(corners)
+    edges = np.roll(corners, -1, axis=0) - corners
+    lengths = np.hypot(edges[:, 0], edges[:, 1])
+    # at least one point per corner, the rest in proportion to the edge lengths
+    counts = np.maximum(1, np.floor(lengths / lengths.sum() * max(n - len(corners), 0)).astype(int) + 1)
+    points = [corners[i] + edges[i] * s for i in range(len(corners))
+              for s in np.arange(counts[i]) / counts[i]]
+    y, z = np.array(points).T
+    return y, z
+
+
+# Regular (ny x nz) grid over the bounding box of the section: y, z of shape (ny, nz) and the mask of the
+# points inside the material
+def section_grid(xsection=None, ny=41, nz=41):
+    section = as_section(xsection)
+    shape = _shape(section)
+    if shape[0] == 'circle':
+        r, ri = shape[1], shape[2]
+        y, z = np.meshgrid(np.linspace(-r, r, ny), np.linspace(-r, r, nz), indexing='ij')
+        radius = np.hypot(y, z)
+        return y, z, (radius <= r) & (radius >= ri)
+
+    _, b, bottom, top, wh, hole_bottom, hole_top = shape
+    y, z = np.meshgrid(np.linspace(bottom, top, ny), np.linspace(-b / 2, b / 2, nz), indexing='ij')
+    if section.type == 'box':
+        hole = (np.abs(z) < wh / 2) & (y > hole_bottom) & (y < hole_top)
+    else:
+        # the notches of an I beam or a tee are beside the web, the ones of a tee open at the bottom
+        hole = (np.abs(z) > (b - wh) / 2) & ((y > hole_bottom) | (section.type == 'tee')) & (y < hole_top)
+    return y, z, ~hole
+
+
+# Stress field over the section at every station: shear_force and bending_moment are arrays over the
+# stations (see beam_core.evaluate_beam). Returns the grid ('y', 'z', 'inside', see section_grid) and the
+# 'normal', 'shear' and 'von_mises' stresses as (stations x ny x nz) arrays, NaN outside the material.
+def stress_field(shear_force=None, bending_moment=None, xsection=None, ny=41, nz=41):
+    section = as_section(xsection)
+    y, z, inside = section_grid(section, ny, nz)
+    normal_factor, shear_factor = section_factors(section, y)
+    normal_factor = np.where(inside, normal_factor, np.nan)
+    shear_factor = np.where(inside, shear_factor, np.nan)
+    bending_stress = np.asarray(bending_moment, dtype=float)[:, None, None] / section.S
+    shear_stress = np.asarray(shear_force, dtype=float)[:, None, None] / section.A
+    normal = bending_stress * normal_factor
+    shear = shear_stress * shear_factor
+    return {
+        'y': y,
+        'z': z,
+        'inside': inside,
+        'normal': normal,
+        'shear': shear,
+        'von_mises': np.sqrt(normal ** 2 + 3 * shear ** 2),
+    }
+
+
+# Level of detail of a mesh along the beam: indices of the stations x (increasing) that become rings of the
+# mesh, at most max_triangles / (2 * n_outline) + 1 of them, the stations nearest to evenly spaced points. The
+# deflection is a smooth curve between the loads, so even rings follow it. keep: indices that are always
+# rings, like the load point, where the curve has a kink.
+def mesh_rings(x=None, n_outline=OUTLINE_POINTS, max_triangles=MAX_TRIANGLES, keep=()):
+    x = np.asarray(x, dtype=float)
+    n_rings = max(2, max_triangles // (2 * n_outline) + 1) - len(keep)
+    if len(x) <= n_rings + len(keep):
+        return np.arange(len(x))
+    targets = np.linspace(x[0], x[-1], max(n_rings, 2))
+    index = np.clip(np.searchsorted(x, targets), 1, len(x) - 1)
+    index -= (targets - x[index - 1]) < (x[index] - targets)
+    return np.union1d(index, np.asarray(keep, dtype=int))
+
+
+# (i, j, k) vertex indices of the triangles between n_rings rings of n_outline vertices each (vertex
+# ring * n_outline + point), two per outline edge and pair of rings
+def mesh_faces(n_rings, n_outline):
+    ring = np.arange(n_rings - 1)[:, None] * n_outline
+    point = np.arange(n_outline)[None, :]
+    a = ring + point
+    b = ring + (point + 1) % n_outline
+    c, d = a + n_outline, b + n_outline
+    return (np.concatenate([a, b], axis=1).ravel(), np.concatenate([b, d], axis=1).ravel(),
+            np.concatenate([c, c], axis=1).ravel())
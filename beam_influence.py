@@ -0,0 +1,77 @@
+import numpy as np
+
+from beam_core import _bending_moment, _deflection_EI, _shear_force
+
+
+# Influence surface of one beam configuration: the response to a unit load at every position of a grid,
+# evaluated at fixed stations, stored as (positions x stations) arrays per quantity.
+# unit_response(a, x): dict of arrays over the stations x for a unit load at a. every quantity must scale
+#                      linearly with the load, so a lookup for any F is a scaled row.
+# Building the surface costs n_positions evaluations once. After that moving the load is a row lookup when
+# a falls on the grid and an interpolation between the four neighbouring rows otherwise. On either side of a
+# station the closed forms are cubic in a, so the 4 point Lagrange interpolation is exact for every station
+# outside those four rows. the few stations inside them straddle the kink or jump under the load and are
+# evaluated exactly.
+# grid: precomputed (n_positions x n_stations) arrays per quantity, for example the memory-mapped arrays of a
+# beam_store.DesignStore, used as they are instead of evaluating unit_response.
+class InfluenceSurface(object):
+    def __init__(self, unit_response=None, L=None, n_positions=501, n_stations=401, grid=None):
+        if grid is not None:
+            n_positions, n_stations = next(iter(grid.values())).shape
+        if n_positions < 4:
+            raise Exception('An influence surface needs at least 4 load positions')
+        self.unit_response = unit_response
+        self.L = L
+        self.positions = np.linspace(0.0, L, n_positions)
+        self.stations = np.linspace(0.0, L, n_stations)
+        self.stations.flags.writeable = False
+
+        if grid is not None:
+            self.grid = dict(grid)
+            return
+        rows = [unit_response(a, self.stations) for a in self.positions]
+        self.grid = {}
+        for name in rows[0]:
+            if name == 'x':
+                continue
+            self.grid[name] = np.array([row[name] for row in rows])
+            self.grid[name].flags.writeable = False
+
+    @property
+    def nbytes(self):
+        return sum(values.nbytes for values in self.grid.values())
+
+    # response to a load F at a, over self.stations
+    def lookup(self, a=None, F=1.0):
+        n = len(self.positions)
+        t = min(max(a / self.L, 0.0), 1.0) * (n - 1) if self.L else 0.0
+        response = {'x': self.stations}
+        if t == int(t):
+            for name, values in self.grid.items():
+                response[name] = F * values[int(t)]
+            return response
+
+        j = min(max(int(t) - 1, 0), n - 4)
+        tau = t - j
+        weights = [F * np.prod([(tau - m) / (k - m) for m in range(4) if m != k]) for k in range(4)]
+        for name, values in self.grid.items():
+            response[name] = np.dot(weights, values[j:j + 4])
+
+        lo, hi = np.searchsorted(self.stations, self.positions[[j, j + 3]])
+        exact = self.unit_response(a, self.stations[lo:hi + 1])
+        for name in self.grid:
+            response[name][lo:hi + 1] = F * exact[name]
+        return response
+
+
+# Unit load responses of the single load closed forms. V, M and E * I * y do not depend on the material or
+# the section, so one influence surface serves every material and section of a beam.
+def unit_response(support_type, L):
+    def response(a, x):
+        return {
+            'shear_force': _shear_force(1.0, x, a, L, support_type),
+            'bending_moment': _bending_moment(1.0, x, a, L, support_type),
+            'deflection_EI': _deflection_EI(1.0, x, a, L, support_type),
+        }
+
+    return response
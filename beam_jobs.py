@@ -0,0 +1,237 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+error_msg_job = 'Unknown job: '
+error_msg_cancelled = 'Job cancelled'
+
+# Background jobs for analyses too long for a request (see update_uncertainty in beam_app), run by a local
+# process pool, with their state kept in a directory instead of a message broker.
+#
+# A job is a module level function and keyword arguments of plain JSON data. Its id is a hash of both, so
+# submitting the same job again, from any process of the server, returns the id of the job already queued,
+# running or done instead of starting another one, and a finished result is read back without recomputing it.
+# The function gets a progress(done, total) callable as its progress keyword: every call records the progress
+# and raises once the job is cancelled, so cancellation takes effect at the next call.
+#
+# A job that failed, was cancelled or was lost runs again when submitted again, as a new attempt with a
+# directory of its own: the worker of an earlier attempt may still be winding down, and keeps writing to its
+# own directory without touching the new one. The current attempt is the one with the highest number.
+#
+# Layout of the directory:
+#   <id>/<n>/status.json    {'id', 'function', 'state', 'done', 'total', 'error', 'updated'} of attempt n
+#   <id>/<n>/result.pickle  the return value of a finished attempt
+#   <id>/<n>/cancel         present once the attempt is cancelled
+# Files are replaced atomically, so readers never see a half written status or result. An attempt directory
+# is written under a hidden name and renamed to <n> once it holds its status.
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+STATES = (QUEUED, RUNNING, DONE, FAILED, CANCELLED)
+
+STATUS = 'status.json'
+RESULT = 'result.pickle'
+CANCEL = 'cancel'
+# seconds between two progress records of a job, the last one is always recorded
+PROGRESS_INTERVAL = 0.2
+
+
+def _function_name(function):
+    return '{}.{}'.format(function.__module__, function.__qualname__)
+
+
+# id of a job: the function and its arguments, sorted and serialized as JSON
+def job_id(function=None, kwargs=None):
+    text = json.dumps([_function_name(function), kwargs or {}], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def _write_atomic(path, write, mode='w'):
+    handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(handle, mode) as f:
+        write(f)
+    os.replace(temporary, path)
+
+
+def _write_status(directory, **status):
+    status['updated'] = time.time()
+    _write_atomic(os.path.join(directory, STATUS), lambda f: json.dump(status, f))
+    return status
+
+
+def _read_status(directory):
+    try:
+        with open(os.path.join(directory, STATUS)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# The progress callable of a running job. Picklable, for the worker processes.
+class Progress(object):
+    def __init__(self, directory=None, status=None):
+        self.directory = directory
+        self.status = status
+        self._recorded = 0.0
+
+    def __call__(self, done=None, total=None):
+        if os.path.exists(os.path.join(self.directory, CANCEL)):
+            raise Exception(error_msg_cancelled)
+        now = time.monotonic()
+        if now - self._recorded >= PROGRESS_INTERVAL or done == total:
+            self._recorded = now
+            self.status = _write_status(self.directory, **dict(self.status, done=done, total=total))
+
+
+# Runs a job in a worker process and records its result or its error.
+def _run(directory, function, kwargs):
+    status = _read_status(directory)
+    if os.path.exists(os.path.join(directory, CANCEL)):
+        _write_status(directory, **dict(status, state=CANCELLED))
+        return
+    status = _write_status(directory, **dict(status, state=RUNNING))
+    try:
+        result = function(progress=Progress(directory, status), **kwargs)
+    except Exception as error:
+        cancelled = os.path.exists(os.path.join(directory, CANCEL))
+        _write_status(directory, **dict(_read_status(directory), state=CANCELLED if cancelled else FAILED,
+                                        error=None if cancelled else str(error)))
+        return
+    _write_atomic(os.path.join(directory, RESULT), lambda f: pickle.dump(result, f, pickle.HIGHEST_PROTOCOL),
+                  mode='wb')
+    _write_status(directory, **dict(_read_status(directory), state=DONE, error=None))
+
+
+# Jobs of one directory (created if needed), run by up to workers processes (default: the number of cores).
+# The processes start on the first submit. max_results: finished jobs kept, the least recently updated ones
+# are removed beyond it. stale_after: seconds after which a queued or running job that recorded nothing is
+# taken for lost, like the job of a server process that was stopped, and runs again when submitted.
+class JobManager(object):
+    def __init__(self, path=None, workers=None, max_results=256, stale_after=3600.0):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.workers = workers
+        self.max_results = max_results
+        self.stale_after = stale_after
+        self._executor = None
+        self._futures = {}
+
+    def _directory(self, id):
+        return os.path.join(self.path, id)
+
+    # numbers of the attempts of a job, in increasing order
+    def _attempts(self, id):
+        try:
+            return sorted(int(name) for name in os.listdir(self._directory(id)) if name.isdigit())
+        except OSError:
+            return []
+
+    # directory of the current attempt of a job, None before the first
+    def _attempt_directory(self, id):
+        attempts = self._attempts(id)
+        return os.path.join(self._directory(id), str(attempts[-1])) if attempts else None
+
+    # Queues function(progress=..., **kwargs) unless the same job is queued, running or done already.
+    # Returns the id of the job.
+    def submit(self, function=None, **kwargs):
+        id = job_id(function, kwargs)
+        queued = {'id': id, 'function': _function_name(function), 'state': QUEUED, 'done': 0, 'total': None,
+                  'error': None}
+        os.makedirs(self._directory(id), exist_ok=True)
+        attempts = self._attempts(id)
+        if attempts:
+            directory = os.path.join(self._directory(id), str(attempts[-1]))
+            status = _read_status(directory)
+            if status is not None and (status['state'] == DONE or (
+                    status['state'] in (QUEUED, RUNNING) and time.time() - status['updated'] < self.stale_after
+                    and not os.path.exists(os.path.join(directory, CANCEL)))):
+                return id
+        # the next attempt is renamed into place with its status already written: of the processes submitting
+        # the same job at once, the one whose rename succeeds starts it and the others return its id
+        staging = tempfile.mkdtemp(prefix='.', dir=self._directory(id))
+        _write_status(staging, **queued)
+        directory = os.path.join(self._directory(id), str(attempts[-1] + 1 if attempts else 1))
+        try:
+            os.rename(staging, directory)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            return id
+
+        if self._executor is None:
+            # spawned workers do not inherit the threads and sockets of the server
+            self._executor = ProcessPoolExecutor(self.workers, multiprocessing.get_context('spawn'))
+        future = self._executor.submit(_run, directory, function, kwargs)
+        self._futures[id] = future
+        future.add_done_callback(lambda future: self._finished(id, directory, future))
+        self._prune()
+        return id
+
+    # a worker that died (see concurrent.futures.process.BrokenProcessPool) leaves its attempt failed
+    def _finished(self, id, directory, future):
+        if self._futures.get(id) is future:
+            del self._futures[id]
+        error = None if future.cancelled() else future.exception()
+        if error is not None:
+            _write_status(directory, **dict(_read_status(directory), state=FAILED, error=str(error)))
+
+    # {'id', 'function', 'state' (one of STATES), 'done', 'total' (None until the job reports it), 'error'
+    # (the message of a failed job), 'updated' (time of the last record)} of the current attempt
+    def status(self, id=None):
+        directory = self._attempt_directory(id)
+        status = _read_status(directory) if directory is not None else None
+        if status is None:
+            raise Exception(error_msg_job + str(id))
+        return status
+
+    # the return value of a finished job, None before
+    def result(self, id=None):
+        if self.status(id)['state'] != DONE:
+            return None
+        with open(os.path.join(self._attempt_directory(id), RESULT), 'rb') as f:
+            return pickle.load(f)
+
+    # Cancels a job: a queued job does not start, a running one stops at its next progress call.
+    def cancel(self, id=None):
+        status = self.status(id)
+        if status['state'] not in (QUEUED, RUNNING):
+            return status
+        directory = self._attempt_directory(id)
+        with open(os.path.join(directory, CANCEL), 'w'):
+            pass
+        future = self._futures.get(id)
+        if future is not None and future.cancel():
+            status = _write_status(directory, **dict(status, state=CANCELLED))
+        return status
+
+    def jobs(self):
+        return sorted(name for name in os.listdir(self.path)
+                      if not name.startswith('.') and os.path.isdir(self._directory(name)))
+
+    # removes the finished jobs beyond max_results, and the earlier attempts of every job once they finished
+    def _prune(self):
+        finished = []
+        for id in self.jobs():
+            attempts = self._attempts(id)
+            for n in attempts[:-1]:
+                status = _read_status(os.path.join(self._directory(id), str(n)))
+                if status is not None and status['state'] in (DONE, FAILED, CANCELLED):
+                    shutil.rmtree(os.path.join(self._directory(id), str(n)), ignore_errors=True)
+            status = _read_status(os.path.join(self._directory(id), str(attempts[-1]))) if attempts else None
+            if status is not None and status['state'] in (DONE, FAILED, CANCELLED):
+                finished.append((status['updated'], id))
+        for _, id in sorted(finished)[:max(len(finished) - self.max_results, 0)]:
+            shutil.rmtree(self._directory(id), ignore_errors=True)
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait)
+            self._executor = None
@@ -0,0 +1,256 @@
+from collections import namedtuple
+
+import numpy as np
+
+from beam_response import PiecewisePolynomial
+
+error_msg_support_type = 'Invalid support_type'
+error_msg_load = 'Invalid load: '
+
+# Loads acting on the beam. Positions are measured from the left end in meters.
+# PointLoad: force F in newtons at a. positive F points down, like the F of the single load closed forms.
+# MomentLoad: applied couple M in newton meters at a. positive M makes the bending moment jump by +M when
+#             passing a from left to right.
+# DistributedLoad: line load in N/m varying linearly from w0 at x0 to w1 at x1. w0 == w1 is a uniform load.
+PointLoad = namedtuple('PointLoad', ['F', 'a'])
+MomentLoad = namedtuple('MomentLoad', ['M', 'a'])
+DistributedLoad = namedtuple('DistributedLoad', ['w0', 'x0', 'w1', 'x1'])
+
+
+def uniform_load(w, x0, x1):
+    return DistributedLoad(w, x0, w, x1)
+
+
+# converts the dict form used by the UI and the JSON interfaces, for example
+# {'type': 'point', 'F': 100.0, 'a': 2.0}, {'type': 'moment', 'M': 50.0, 'a': 1.0},
+# {'type': 'distributed', 'w0': 10.0, 'x0': 0.0, 'w1': 10.0, 'x1': 5.0}. loads are returned unchanged.
+def as_load(load):
+    if isinstance(load, (PointLoad, MomentLoad, DistributedLoad)):
+        return load
+    try:
+        kind = load['type']
+        if kind == 'point':
+            return PointLoad(float(load['F']), float(load['a']))
+        elif kind == 'moment':
+            return MomentLoad(float(load['M']), float(load['a']))
+        elif kind == 'distributed':
+            w0, x0 = float(load['w0']), float(load['x0'])
+            return DistributedLoad(w0, x0, float(load.get('w1', w0)), float(load.get('x1', x0)))
+    except (KeyError, TypeError, ValueError):
+        pass
+    raise Exception(error_msg_load + str(load))
+
+
+# moves a load (or the ends of a distributed load) onto a beam of length L
+def clip_load(load, L):
+    if isinstance(load, DistributedLoad):
+        return load._replace(x0=min(max(load.x0, 0.0), L), x1=min(max(load.x1, 0.0), L))
+    return load._replace(a=min(max(load.a, 0.0), L))
+
+
+def load_to_dict(load):
+    load = as_load(load)
+    kind = {PointLoad: 'point', MomentLoad: 'moment', DistributedLoad: 'distributed'}[type(load)]
+    return dict(load._asdict(), type=kind)
+
+
+#######################################################################
+# Unit influence kernels
+#######################################################################
+
+# Each kernel returns (V, M, EI * y) for a unit load at s, evaluated at stations x. s and x broadcast against
+# each other, so s[:, None] and x[None, :] give (loads x stations) matrices in one call.
+# Sign conventions match the closed forms: EI * y'' = M, a downward force gives negative deflection.
+# The cantilever is fixed at x = 0 and free at x = L.
+
+# Closed forms of a single point load F at a, the one model of a point load behind every path: the
+# single load kernels of beam_core (evaluate_beam, the batch, the API and the app), the influence surfaces and
+# the point rows of LoadCase. The deflection is multiplied by E * I, so the material and section only enter as
+# one final division. F, a and L may be arrays that broadcast against x, for example (beams, 1) against
+# (beams, stations), so one call evaluates many beams. the branches avoid dividing by a or b = L - a, which
+# makes the a = 0 and a = L cases come out of the same expressions.
+def _deflection_EI(F, x, a, L, support_type):
+    if support_type == 'cantilever':
+        left = x < a
+        return np.where(left,
+                        -F * x ** 2 * (3 * a - x),
+                        -F * a ** 2 * (3 * x - a)) / 6
+    elif support_type == 'simply_supported':
+        b = L - a
+        left = x < a
+        return np.where(left,
+                        -F * b * x * (L ** 2 - x ** 2 - b ** 2),
+                        -F * (L * (x - a) ** 3 + b * ((L ** 2 - b ** 2) * x - x ** 3))) / (6 * L)
+    else:
+        raise Exception(error_msg_support_type)
+
+
+# A cantilever carries the shear force F and the moment -F * (a - x) of the load between the support and the
+# load, and nothing past it. (These were first written as those of a tip load, F and -F * (L - x), for any a.)
+def _shear_force(F, x, a, L, support_type):
+    if support_type == 'cantilever':
+        return np.where(x <= a, F, 0.0)
+    elif support_type == 'simply_supported':
+        return np.where(x <= a, (F * (L - a)) / L, (-F * a) / L)
+    else:
+        raise Exception(error_msg_support_type)
+
+
+def _bending_moment(F, x, a, L, support_type):
+    if support_type == 'cantilever':
+        return np.where(x <= a, -F * (a - x), 0.0)
+    elif support_type == 'simply_supported':
+        # (x / a) * M_max on the left and M_max * (1 - (x - a) / b) on the right, with M_max = F * a * b / L
+        return np.where(x <= a, F * (L - a) * x, F * a * (L - x)) / L
+    else:
+        raise Exception(error_msg_support_type)
+
+
+def _point_kernel(s, x, L, support_type):
+    return (_shear_force(1.0, x, s, L, support_type), _bending_moment(1.0, x, s, L, support_type),
+            _deflection_EI(1.0, x, s, L, support_type))
+
+
+def _moment_kernel(s, x, L, support_type):
+    left = x <= s
+    if support_type == 'cantilever':
+        V = np.zeros(np.broadcast(s, x).shape)
+        M = np.where(left, -1.0, 0.0)
+        EIy = np.where(left, -x ** 2 / 2, -s * (x - s / 2))
+    elif support_type == 'simply_supported':
+        t = L - s
+        u = L - x
+        V = np.full(np.broadcast(s, x).shape, -1.0 / L)
+        M = np.where(left, -x / L, u / L)
+        # slopes chosen so that y(0) = y(L) = 0 and y, y' are continuous at s
+        d1 = (2 * s ** 3 - 3 * s * t ** 2 - t ** 3) / (6 * L ** 2)
+        c1 = (s ** 2 - t ** 2) / (2 * L) - d1
+        EIy = np.where(left, -x ** 3 / (6 * L) + c1 * x, u ** 3 / (6 * L) + d1 * u)
+    else:
+        raise Exception(error_msg_support_type)
+    return V, M, EIy
+
+
+# int_lo^hi (p + q * z) * z ** k dz for k = 0..3, elementwise. returns a list of the four moments.
+def _load_moments(p, q, lo, hi):
+    moments = []
+    for k in range(4):
+        moments.append(p * (hi ** (k + 1) - lo ** (k + 1)) / (k + 1) + q * (hi ** (k + 2) - lo ** (k + 2)) / (k + 2))
+    return moments
+
+
+# The point kernel is a polynomial in s on each side of the station, so integrating it against a linear
+# load only needs the moments of the load over the part of the loaded span left of the station (s <= x, in
+# powers of s) and right of it (s > x, in powers of t = L - s). everything stays (loads x stations).
+def _distributed_kernel(loads, x, L, support_type):
+    w0, x0, w1, x1 = (np.asarray(v, dtype=float)[:, None] for v in zip(*loads))
+    x = x[None, :]
+    q = np.where(x1 > x0, (w1 - w0) / np.where(x1 > x0, x1 - x0, 1.0), 0.0)
+    p = w0 - q * x0  # w(s) = p + q * s
+    split = np.clip(x, x0, x1)
+    m = _load_moments(p, q, x0, split)  # powers of s over [x0, split]
+    n = _load_moments(p + q * L, -q, L - x1, L - split)  # powers of t over [split, x1]
+
+    if support_type == 'cantilever':
+        V = n[0]
+        M = x * n[0] - (L * n[0] - n[1])
+        EIy = -(3 * x * m[2] - m[3]) / 6 - x ** 2 * (3 * (L * n[0] - n[1]) - x * n[0]) / 6
+    elif support_type == 'simply_supported':
+        u = L - x
+        V = (n[1] - m[1]) / L
+        M = (u * m[1] + x * n[1]) / L
+        EIy = -(u * ((L ** 2 - u ** 2) * m[1] - m[3]) + x * ((L ** 2 - x ** 2) * n[1] - n[3])) / (6 * L)
+    else:
+        raise Exception(error_msg_support_type)
+    return V, M, EIy
+
+
+#######################################################################
+# Load cases
+#######################################################################
+
+# Any combination of point, moment and distributed loads on one beam. Responses are computed by
+# superposition: influence_matrix builds a (loads x 3 * stations) matrix of unit responses and the
+# load magnitudes reduce it with a single matrix product.
+class LoadCase(object):
+    def __init__(self, loads=(), L=None, support_type=None):
+        self.loads = tuple(as_load(load) for load in loads)
+        self.L = L
+        self.support_type = support_type
+        if support_type not in ('cantilever', 'simply_supported'):
+            raise Exception(error_msg_support_type)
+        for load in self.loads:
+            positions = (load.x0, load.x1) if isinstance(load, DistributedLoad) else (load.a,)
+            if not all(0.0 <= p <= L for p in positions) or positions[0] > positions[-1]:
+                raise Exception(error_msg_load + str(load))
+
+        self.points = [i for i, load in enumerate(self.loads) if isinstance(load, PointLoad)]
+        self.moments = [i for i, load in enumerate(self.loads) if isinstance(load, MomentLoad)]
+        self.distributed = [i for i, load in enumerate(self.loads) if isinstance(load, DistributedLoad)]
+        magnitudes = np.ones(len(self.loads))
+        magnitudes[self.points] = [self.loads[i].F for i in self.points]
+        magnitudes[self.moments] = [self.loads[i].M for i in self.moments]
+        self.magnitudes = magnitudes
+
+    # load positions where the response has a kink or a jump
+    def breakpoints(self):
+        points = [0.0, self.L]
+        for load in self.loads:
+            points.extend((load.x0, load.x1) if isinstance(load, DistributedLoad) else (load.a,))
+        return np.unique(points)
+
+    # (loads, 3, stations) unit responses. [:, 0] is V, [:, 1] is M, [:, 2] is EI * y. distributed rows
+    # already carry their intensity, so their magnitude is 1.
+    def influence_matrix(self, x):
+        x = np.clip(np.asarray(x, dtype=float).ravel(), 0.0, self.L)
+        G = np.empty((len(self.loads), 3, len(x)))
+        for rows, kernel in ((self.points, _point_kernel), (self.moments, _moment_kernel)):
+            if rows:
+                s = np.array([self.loads[i].a for i in rows])[:, None]
+                G[rows] = np.stack(kernel(s, x[None, :], self.L, self.support_type), axis=1)
+        if self.distributed:
+            G[self.distributed] = np.stack(_distributed_kernel(
+                [self.loads[i] for i in self.distributed], x, self.L, self.support_type), axis=1)
+        return G
+
+    # (V, M, EI * y) at the stations x
+    def superpose(self, x):
+        x = np.asarray(x, dtype=float)
+        G = self.influence_matrix(x)
+        V, M, EIy = (self.magnitudes @ G.reshape(len(self.loads), -1)).reshape(3, -1) if self.loads else \
+            np.zeros((3, x.size))
+        return V.reshape(x.shape), M.reshape(x.shape), EIy.reshape(x.shape)
+
+    # Exact piecewise polynomial form of (V, M, EI * y). between two breakpoints they are polynomials of degree
+    # <= 5, so 6 interior samples per segment determine them. used for the exact peaks (see beam_response).
+    def polynomials(self):
+        breaks = self.breakpoints()
+        widths = np.diff(breaks)
+        t = 0.5 - 0.5 * np.cos((2 * np.arange(6) + 1) * np.pi / 12)  # Chebyshev nodes in (0, 1)
+        V, M, EIy = self.superpose(breaks[:-1, None] + widths[:, None] * t)
+        vander = np.vander(t, 6)
+        scale = np.where(widths > 0, widths, 1.0)[:, None] ** np.arange(5, -1, -1)
+        polynomials = []
+        for values, side in ((V, 'left'), (M, 'left'), (EIy, 'right')):
+            coefs = np.linalg.solve(vander, values.T).T
+            # drop round-off in the higher powers so that constant and linear segments stay exact
+            coefs[np.abs(coefs) <= 1e-12 * np.max(np.abs(values), initial=0.0)] = 0.0
+            polynomials.append(PiecewisePolynomial(breaks, coefs / scale, side))
+        return tuple(polynomials)
+
+    # same keys as beam_core.evaluate_beam. EI: E * I, A: area, S: section modulus.
+    def evaluate(self, x, EI=1.0, A=1.0, S=1.0):
+        x = np.clip(np.asarray(x, dtype=float), 0.0, self.L)
+        V, M, EIy = self.superpose(x)
+        shear_stress = V / A
+        bending_stress = M / S
+        return {
+            'x': x,
+            'shear_force': V,
+            'bending_moment': M,
+            'shear_stress': shear_stress,
+            'bending_stress': bending_stress,
+            'von_mises': np.sqrt(bending_stress ** 2 + 3 * shear_stress ** 2),
+            'deflection_EI': EIy,
+            'deflection': EIy / EI,
+        }
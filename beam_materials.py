@@ -0,0 +1,115 @@
+import csv
+import json
+from collections import namedtuple
+
+import numpy as np
+
+from beam_core import ALLOWABLE_STRESS, DENSITY, E, as_section, clip_stations, evaluate_case
+
+error_msg_material = 'Invalid material: '
+error_msg_material_file = 'Invalid material file: '
+
+# Materials and the comparison of one beam made of each of them.
+#
+# A material is its Young's modulus E in Pa, its density in kg/m^3 and its allowable von Mises stress in Pa.
+# The built-in materials are the tables of beam_core (E, DENSITY, ALLOWABLE_STRESS); register_materials adds
+# others to them, like in-house alloys read from a file by load_materials, so every module that takes a
+# material name (beam_core, beam_design, beam_api, the app) accepts them.
+#
+# The shear force and bending moment of a statically determinate beam, and so its stresses, do not depend on
+# the material, and the deflection only through 1 / E. compare_materials evaluates the beam once and scales
+# its deflection for every material in one (materials x stations) broadcast.
+Material = namedtuple('Material', ['name', 'E', 'density', 'allowable_stress'])
+
+
+# converts the dict form of the files and the JSON interfaces, for example
+# {'name': 'al7075', 'E': 71.7e9, 'density': 2810.0, 'allowable_stress': 503e6}, or the name of a material of
+# the tables of beam_core. materials are returned unchanged.
+def as_material(material):
+    if isinstance(material, Material):
+        return material
+    if isinstance(material, str):
+        if material not in E:
+            raise Exception(error_msg_material + material)
+        return Material(material, E[material], DENSITY[material], ALLOWABLE_STRESS[material])
+    try:
+        name = str(material['name']).strip()
+        values = [float(material[key]) for key in Material._fields[1:]]
+    except (KeyError, TypeError, ValueError):
+        raise Exception(error_msg_material + str(material))
+    if not name or not all(np.isfinite(value) and value > 0 for value in values):
+        raise Exception(error_msg_material + str(material))
+    return Material(name, *values)
+
+
+def material_to_dict(material):
+    return dict(as_material(material)._asdict())
+
+
+# the materials given (names, dicts or Materials), by default every material of the tables of beam_core
+def material_table(materials=None):
+    return [as_material(material) for material in (list(E) if materials is None else materials)]
+
+
+# Reads materials from a JSON file (a list of dicts as for as_material, or a dict of them by name) or from a
+# CSV file with the columns name, E, density and allowable_stress, in Pa and kg/m^3.
+def load_materials(path=None):
+    try:
+        with open(path, newline='') as f:
+            if path.lower().endswith('.json'):
+                rows = json.load(f)
+                if isinstance(rows, dict):
+                    rows = [dict(row, name=name) for name, row in rows.items()]
+            else:
+                rows = list(csv.DictReader(f))
+    except (OSError, ValueError, AttributeError) as error:
+        raise Exception(error_msg_material_file + '{}: {}'.format(path, error))
+    return [as_material(row) for row in rows]
+
+
+# Adds materials to the tables of beam_core, replacing the ones of the same name. Returns their names.
+def register_materials(materials=None):
+    names = []
+    for material in material_table(materials):
+        E[material.name] = material.E
+        DENSITY[material.name] = material.density
+        ALLOWABLE_STRESS[material.name] = material.allowable_stress
+        names.append(material.name)
+    return names
+
+
+# Compares a beam made of each material. response: the material independent response of the beam, with the
+# 'x', 'deflection_EI', 'shear_stress' and 'bending_stress' arrays of beam_core.evaluate_case. Returns
+#   {'materials': names, 'x', 'deflection': (materials x stations), 'von_mises': (stations,) the same for every
+#    material, 'max_deflection': peak |deflection| per material, 'max_von_mises', 'utilization': max_von_mises /
+#    allowable stress per material, 'weight': kg per material, 'passes': utilization <= 1 per material}
+# with (materials,) arrays per material. L: length of the beam, for the weight.
+def compare_materials(response=None, xsection=None, L=None, materials=None):
+    section = as_section(xsection)
+    table = material_table(materials)
+    modulus, density, allowable = (np.array([getattr(material, name) for material in table])
+                                   for name in Material._fields[1:])
+    deflection = np.asarray(response['deflection_EI'], dtype=float)[None, :] / (modulus[:, None] * section.I)
+    von_mises = np.sqrt(np.asarray(response['bending_stress'], dtype=float) ** 2 +
+                        3 * np.asarray(response['shear_stress'], dtype=float) ** 2)
+    max_von_mises = float(np.max(von_mises)) if von_mises.size else 0.0
+    utilization = max_von_mises / allowable
+    return {
+        'materials': [material.name for material in table],
+        'x': np.asarray(response['x'], dtype=float),
+        'deflection': deflection,
+        'von_mises': von_mises,
+        'max_deflection': np.max(np.abs(deflection), axis=1) if deflection.size else np.zeros(len(table)),
+        'max_von_mises': max_von_mises,
+        'utilization': utilization,
+        'weight': section.A * L * density,
+        'passes': utilization <= 1.0,
+    }
+
+
+# compare_materials for a point load F at a plus any additional loads (see beam_loads), at the stations x
+# (by default 201 stations and the load point)
+def evaluate_materials(F=None, a=None, L=None, support_type=None, xsection=None, materials=None, x=None, loads=()):
+    x = np.union1d(np.linspace(0.0, L, 201), clip_stations([a], L)) if x is None else clip_stations(x, L)
+    response = evaluate_case(F=F, x=x, xsection=xsection, a=a, L=L, support_type=support_type, loads=loads)
+    return compare_materials(response, xsection, L, materials)
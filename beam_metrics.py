@@ -0,0 +1,222 @@
+import bisect
+import contextlib
+import functools
+import logging
+import threading
+import time
+
+# Counters, latency histograms and timing spans, rendered in the Prometheus text format (version 0.0.4) by
+# the /metrics endpoint of the app (see beam_app.create_app). Only the standard library is needed, so the
+# batch tools can use the spans too.
+#
+# Every metric lives in one registry per process. Each metric has fixed label names, and one value (or one set
+# of buckets) per combination of label values. Updates take a lock per metric, since the Flask server runs
+# callbacks in several threads.
+
+logger = logging.getLogger(__name__)
+
+error_msg_labels = 'Expected the labels {}, got {}'
+
+# upper bounds in seconds, from half a millisecond to ten seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# callbacks slower than this are logged as warnings
+SLOW_SECONDS = 1.0
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(name, _escape(value)) for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, int):
+        return str(value)
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+class _Metric(object):
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise Exception(error_msg_labels.format(self.labelnames, tuple(labels)))
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = ['# HELP {} {}'.format(self.name, self.help), '# TYPE {} {}'.format(self.name, self.type)]
+        for suffix, labels, value in self.samples():
+            lines.append('{}{}{} {}'.format(self.name, suffix, labels, _format_value(value)))
+        return lines
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [('', _format_labels(self.labelnames, key), value) for key, value in values]
+
+
+# Cumulative histogram: the count of observations at or below each bucket bound, plus their sum and count.
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super(Histogram, self).__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    # (count, sum) of the observations with these labels
+    def totals(self, **labels):
+        with self._lock:
+            counts, total = self._values.get(self._key(labels)) or ((), 0.0)
+            return sum(counts), total
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        samples = []
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                samples.append(('_bucket', _format_labels(self.labelnames, key, [('le', _format_value(bound))]),
+                                cumulative))
+            samples.append(('_sum', _format_labels(self.labelnames, key), total))
+            samples.append(('_count', _format_labels(self.labelnames, key), cumulative))
+        return samples
+
+
+# Values read when the metrics are rendered, such as the statistics of the caches.
+# collect(): dict of {label values tuple: value}.
+class Gauge(_Metric):
+    type = 'gauge'
+
+    def __init__(self, name, help, labelnames=(), collect=None):
+        super(Gauge, self).__init__(name, help, labelnames)
+        self.collect = collect
+
+    def samples(self):
+        return [('', _format_labels(self.labelnames, key), value) for key, value in sorted(self.collect().items())]
+
+
+class Registry(object):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.metrics = {}
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self.metrics:
+                raise Exception('Duplicate metric ' + metric.name)
+            self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name, help, labelnames=(), collect=None):
+        return self.register(Gauge(name, help, labelnames, collect))
+
+    # all metrics in the Prometheus text format
+    def render(self):
+        with self._lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                logger.exception('Could not render metric %s', metric.name)
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+CALLS = REGISTRY.counter('beam_callback_calls_total', 'Calls of each callback.', ('callback',))
+ERRORS = REGISTRY.counter('beam_callback_errors_total', 'Callbacks that raised an error.', ('callback',))
+LATENCY = REGISTRY.histogram('beam_callback_seconds', 'Time spent in each callback.', ('callback',))
+PHASES = REGISTRY.histogram('beam_phase_seconds', 'Time spent in each phase of a callback.', ('callback', 'phase'))
+
+
+# Times the block as one phase of a callback:
+#   with span('update_graph', 'compute'):
+#       ...
+# The duration goes to the beam_phase_seconds histogram and, at debug level, to the log.
+@contextlib.contextmanager
+def span(callback, phase):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        PHASES.observe(seconds, callback=callback, phase=phase)
+        logger.debug('span callback=%s phase=%s ms=%.3f', callback, phase, seconds * 1e3)
+
+
+# Decorator counting the calls, errors and latency of a callback under name (default: the function name).
+# Exceptions in expected (such as dash PreventUpdate) are control flow and do not count as errors.
+def instrument(name=None, expected=()):
+    def decorate(function):
+        label = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            CALLS.inc(callback=label)
+            try:
+                return function(*args, **kwargs)
+            except expected:
+                raise
+            except Exception:
+                ERRORS.inc(callback=label)
+                logger.exception('callback=%s failed', label)
+                raise
+            finally:
+                seconds = time.perf_counter() - start
+                LATENCY.observe(seconds, callback=label)
+                if seconds >= SLOW_SECONDS:
+                    logger.warning('slow callback=%s ms=%.1f', label, seconds * 1e3)
+                else:
+                    logger.debug('callback=%s ms=%.3f', label, seconds * 1e3)
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,193 @@
+import numpy as np
+
+from beam_core import as_section, clip_stations
+from beam_fem import SUPPORT_TYPES
+from beam_materials import as_material
+
+error_msg_support_type = 'Invalid support_type'
+error_msg_modes = 'n_modes must be a positive integer: '
+error_msg_damping = 'damping must be at least 0 and below 1: '
+error_msg_history = 'Invalid load history: dt must be positive, with one load (and position) per time step'
+error_msg_load_kind = 'Invalid load kind: '
+
+# Free vibration and transient response of a uniform Euler-Bernoulli beam, by modal superposition.
+#
+# The natural frequencies of the support types of the app are omega_n = (beta_n L)^2 sqrt(EI / (m L^4)), with
+# m = density * A the mass per length and beta_n L the roots of the frequency equation of the supports:
+#   simply_supported     sin(bL) = 0                   bL = n pi
+#   cantilever           cos(bL) cosh(bL) + 1 = 0      bL ~ (2n - 1) pi / 2, 1.8751 first
+#   fixed_fixed          cos(bL) cosh(bL) - 1 = 0      bL ~ (2n + 1) pi / 2, 4.7300 first
+#   propped_cantilever   tan(bL) = tanh(bL)            bL ~ (4n + 1) pi / 4, 3.9266 first
+# (fixed at x = 0 like the static solutions). The mode shapes are the closed forms, written with decaying
+# exponentials so that cosh - sinh does not cancel for the higher modes, and scaled to unit modal mass.
+#
+# A point load P(t) at a(t) drives the modal coordinates q_n'' + 2 zeta omega_n q_n' + omega_n^2 q_n =
+# phi_n(a) P, starting at rest, and the deflection is y(x, t) = -sum_n phi_n(x) q_n(t) (a positive load points
+# down). The load is linear between the time steps, for which the response of every mode is the exact
+# discrete convolution of the load with one kernel per mode. Both the kernels (modes x steps) and the mode
+# shapes at the stations (modes x stations) are computed in closed form, the convolutions of every mode run as
+# one batched FFT, and the deflection is one (steps x modes) @ (modes x stations) product: there is no loop
+# over the time steps.
+
+MODES = 20
+NEWTON_STEPS = 30
+
+
+def _check_support_type(support_type):
+    if support_type not in SUPPORT_TYPES:
+        raise Exception(error_msg_support_type)
+
+
+# the first n_modes roots beta_n L of the frequency equation of the supports
+def frequency_parameters(support_type=None, n_modes=MODES):
+    _check_support_type(support_type)
+    if int(n_modes) != n_modes or n_modes < 1:
+        raise Exception(error_msg_modes + str(n_modes))
+    n = np.arange(1, int(n_modes) + 1)
+    if support_type == 'simply_supported':
+        return n * np.pi
+    guess = {'cantilever': (2 * n - 1) * np.pi / 2, 'fixed_fixed': (2 * n + 1) * np.pi / 2,
+             'propped_cantilever': (4 * n + 1) * np.pi / 4}[support_type]
+    # Newton on the equations divided by cosh(bL), which stay of order one
+    b = guess.astype(float)
+    for _ in range(NEWTON_STEPS):
+        decay = np.exp(-2 * b)
+        sech, tanh = 2 * np.exp(-b) / (1 + decay), (1 - decay) / (1 + decay)
+        if support_type == 'cantilever':
+            f, df = np.cos(b) + sech, -np.sin(b) - sech * tanh
+        elif support_type == 'fixed_fixed':
+            f, df = np.cos(b) - sech, -np.sin(b) + sech * tanh
+        else:
+            f, df = np.sin(b) - np.cos(b) * tanh, np.cos(b) + np.sin(b) * tanh - np.cos(b) * sech ** 2
+        b = b - f / df
+    return b
+
+
+# mode shapes of roots bL at the relative stations xi = x / L, (modes x stations), with a mean square of one
+# over the beam
+def _mode_shapes(support_type, bL, xi):
+    bL = bL[:, None]
+    u = bL * xi[None, :]
+    if support_type == 'simply_supported':
+        return np.sqrt(2.0) * np.sin(u)
+    # cosh(u) - cos(u) - sigma (sinh(u) - sin(u)), with cosh(u) - sigma sinh(u) written as
+    # ((1 - sigma) e^u + (1 + sigma) e^-u) / 2 and 1 - sigma as a ratio of terms of order one times e^-bL
+    decay = np.exp(-bL)
+    if support_type == 'cantilever':
+        numerator = np.sin(bL) - np.cos(bL) - decay
+        denominator = 1 - decay ** 2 + 2 * np.sin(bL) * decay
+    else:
+        numerator = np.cos(bL) - np.sin(bL) - decay
+        denominator = 1 - decay ** 2 - 2 * np.sin(bL) * decay
+    sigma = 1 - 2 * numerator * decay / denominator
+    hyperbolic = (2 * numerator * np.exp(u - bL) / denominator + (1 + sigma) * np.exp(-u)) / 2
+    return hyperbolic - np.cos(u) + sigma * np.sin(u)
+
+
+# Exact discrete response of unit mass oscillators to a load linear between the time steps. Returns
+# (kernel, first), both (modes x steps): the modal coordinate at step k is
+#   sum_j load_j kernel[k - j] + load_0 (first[k] - kernel[k])
+# as the load starts at t = 0 (the first step has no load before it). kernel is the response to a unit hat
+# load around t = 0 and first to its half after t = 0. With o(t) = Re(c e^(lambda t)) the oscillating part of
+# the response to a unit ramp, the second differences of the ramp response are the closed forms below.
+def _kernels(omega, damping, dt, n_steps):
+    omega = omega[:, None]
+    omega_d = omega * np.sqrt(1 - damping ** 2)
+    lam = -damping * omega + 1j * omega_d
+    c = 2 * damping / omega - 1j * (2 * damping ** 2 - 1) / omega_d
+    decay = np.exp(lam * (dt * np.arange(n_steps)))
+    scale = omega ** 2 * dt
+    kernel = np.real(c * decay * (2 * np.sinh(lam * dt / 2)) ** 2) / scale
+    kernel[:, 0] = np.real(c * (np.expm1(lam * dt) - lam * dt))[:, 0] / scale[:, 0]
+    first = -np.real((1 - 1j * damping * omega / omega_d) * decay) / omega ** 2 + \
+        np.real(c * decay * np.expm1(-lam * dt)) / scale
+    first[:, 0] = 0.0
+    return kernel, first
+
+
+# Modal model of a uniform beam. L in m, EI in N*m^2, mass per length in kg/m. The frequencies (rad/s and
+# Hz) of the first n_modes modes are computed once.
+class ModalModel(object):
+    def __init__(self, support_type=None, L=None, EI=None, mass=None, n_modes=MODES):
+        self.support_type = support_type
+        self.L = float(L)
+        self.EI = float(EI)
+        self.mass = float(mass)
+        self.beta_L = frequency_parameters(support_type, n_modes)
+        self.omega = self.beta_L ** 2 * np.sqrt(self.EI / (self.mass * self.L ** 4))
+        self.frequencies = self.omega / (2 * np.pi)
+
+    @property
+    def n_modes(self):
+        return len(self.omega)
+
+    # mass normalized mode shapes at the stations x, (modes x stations): the modal matrix of the stations
+    def shapes(self, x=None):
+        xi = clip_stations(np.atleast_1d(np.asarray(x, dtype=float)), self.L) / self.L
+        return _mode_shapes(self.support_type, self.beta_L, xi) / np.sqrt(self.mass * self.L)
+
+    # the static deflection of a point load F at a from the modes, at the stations x
+    def static(self, F=None, a=None, x=None):
+        return -(F * self.shapes([a])[:, 0] / self.omega ** 2) @ self.shapes(x)
+
+    # modal coordinates (steps x modes) under the load history: load[k] in N at t = k dt, at a (m) or at a[k]
+    # for a moving load, linear in between. damping: modal damping ratio of every mode.
+    def modal_response(self, load=None, dt=None, a=None, damping=0.0):
+        load = np.asarray(load, dtype=float)
+        a = np.asarray(a, dtype=float)
+        if load.ndim != 1 or not len(load) or not dt > 0 or a.ndim > 1 or (a.ndim and a.shape != load.shape):
+            raise Exception(error_msg_history)
+        if not 0 <= damping < 1:
+            raise Exception(error_msg_damping + str(damping))
+        n_steps = len(load)
+        forcing = self.shapes(a.reshape(-1)) * load  # (modes x steps), one column broadcast for a fixed load
+        kernel, first = _kernels(self.omega, damping, dt, n_steps)
+        size = 1 << (2 * n_steps - 1).bit_length()
+        q = np.fft.irfft(np.fft.rfft(forcing, size) * np.fft.rfft(kernel, size), size)[:, :n_steps]
+        q += forcing[:, :1] * (first - kernel)
+        return q.T
+
+    # Transient response to the load history (see modal_response) at the stations x. Returns
+    #   {'t': (steps,), 'x': (stations,), 'modal': (steps x modes), 'deflection': (steps x stations) in m}
+    def transient(self, load=None, dt=None, a=None, x=None, damping=0.0):
+        q = self.modal_response(load, dt, a, damping)
+        x = clip_stations(np.atleast_1d(np.asarray(x, dtype=float)), self.L)
+        return {
+            't': dt * np.arange(len(q)),
+            'x': x,
+            'modal': q,
+            'deflection': -(q @ self.shapes(x)),
+        }
+
+
+# ModalModel of a beam of a cross section (see beam_core.as_section) and a material (a name of the material
+# tables, a dict or a Material, see beam_materials), which gives E and the density
+def modal_model(support_type=None, L=None, xsection=None, material=None, n_modes=MODES):
+    section = as_section(xsection)
+    material = as_material(material)
+    return ModalModel(support_type, L, material.E * section.I, material.density * section.A, n_modes)
+
+
+LOAD_KINDS = ('step', 'impact', 'harmonic', 'moving')
+
+
+# Load histories of n_steps steps over duration seconds for a force F:
+#   step       F at a from t = 0
+#   impact     a half sine pulse of peak F at a, parameter seconds long
+#   harmonic   F sin(2 pi parameter t) at a, parameter in Hz
+#   moving     F crossing the beam from x = 0 at parameter m/s, a is ignored
+# Returns (t, load, a), a being one position per step for the moving load.
+def load_history(kind=None, F=None, a=None, L=None, duration=None, n_steps=None, parameter=None):
+    if kind not in LOAD_KINDS:
+        raise Exception(error_msg_load_kind + str(kind))
+    if kind != 'step' and not parameter > 0:
+        raise Exception(error_msg_history)
+    t = np.linspace(0.0, duration, n_steps)
+    if kind == 'step':
+        return t, np.full(n_steps, float(F)), a
+    if kind == 'impact':
+        return t, np.where(t <= parameter, F * np.sin(np.pi * np.minimum(t / parameter, 1.0)), 0.0), a
+    if kind == 'harmonic':
+        return t, F * np.sin(2 * np.pi * parameter * t), a
+    position = parameter * t
+    return t, np.where(position <= L, float(F), 0.0), np.minimum(position, L)
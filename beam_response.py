@@ -0,0 +1,285 @@
+import numpy as np
+
+error_msg_a = 'Is a between 0 and L? a: '
+error_msg_support_type = 'Invalid support_type'
+error_msg_breaks = 'Breakpoints must be increasing and match the coefficient rows'
+
+
+# Piecewise polynomial on [breaks[0], breaks[-1]].
+# breaks: increasing array of n + 1 breakpoints.
+# coefs: (n, degree + 1) array. row i holds the coefficients of segment i in the local coordinate
+#        u = x - breaks[i], highest power first (the np.polyval order). local coordinates keep the cubic
+#        terms well conditioned on long beams.
+# side: which segment owns an interior breakpoint. 'right' puts x == breaks[i] in segment i, 'left' puts it
+#       in segment i - 1. it only matters for polynomials that jump at a breakpoint, like the shear force.
+class PiecewisePolynomial(object):
+    __slots__ = ('breaks', 'coefs', 'side')
+
+    def __init__(self, breaks, coefs, side='right'):
+        breaks = np.asarray(breaks, dtype=float)
+        coefs = np.atleast_2d(np.asarray(coefs, dtype=float))
+        if breaks.ndim != 1 or len(breaks) != len(coefs) + 1 or np.any(np.diff(breaks) < 0):
+            raise Exception(error_msg_breaks)
+        self.breaks = breaks
+        self.coefs = coefs
+        self.side = side
+
+    # builds a piecewise polynomial from global power-basis coefficients (highest power first) per segment
+    @classmethod
+    def from_global(cls, breaks, global_coefs, side='right'):
+        breaks = np.asarray(breaks, dtype=float)
+        degree = max(len(c) for c in global_coefs) - 1
+        coefs = np.zeros((len(global_coefs), degree + 1))
+        for i, c in enumerate(global_coefs):
+            coefs[i] = _taylor_shift(np.pad(np.asarray(c, dtype=float), (degree + 1 - len(c), 0)), breaks[i])
+        return cls(breaks, coefs, side)
+
+    @property
+    def degree(self):
+        return self.coefs.shape[1] - 1
+
+    def segment_index(self, x):
+        i = np.searchsorted(self.breaks, x, side=self.side) - 1
+        return np.clip(i, 0, len(self.coefs) - 1)
+
+    # Horner's scheme over all points at once. points outside the breakpoints use the end segments.
+    def __call__(self, x):
+        x = np.asarray(x, dtype=float)
+        i = self.segment_index(x)
+        u = x - self.breaks[i]
+        c = self.coefs[i]
+        y = c[..., 0].copy()
+        for k in range(1, self.coefs.shape[1]):
+            y = y * u + c[..., k]
+        return y
+
+    def derivative(self, order=1):
+        coefs = self.coefs
+        for _ in range(order):
+            degree = coefs.shape[1] - 1
+            if degree == 0:
+                coefs = np.zeros((len(coefs), 1))
+                break
+            coefs = coefs[:, :-1] * np.arange(degree, 0, -1)
+        return PiecewisePolynomial(self.breaks, coefs, self.side)
+
+    # antiderivative that is zero at breaks[0] and continuous across the breakpoints
+    def antiderivative(self):
+        degree = self.degree
+        coefs = np.zeros((len(self.coefs), degree + 2))
+        coefs[:, :-1] = self.coefs / np.arange(degree + 1, 0, -1)
+        widths = np.diff(self.breaks)
+        for i in range(len(coefs)):
+            if i > 0:
+                coefs[i, -1] = np.polyval(coefs[i - 1], widths[i - 1])
+        return PiecewisePolynomial(self.breaks, coefs, self.side)
+
+    def integral(self, x0=None, x1=None):
+        x0 = self.breaks[0] if x0 is None else x0
+        x1 = self.breaks[-1] if x1 is None else x1
+        F = self.antiderivative()
+        return float(F(x1) - F(x0))
+
+    def _combine(self, other, op):
+        if not isinstance(other, PiecewisePolynomial):
+            return PiecewisePolynomial(self.breaks, op(self.coefs, other), self.side)
+        a, b = _common_breaks(self, other)
+        if op is np.multiply:
+            coefs = np.array([np.convolve(p, q) for p, q in zip(a.coefs, b.coefs)])
+        else:
+            degree = max(a.degree, b.degree)
+            coefs = op(_pad_degree(a.coefs, degree), _pad_degree(b.coefs, degree))
+        return PiecewisePolynomial(a.breaks, coefs, 'left' if 'left' in (self.side, other.side) else 'right')
+
+    def __add__(self, other):
+        if not isinstance(other, PiecewisePolynomial):
+            coefs = self.coefs.copy()
+            coefs[:, -1] += other
+            return PiecewisePolynomial(self.breaks, coefs, self.side)
+        return self._combine(other, np.add)
+
+    __radd__ = __add__
+
+    def __mul__(self, other):
+        return self._combine(other, np.multiply)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        return PiecewisePolynomial(self.breaks, self.coefs / other, self.side)
+
+    def __neg__(self):
+        return PiecewisePolynomial(self.breaks, -self.coefs, self.side)
+
+    # locations where the derivative vanishes inside a segment, plus both sides of every breakpoint
+    def critical_points(self):
+        points = [self.breaks]
+        widths = np.diff(self.breaks)
+        d = self.derivative()
+        for i, c in enumerate(d.coefs):
+            c = np.trim_zeros(c, 'f')
+            if len(c) < 2:
+                continue
+            roots = np.roots(c)
+            roots = roots[np.abs(roots.imag) <= 1e-12 * max(1.0, widths[i])].real
+            points.append(self.breaks[i] + roots[(roots > 0) & (roots < widths[i])])
+        return np.unique(np.concatenate(points))
+
+    # exact location and value of the largest |p(x)|, found from the roots of the derivative.
+    # breakpoints are checked with the polynomial of both adjacent segments so jumps are not missed.
+    def abs_max(self):
+        x = self.critical_points()
+        i = np.clip(np.searchsorted(self.breaks, x, side='right') - 1, 0, len(self.coefs) - 1)
+        candidates = [(x, i), (x, np.clip(np.searchsorted(self.breaks, x, side='left') - 1, 0, len(self.coefs) - 1))]
+        best_x, best_y = 0.0, 0.0
+        for xs, segs in candidates:
+            u = xs - self.breaks[segs]
+            c = self.coefs[segs]
+            y = c[:, 0].copy()
+            for k in range(1, c.shape[1]):
+                y = y * u + c[:, k]
+            j = int(np.argmax(np.abs(y)))
+            if abs(y[j]) > abs(best_y):
+                best_x, best_y = float(xs[j]), float(y[j])
+        return best_x, best_y
+
+
+# coefficients of p(x0 + u) in u, given the coefficients of p(x)
+def _taylor_shift(coefs, x0):
+    degree = len(coefs) - 1
+    shifted = np.zeros(degree + 1)
+    p = coefs
+    factorial = 1.0
+    for k in range(degree + 1):
+        if k > 0:
+            factorial *= k
+            p = np.polyder(p) if len(p) > 1 else np.zeros(1)
+        shifted[degree - k] = np.polyval(p, x0) / factorial
+    return shifted
+
+
+def _pad_degree(coefs, degree):
+    return np.pad(coefs, ((0, 0), (degree - (coefs.shape[1] - 1), 0)))
+
+
+# re-expresses both polynomials on the union of their breakpoints
+def _common_breaks(p, q):
+    if len(p.breaks) == len(q.breaks) and np.array_equal(p.breaks, q.breaks):
+        return p, q
+    breaks = np.union1d(p.breaks, q.breaks)
+    return _refine(p, breaks), _refine(q, breaks)
+
+
+def _refine(p, breaks):
+    coefs = np.zeros((len(breaks) - 1, p.degree + 1))
+    for k in range(len(breaks) - 1):
+        mid = 0.5 * (breaks[k] + breaks[k + 1])
+        i = int(p.segment_index(mid))
+        coefs[k] = _taylor_shift(p.coefs[i], breaks[k] - p.breaks[i])
+    return PiecewisePolynomial(breaks, coefs, p.side)
+
+
+# Closed-form response of a beam with a single point load F at a, stored as piecewise polynomials in x
+# split at the load point. The segments reproduce the closed forms in beam_core exactly.
+# EI: flexural rigidity E * I. A: cross section area. S: section modulus I / c.
+class BeamResponse(object):
+    def __init__(self, F=None, a=None, L=None, support_type=None, EI=1.0, A=1.0, S=1.0):
+        self.F, self.a, self.L, self.support_type = F, a, L, support_type
+        self.EI, self.A, self.S = EI, A, S
+        if not 0.0 <= a <= L:
+            raise Exception(error_msg_a + str(a))
+        breaks = [0.0, a, L]
+
+        if support_type == 'cantilever':
+            deflection = [[F / 6, -F * a / 2, 0.0, 0.0],
+                          [-F * a ** 2 / 2, F * a ** 3 / 6]]
+            moment = [[F, -F * a], [0.0]]
+            shear = [[F], [0.0]]
+        elif support_type == 'simply_supported':
+            b = L - a
+            if b == 0:
+                deflection = [[0.0], [0.0]]
+            else:
+                k = F * b * (L ** 2 - b ** 2) / (6 * L)
+                deflection = [[F * b / (6 * L), 0.0, -k, 0.0],
+                              [-F / 6 + F * b / (6 * L), F * a / 2, -F * a ** 2 / 2 - k, F * a ** 3 / 6]]
+            if a == 0.0:
+                moment = [[0.0], [0.0]]
+            else:
+                M_max = (F * a * b) / L
+                moment = [[M_max / a, 0.0], [-M_max / b if b else 0.0, M_max * (1 + a / b) if b else M_max]]
+            shear = [[(F * b) / L], [(-F * a) / L]]
+        else:
+            raise Exception(error_msg_support_type)
+
+        self._set_polynomials(PiecewisePolynomial.from_global(breaks, shear, 'left'),
+                              PiecewisePolynomial.from_global(breaks, moment, 'left'),
+                              PiecewisePolynomial.from_global(breaks, deflection, 'right'))
+
+    # response of any load case given its shear force, bending moment and EI * deflection polynomials
+    # (see beam_loads.LoadCase.polynomials)
+    @classmethod
+    def from_polynomials(cls, shear_force, bending_moment, deflection_EI, L=None, support_type=None, EI=1.0, A=1.0,
+                         S=1.0):
+        response = cls.__new__(cls)
+        response.F = response.a = None
+        response.L, response.support_type = L, support_type
+        response.EI, response.A, response.S = EI, A, S
+        response._set_polynomials(shear_force, bending_moment, deflection_EI)
+        return response
+
+    def _set_polynomials(self, shear_force, bending_moment, deflection_EI):
+        EI, A, S = self.EI, self.A, self.S
+        self.deflection = deflection_EI / EI
+        self.slope = self.deflection.derivative()
+        self.bending_moment = bending_moment
+        self.shear_force = shear_force
+        self.bending_stress = self.bending_moment / S
+        self.shear_stress = self.shear_force / A
+        self.von_mises_squared = self.bending_stress * self.bending_stress + 3 * (self.shear_stress * self.shear_stress)
+
+    def von_mises(self, x):
+        return np.sqrt(np.maximum(self.von_mises_squared(x), 0.0))
+
+    def evaluate(self, x):
+        x = np.clip(np.asarray(x, dtype=float), 0.0, self.L)
+        return {
+            'x': x,
+            'deflection': self.deflection(x),
+            'slope': self.slope(x),
+            'shear_force': self.shear_force(x),
+            'bending_moment': self.bending_moment(x),
+            'shear_stress': self.shear_stress(x),
+            'bending_stress': self.bending_stress(x),
+            'von_mises': self.von_mises(x),
+        }
+
+    # each max_* returns (x, value) of the largest magnitude, value keeps its sign
+    def max_deflection(self):
+        return self.deflection.abs_max()
+
+    def max_slope(self):
+        return self.slope.abs_max()
+
+    def max_moment(self):
+        return self.bending_moment.abs_max()
+
+    def max_shear_force(self):
+        return self.shear_force.abs_max()
+
+    def max_bending_stress(self):
+        return self.bending_stress.abs_max()
+
+    def max_von_mises(self):
+        x, value = self.von_mises_squared.abs_max()
+        return x, float(np.sqrt(max(value, 0.0)))
+
+    def summary(self):
+        summary = {}
+        for name, (x, value) in (('deflection', self.max_deflection()),
+                                 ('moment', self.max_moment()),
+                                 ('bending_stress', self.max_bending_stress()),
+                                 ('von_mises', self.max_von_mises())):
+            summary['max_' + name] = value
+            summary['max_' + name + '_x'] = x
+        return summary
@@ -0,0 +1,73 @@
+import numpy as np
+
+
+# Adaptive stations on [x0, x1] for plotting the curves in funcs (callables taking an array of x).
+# Starts from a uniform grid of min_points plus the exact breakpoints, then repeatedly bisects the intervals
+# whose midpoint deviates the most from the straight line between its ends, relative to the size of each
+# curve. That deviation is h ** 2 * f'' / 8, so points concentrate where the curvature is large.
+# Refinement stops when every interval is within tol or the max_points budget is used up.
+# breakpoints (supports, load points, extrema) are always part of the result. Intervals narrower than
+# min_width times the span are never split, so jumps in a curve do not consume the budget.
+def adaptive_stations(funcs, x0, x1, breakpoints=(), max_points=2000, min_points=256, tol=1e-4,
+                      min_width=1e-9):
+    breakpoints = np.asarray(breakpoints, dtype=float)
+    breakpoints = breakpoints[(breakpoints >= x0) & (breakpoints <= x1)]
+    x = np.unique(np.concatenate([np.linspace(x0, x1, max(2, min(min_points, max_points))), breakpoints]))
+    if x1 <= x0:
+        return x
+
+    values = [np.asarray(f(x), dtype=float) for f in funcs]
+    while len(x) < max_points:
+        mid = 0.5 * (x[:-1] + x[1:])
+        error = np.zeros(len(mid))
+        mid_values = []
+        for f, y in zip(funcs, values):
+            y_mid = np.asarray(f(mid), dtype=float)
+            scale = np.max(np.abs(y))
+            if scale > 0:
+                error = np.maximum(error, np.abs(y_mid - 0.5 * (y[:-1] + y[1:])) / scale)
+            mid_values.append(y_mid)
+
+        error[np.diff(x) <= min_width * (x1 - x0)] = 0.0
+        refine = np.flatnonzero(error > tol)
+        if len(refine) == 0:
+            break
+        budget = max_points - len(x)
+        if len(refine) > budget:
+            refine = refine[np.argsort(error[refine])[::-1][:budget]]
+            refine.sort()
+
+        order = np.argsort(np.concatenate([x, mid[refine]]), kind='mergesort')
+        x = np.concatenate([x, mid[refine]])[order]
+        values = [np.concatenate([y, y_mid[refine]])[order] for y, y_mid in zip(values, mid_values)]
+    return x
+
+
+# Largest-Triangle-Three-Buckets downsampling. Returns the indices of at most n_out points of (x, y) that
+# keep the visual shape of the curve. Indices listed in keep (for example the load point) are always kept.
+def lttb_indices(x, y, n_out, keep=()):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.zeros(n_out, dtype=int)
+    selected[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[stop:next_stop].mean() if next_stop > stop else x[-1]
+        avg_y = y[stop:next_stop].mean() if next_stop > stop else y[-1]
+        area = np.abs((x[a] - avg_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return np.union1d(selected, np.asarray(keep, dtype=int))
+
+
+# downsamples every array in ys with the indices LTTB picks for ys[0]
+def lttb(x, ys, n_out, keep=()):
+    index = lttb_indices(x, ys[0], n_out, keep)
+    return np.asarray(x)[index], [np.asarray(y)[index] for y in ys]
@@ -0,0 +1,170 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from beam_core import E, _deflection_EI, as_section, evaluate_beam
+from beam_influence import InfluenceSurface, unit_response
+
+error_msg_store = 'Not a design store: '
+error_msg_version = 'Unsupported design store version: '
+
+# 2: cantilever surfaces with no shear force or moment past the load (see beam_loads._shear_force)
+VERSION = 2
+INDEX = 'index.json'
+SUPPORT_TYPES = ('cantilever', 'simply_supported')
+# stock lengths in m
+LENGTHS = (1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 8.0, 10.0, 12.0, 15.0, 20.0, 25.0, 30.0, 40.0, 50.0, 100.0)
+N_POSITIONS = 501
+N_STATIONS = 401
+
+# Precomputed design space: the influence surface (see beam_influence) of every support type and stock length,
+# written once to a directory of .npy files plus an index, and read back as memory-mapped arrays.
+#
+# A surface holds the unit load shear force, moment and E * I * deflection, which scale with the force, the
+# section (A, S, I) and the material (E), so one surface per beam covers every section and material.
+# np.load(mmap_mode='r') maps the files read-only: nothing is read until a row is used, and all the worker
+# processes of a server share the same pages of the operating system cache instead of building a copy each.
+# A beam outside the store (another length or support type) is left to the caller to compute live.
+#
+# Layout of the directory:
+#   index.json                  {'version', 'n_positions', 'n_stations', 'entries': [{'support_type', 'L',
+#                                'files': {quantity: file name}}]}
+#   <support_type>_<L>_<quantity>.npy   (n_positions x n_stations) float64 arrays
+
+
+def _file_name(support_type, L, name):
+    return '{}_{}_{}.npy'.format(support_type, repr(float(L)), name)
+
+
+# Writes the surfaces of every support type and length to the directory path (created if needed). Entries
+# already in the store are kept, so a store can be extended with more lengths, unless they are of another
+# version or grid: those are rebuilt from scratch. The index is replaced atomically, so readers never see a
+# half written store.
+def build_store(path=None, support_types=SUPPORT_TYPES, lengths=LENGTHS, n_positions=N_POSITIONS,
+                n_stations=N_STATIONS):
+    os.makedirs(path, exist_ok=True)
+    entries = {}
+    try:
+        index = _read_index(path)
+    except Exception:
+        index = None
+    if index is not None:
+        if (index['n_positions'], index['n_stations']) == (n_positions, n_stations):
+            entries = {(entry['support_type'], entry['L']): entry for entry in index['entries']}
+
+    for support_type in support_types:
+        for L in lengths:
+            L = float(L)
+            surface = InfluenceSurface(unit_response(support_type, L), L, n_positions, n_stations)
+            files = {}
+            for name, values in surface.grid.items():
+                files[name] = _file_name(support_type, L, name)
+                np.save(os.path.join(path, files[name]), values)
+            entries[(support_type, L)] = {'support_type': support_type, 'L': L, 'files': files}
+
+    index = {'version': VERSION, 'n_positions': n_positions, 'n_stations': n_stations,
+             'entries': sorted(entries.values(), key=lambda entry: (entry['support_type'], entry['L']))}
+    handle, temporary = tempfile.mkstemp(dir=path, suffix='.json')
+    with os.fdopen(handle, 'w') as f:
+        json.dump(index, f, indent=1)
+    os.replace(temporary, os.path.join(path, INDEX))
+    return DesignStore(path)
+
+
+def _read_index(path):
+    try:
+        with open(os.path.join(path, INDEX)) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        raise Exception(error_msg_store + str(path))
+    if index.get('version') != VERSION:
+        raise Exception(error_msg_version + str(index.get('version')))
+    return index
+
+
+# A store written by build_store, opened read-only. Opening only reads the index, the arrays are mapped
+# on first use of each beam.
+class DesignStore(object):
+    def __init__(self, path=None):
+        self.path = path
+        index = _read_index(path)
+        self.n_positions = index['n_positions']
+        self.n_stations = index['n_stations']
+        self.entries = {(entry['support_type'], float(entry['L'])): entry['files'] for entry in index['entries']}
+        self._surfaces = {}
+
+    def __contains__(self, key):
+        support_type, L = key
+        return (support_type, float(L)) in self.entries
+
+    # (support_type, L) of every beam in the store
+    def beams(self):
+        return sorted(self.entries)
+
+    # the influence surface of a beam over memory-mapped arrays, None when the beam is not in the store
+    def surface(self, support_type=None, L=None):
+        key = (support_type, float(L))
+        files = self.entries.get(key)
+        if files is None:
+            return None
+        if key not in self._surfaces:
+            grid = {name: np.load(os.path.join(self.path, file_name), mmap_mode='r')
+                    for name, file_name in files.items()}
+            self._surfaces[key] = InfluenceSurface(unit_response(*key), key[1], grid=grid)
+        return self._surfaces[key]
+
+    # Response of a load F at a, over the stations of the store, with the keys of beam_core.evaluate_beam
+    # plus 'deflection_EI'. Interpolated from the store when it holds the beam (see InfluenceSurface.lookup),
+    # otherwise evaluated live at the same stations. material None leaves out the deflection.
+    def response(self, F=None, a=None, L=None, support_type=None, xsection=None, material=None):
+        section = as_section(xsection)
+        surface = self.surface(support_type, L)
+        if surface is None:
+            x = np.linspace(0.0, L, self.n_stations)
+            response = evaluate_beam(F=F, x=x, material=material, xsection=section, a=a, L=L,
+                                     support_type=support_type)
+            response['deflection_EI'] = _deflection_EI(F, response['x'], a, L, support_type)
+            return response
+
+        response = surface.lookup(a, F)
+        response['shear_stress'] = response['shear_force'] / section.A
+        response['bending_stress'] = response['bending_moment'] / section.S
+        response['von_mises'] = np.sqrt(response['bending_stress'] ** 2 + 3 * response['shear_stress'] ** 2)
+        if material is not None:
+            response['deflection'] = response['deflection_EI'] / (E[material] * section.I)
+        return response
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Precomputed influence surfaces of stock beams.')
+    commands = parser.add_subparsers(dest='command')
+    build = commands.add_parser('build', help='write the surfaces of every support type and length')
+    build.add_argument('path')
+    build.add_argument('--lengths', type=float, nargs='+', default=LENGTHS, help='beam lengths in m')
+    build.add_argument('--support-types', nargs='+', default=SUPPORT_TYPES, choices=SUPPORT_TYPES)
+    build.add_argument('--positions', type=int, default=N_POSITIONS, help='load positions per beam')
+    build.add_argument('--stations', type=int, default=N_STATIONS, help='stations per beam')
+    info = commands.add_parser('info', help='list the beams of a store')
+    info.add_argument('path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        store = build_store(args.path, args.support_types, args.lengths, args.positions, args.stations)
+    elif args.command == 'info':
+        store = DesignStore(args.path)
+    else:
+        parser.print_usage(sys.stderr)
+        return 2
+    size = sum(os.path.getsize(os.path.join(store.path, file_name))
+               for files in store.entries.values() for file_name in files.values())
+    print(json.dumps({'path': store.path, 'positions': store.n_positions, 'stations': store.n_stations,
+                      'beams': [{'support_type': st, 'L': L} for st, L in store.beams()], 'bytes': size}, indent=1))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
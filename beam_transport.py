@@ -0,0 +1,75 @@
+import base64
+import gzip
+import json
+
+import numpy as np
+
+error_msg_dtype = 'Invalid array dtype: '
+
+# Typed array encodings understood by plotly.js (and by assets/beam_bending.js):
+# {'dtype': 'f8', 'bdata': base64 of the little endian float64 values}. 'f4' halves the size at float32
+# precision, which is enough for plotting but not for reading exact values back.
+# Arrays with more than one dimension also carry their shape, as a string like '3,100' (row major).
+DTYPES = ('f4', 'f8')
+
+
+def encode_array(values, dtype='f8'):
+    if dtype not in DTYPES:
+        raise Exception(error_msg_dtype + str(dtype))
+    values = np.ascontiguousarray(values, dtype='<' + dtype)
+    encoded = {'dtype': dtype, 'bdata': base64.b64encode(values.tobytes()).decode('ascii')}
+    if values.ndim > 1:
+        encoded['shape'] = ','.join(str(n) for n in values.shape)
+    return encoded
+
+
+def decode_array(encoded):
+    if not isinstance(encoded, dict):
+        return np.asarray(encoded, dtype=float)
+    values = np.frombuffer(base64.b64decode(encoded['bdata']), dtype='<' + encoded['dtype']).astype(float)
+    if encoded.get('shape'):
+        values = values.reshape([int(n) for n in str(encoded['shape']).split(',')])
+    return values
+
+
+def is_encoded(value):
+    return isinstance(value, dict) and 'bdata' in value and 'dtype' in value
+
+
+# Replaces every float numpy array in a nested structure of dicts, lists and tuples by its typed array
+# encoding. dtype None leaves the structure unchanged (arrays are then sent as JSON lists).
+def encode_arrays(obj, dtype='f8'):
+    if dtype is None:
+        return obj
+    if isinstance(obj, np.ndarray) and obj.ndim > 0 and obj.dtype.kind in 'fiu':
+        return encode_array(obj, dtype)
+    if isinstance(obj, dict):
+        return {key: encode_arrays(value, dtype) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(encode_arrays(value, dtype) for value in obj)
+    return obj
+
+
+# inverse of encode_arrays
+def decode_arrays(obj):
+    if is_encoded(obj):
+        return decode_array(obj)
+    if isinstance(obj, dict):
+        return {key: decode_arrays(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(decode_arrays(value) for value in obj)
+    return obj
+
+
+def _default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(type(obj).__name__)
+
+
+# size in bytes of obj as a JSON response, uncompressed and gzip compressed
+def payload_size(obj):
+    text = json.dumps(obj, default=_default, separators=(',', ':')).encode('utf-8')
+    return {'json': len(text), 'gzip': len(gzip.compress(text, 6))}
@@ -0,0 +1,396 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+
+import numpy as np
+
+from beam_batch import beam_peaks
+from beam_core import E, SECTION_DIMS, _bending_moment, _deflection_EI, _section_properties, _shear_force
+
+error_msg_distribution = 'Invalid distribution: '
+error_msg_xsection = 'Invalid xsection: '
+error_msg_samples = 'No valid sample: every sample had a non-positive dimension or modulus'
+
+# Monte Carlo propagation of uncertain inputs to the peak deflection and von Mises stress of a single point
+# load beam (the closed forms of beam_core).
+#
+# Every uncertain input is a distribution in dict form, or a number for a fixed value:
+#   {'dist': 'fixed', 'value': v}
+#   {'dist': 'normal', 'mean': m, 'std': s}        or 'cov' (std / |mean|) instead of 'std'
+#   {'dist': 'lognormal', 'mean': m, 'cov': c}     positive, with mean m and coefficient of variation c
+#   {'dist': 'uniform', 'low': l, 'high': h}
+#   {'dist': 'triangular', 'low': l, 'mode': m, 'high': h}
+# The load position is clipped to the beam. Samples with a non-positive modulus or section dimension, or an
+# invalid I-beam or tee (see beam_core._section_properties), are rejected and counted.
+#
+# Samples are drawn and evaluated in chunks of (chunk_size,) arrays, so memory does not grow with the number
+# of samples. Chunk k draws from its own random stream (seed, k), so the results only depend on the seed and
+# the chunk size, not on the number of worker processes. Each chunk reduces its peaks to counts, sums, the
+# extremes and a histogram of logarithmic bins, which add up across chunks:
+#   - exceedance probabilities of the limits are exact counts,
+#   - percentiles are read from the histogram, to within one bin (BINS_PER_DECADE, 0.12 %),
+#   - envelope bands (percentiles of the curves at every station) come from the first band_samples samples.
+
+DISTRIBUTIONS = ('fixed', 'normal', 'lognormal', 'uniform', 'triangular')
+PERCENTILES = (5.0, 50.0, 95.0)
+QUANTITIES = ('deflection', 'von_mises')
+CURVES = ('deflection', 'shear_stress', 'bending_stress', 'von_mises')
+# histogram resolution of the peaks, and the decades it spans around the peaks of the first chunk
+BINS_PER_DECADE = 2000
+HISTOGRAM_DECADES = 4
+
+
+def as_distribution(spec=None):
+    if isinstance(spec, (int, float)):
+        return {'dist': 'fixed', 'value': float(spec)}
+    try:
+        dist = spec['dist']
+        if dist == 'fixed':
+            return {'dist': dist, 'value': float(spec['value'])}
+        elif dist == 'normal':
+            mean = float(spec['mean'])
+            std = float(spec['std']) if 'std' in spec else float(spec['cov']) * abs(mean)
+            if std < 0:
+                raise ValueError(std)
+            return {'dist': dist, 'mean': mean, 'std': std}
+        elif dist == 'lognormal':
+            mean, cov = float(spec['mean']), float(spec['cov'])
+            if mean <= 0 or cov < 0:
+                raise ValueError(mean)
+            return {'dist': dist, 'mean': mean, 'cov': cov}
+        elif dist == 'uniform':
+            low, high = float(spec['low']), float(spec['high'])
+            if high < low:
+                raise ValueError(high)
+            return {'dist': dist, 'low': low, 'high': high}
+        elif dist == 'triangular':
+            low, mode, high = float(spec['low']), float(spec['mode']), float(spec['high'])
+            if not low <= mode <= high or low == high:
+                raise ValueError(mode)
+            return {'dist': dist, 'low': low, 'mode': mode, 'high': high}
+    except (KeyError, TypeError, ValueError):
+        pass
+    raise Exception(error_msg_distribution + str(spec))
+
+
+# n samples of a distribution (see as_distribution) from the numpy Generator rng
+def draw(spec=None, rng=None, n=None):
+    spec = as_distribution(spec)
+    dist = spec['dist']
+    if dist == 'fixed':
+        return np.full(n, spec['value'])
+    elif dist == 'normal':
+        return rng.normal(spec['mean'], spec['std'], n)
+    elif dist == 'lognormal':
+        sigma2 = np.log1p(spec['cov'] ** 2)
+        return rng.lognormal(np.log(spec['mean']) - 0.5 * sigma2, np.sqrt(sigma2), n)
+    elif dist == 'uniform':
+        return rng.uniform(spec['low'], spec['high'], n)
+    return rng.triangular(spec['low'], spec['mode'], spec['high'], n)
+
+
+def mean(spec=None):
+    spec = as_distribution(spec)
+    dist = spec['dist']
+    if dist == 'fixed':
+        return spec['value']
+    elif dist in ('normal', 'lognormal'):
+        return spec['mean']
+    elif dist == 'uniform':
+        return 0.5 * (spec['low'] + spec['high'])
+    return (spec['low'] + spec['mode'] + spec['high']) / 3
+
+
+# A beam with uncertain inputs. F, a and modulus (Young's modulus in Pa) are distributions, xsection a dict
+# of a section type and a distribution per dimension, such as
+#   {'type': 'rectangular', 'b': {'dist': 'lognormal', 'mean': 0.1, 'cov': 0.02}, 'h': 0.2}
+# L and support_type are fixed.
+class UncertainBeam(object):
+    def __init__(self, F=None, a=None, L=None, support_type=None, modulus=None, xsection=None):
+        if support_type not in ('cantilever', 'simply_supported'):
+            raise Exception('Invalid support_type')
+        xsection = dict(xsection or {})
+        section_type = xsection.pop('type', None)
+        if section_type not in SECTION_DIMS or set(xsection) != set(SECTION_DIMS[section_type]):
+            raise Exception(error_msg_xsection + str(xsection))
+        self.F = as_distribution(F)
+        self.a = as_distribution(a)
+        self.L = float(L)
+        self.support_type = support_type
+        self.modulus = as_distribution(modulus)
+        self.section_type = section_type
+        self.dims = tuple(as_distribution(xsection[name]) for name in SECTION_DIMS[section_type])
+
+    # dict of (n,) arrays F, a, EI, A, S of the valid samples of n draws, and the number rejected
+    def sample(self, rng, n):
+        F = draw(self.F, rng, n)
+        a = np.clip(draw(self.a, rng, n), 0.0, self.L)
+        modulus = draw(self.modulus, rng, n)
+        dims = [draw(dim, rng, n) for dim in self.dims]
+
+        valid = (modulus > 0) & np.all([dim > 0 for dim in dims], axis=0)
+        if self.section_type == 'i_beam':
+            valid &= (dims[2] <= dims[0]) & (2 * dims[3] <= dims[1])
+        elif self.section_type == 'tee':
+            valid &= (dims[2] <= dims[0]) & (dims[3] <= dims[1])
+        I, A, c = _section_properties(self.section_type, *(dim[valid] for dim in dims))
+        samples = {'F': F[valid], 'a': a[valid], 'EI': modulus[valid] * I, 'A': A, 'S': I / c}
+        return samples, int(n - np.count_nonzero(valid))
+
+    # (|peak deflection|, peak von Mises stress) of every sample, exact (see beam_batch.beam_peaks)
+    def peaks(self, samples):
+        n = len(samples['F'])
+        _, deflection, _, von_mises = beam_peaks(samples['F'], samples['a'], np.full(n, self.L), samples['EI'],
+                                                 samples['A'], samples['S'], self.support_type)
+        return {'deflection': np.abs(deflection), 'von_mises': von_mises}
+
+    # (samples, stations) arrays of the curves of the graphs at the stations x
+    def curves(self, samples, x):
+        F, a, EI, A, S = (samples[name][:, None] for name in ('F', 'a', 'EI', 'A', 'S'))
+        shear_stress = _shear_force(F, x, a, self.L, self.support_type) / A
+        bending_stress = _bending_moment(F, x, a, self.L, self.support_type) / S
+        return {
+            'deflection': _deflection_EI(F, x, a, self.L, self.support_type) / EI,
+            'shear_stress': shear_stress,
+            'bending_stress': bending_stress,
+            'von_mises': np.sqrt(bending_stress ** 2 + 3 * shear_stress ** 2),
+        }
+
+    # the single beam of the mean inputs, for the nominal curve
+    def mean_samples(self):
+        dims = [np.array([mean(dim)]) for dim in self.dims]
+        I, A, c = _section_properties(self.section_type, *dims)
+        return {'F': np.array([mean(self.F)]), 'a': np.clip([mean(self.a)], 0.0, self.L),
+                'EI': mean(self.modulus) * I, 'A': A, 'S': I / c}
+
+
+# Statistics of one chunk, which add up across chunks (see _merge): per quantity the count, sum, sum of squares,
+# extremes, number of values over the limit and histogram, and the number of samples over either limit.
+# limits: {quantity: limit or None}. edges: {quantity: log10 of the histogram edges}.
+def _chunk_statistics(peaks, limits, edges):
+    statistics = {}
+    failures = np.zeros(len(peaks['deflection']), dtype=bool)
+    for name, values in peaks.items():
+        stats = {
+            'count': len(values),
+            'sum': float(np.sum(values)),
+            'sum_squares': float(np.sum(values ** 2)),
+            'min': float(np.min(values)) if len(values) else np.inf,
+            'max': float(np.max(values)) if len(values) else -np.inf,
+        }
+        if limits.get(name) is not None:
+            over = values > limits[name]
+            stats['exceed'] = int(np.count_nonzero(over))
+            failures |= over
+        # bin 0 holds the values below the first edge (zeros included), the last bin those above the last edge
+        with np.errstate(divide='ignore'):
+            index = np.searchsorted(edges[name], np.log10(values), side='right')
+        stats['histogram'] = np.bincount(index, minlength=len(edges[name]) + 1)
+        statistics[name] = stats
+    statistics['failures'] = int(np.count_nonzero(failures))
+    return statistics
+
+
+def _merge(total, statistics):
+    total['failures'] += statistics['failures']
+    for name in QUANTITIES:
+        merged = total[name]
+        for key, value in statistics[name].items():
+            if key == 'min':
+                merged[key] = min(merged[key], value)
+            elif key == 'max':
+                merged[key] = max(merged[key], value)
+            else:
+                merged[key] = merged[key] + value
+    return total
+
+
+# Draws and evaluates chunk index of a run. Picklable, for the worker processes.
+class _ChunkRunner(object):
+    def __init__(self, beam, seed, chunk_size, n_samples, limits, edges=None):
+        self.beam = beam
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.n_samples = n_samples
+        self.limits = limits
+        self.edges = edges
+
+    def draw(self, index):
+        rng = np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=(index,)))
+        n = min(self.chunk_size, self.n_samples - index * self.chunk_size)
+        return self.beam.sample(rng, n)
+
+    def __call__(self, index):
+        samples, rejected = self.draw(index)
+        return _chunk_statistics(self.beam.peaks(samples), self.limits, self.edges), rejected
+
+
+# log10 edges of BINS_PER_DECADE bins per decade, HISTOGRAM_DECADES beyond the peaks of the first chunk
+def _histogram_edges(peaks):
+    edges = {}
+    for name, values in peaks.items():
+        positive = values[values > 0]
+        low, high = (np.min(positive), np.max(positive)) if len(positive) else (1.0, 1.0)
+        start = np.floor(np.log10(low)) - HISTOGRAM_DECADES
+        stop = np.ceil(np.log10(high)) + HISTOGRAM_DECADES
+        edges[name] = np.linspace(start, stop, int(round((stop - start) * BINS_PER_DECADE)) + 1)
+    return edges
+
+
+# Percentile q of the histogram, interpolated in log space within its bin. Percentiles that fall in the bins
+# below the first or above the last edge are the exact extremes.
+def _histogram_percentile(histogram, edges, stats, q):
+    cumulative = np.cumsum(histogram)
+    rank = q / 100.0 * (stats['count'] - 1)
+    index = int(np.searchsorted(cumulative, rank, side='right'))
+    if index == 0:
+        return stats['min']
+    if index >= len(edges):
+        return stats['max']
+    fraction = (rank - cumulative[index - 1] + 0.5) / histogram[index]
+    value = 10 ** (edges[index - 1] + min(max(fraction, 0.0), 1.0) * (edges[index] - edges[index - 1]))
+    return float(min(max(value, stats['min']), stats['max']))
+
+
+# Envelope bands: the percentiles of every curve at the stations x over the first valid samples, at most
+# band_samples of them
+def _bands(beam, runner, n_chunks, x, percentiles, band_samples):
+    parts = []
+    count = 0
+    for index in range(n_chunks):
+        if count >= band_samples:
+            break
+        samples, _ = runner.draw(index)
+        parts.append({name: values[:band_samples - count] for name, values in samples.items()})
+        count += len(parts[-1]['F'])
+    samples = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+    bands = {'x': x, 'percentiles': list(percentiles), 'samples': count}
+    nominal = beam.curves(beam.mean_samples(), x)
+    for name, values in beam.curves(samples, x).items():
+        bands[name] = np.percentile(values, percentiles, axis=0)
+        bands['nominal_' + name] = nominal[name][0]
+    return bands
+
+
+# Runs n_samples of the beam (an UncertainBeam). Returns
+#   {'samples': valid samples, 'rejected': rejected samples,
+#    'deflection': stats of the peak |deflection| in m, 'von_mises': stats of the peak von Mises stress in Pa,
+#    'failure': probability that either peak exceeds its limit (None without limits),
+#    'bands': envelope bands (None when n_stations is 0)}
+# with stats {'mean', 'std', 'min', 'max', 'percentiles': {q: value}, 'exceedance': probability of exceeding
+# the limit, None without one}. The bands hold x, the percentiles, the number of 'samples' used, a
+# (percentiles, stations) array per curve of CURVES and the curve 'nominal_<curve>' of the mean inputs.
+# max_deflection, max_stress: limits in m and Pa, None for none.
+# workers: processes for the chunks after the first (default 1, the calling process).
+# progress: called as progress(done, total) with the chunks done, and the bands as one more step. An exception
+# it raises stops the run, like the cancellation of a background job (see beam_jobs).
+def monte_carlo(beam=None, n_samples=100000, max_deflection=None, max_stress=None, percentiles=PERCENTILES,
+                seed=0, chunk_size=65536, workers=1, n_stations=201, band_samples=4096, progress=None):
+    n_samples = int(n_samples)
+    if n_samples < 1:
+        raise Exception('n_samples must be at least 1')
+    limits = {'deflection': max_deflection, 'von_mises': max_stress}
+    n_chunks = -(-n_samples // chunk_size)
+    steps = n_chunks + (1 if n_stations else 0)
+    progress = progress or (lambda done, total: None)
+    progress(0, steps)
+
+    # the first chunk sets the range of the histograms
+    runner = _ChunkRunner(beam, seed, chunk_size, n_samples, limits)
+    samples, rejected = runner.draw(0)
+    if not len(samples['F']):
+        raise Exception(error_msg_samples)
+    peaks = beam.peaks(samples)
+    runner.edges = _histogram_edges(peaks)
+    total = _chunk_statistics(peaks, limits, runner.edges)
+    progress(1, steps)
+
+    indexes = range(1, n_chunks)
+    if workers > 1 and n_chunks > 2:
+        with multiprocessing.Pool(min(workers, n_chunks - 1)) as pool:
+            for index, (statistics, count) in enumerate(pool.imap(runner, indexes), 2):
+                total = _merge(total, statistics)
+                rejected += count
+                progress(index, steps)
+    else:
+        for index in indexes:
+            statistics, count = runner(index)
+            total = _merge(total, statistics)
+            rejected += count
+            progress(index + 1, steps)
+
+    n = total['deflection']['count']
+    result = {'samples': n, 'rejected': rejected}
+    for name in QUANTITIES:
+        stats = total[name]
+        variance = max(stats['sum_squares'] / n - (stats['sum'] / n) ** 2, 0.0) * n / max(n - 1, 1)
+        result[name] = {
+            'mean': stats['sum'] / n,
+            'std': float(np.sqrt(variance)),
+            'min': stats['min'],
+            'max': stats['max'],
+            'percentiles': {q: _histogram_percentile(stats['histogram'], runner.edges[name], stats, q)
+                            for q in percentiles},
+            'exceedance': stats['exceed'] / n if 'exceed' in stats else None,
+        }
+    result['failure'] = total['failures'] / n if max_deflection is not None or max_stress is not None else None
+    result['bands'] = None
+    if n_stations:
+        x = np.union1d(np.linspace(0.0, beam.L, n_stations), np.clip([mean(beam.a)], 0.0, beam.L))
+        result['bands'] = _bands(beam, runner, n_chunks, x, percentiles, band_samples)
+        progress(steps, steps)
+    return result
+
+
+# monte_carlo of a beam in the JSON form of the command line (see main), for callers that only pass plain
+# data, like the background jobs of beam_app (see beam_jobs). kwargs go to monte_carlo.
+def monte_carlo_spec(spec=None, n_samples=100000, **kwargs):
+    modulus = spec['E'] if 'E' in spec else E[spec['material']]
+    beam = UncertainBeam(spec['F'], spec['a'], spec['L'], spec['support_type'], modulus, spec['xsection'])
+    return monte_carlo(beam, n_samples, spec.get('max_deflection'), spec.get('max_stress'), **kwargs)
+
+
+def _json_default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(value)
+
+
+# sample counts written as 1e7 as well as 10000000
+def _count(value):
+    return int(float(value))
+
+
+# Command line: a JSON file (or '-' for stdin) with the keys F, a, L, support_type, xsection (as for
+# UncertainBeam), either material (a key of E, fixed) or E (a distribution in Pa), and optionally
+# max_deflection and max_stress. Prints the result of monte_carlo as JSON, without the bands unless --bands.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Monte Carlo propagation of uncertain beam inputs.')
+    parser.add_argument('input', help="JSON file describing the uncertain beam, '-' for stdin")
+    parser.add_argument('-n', '--samples', type=_count, default=10 ** 6,
+                        help='number of samples, such as 1e7 (default 10^6)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-size', type=int, default=65536, help='samples per chunk (default 65536)')
+    parser.add_argument('-j', '--workers', type=int, help='worker processes (default: number of cores)')
+    parser.add_argument('-p', '--percentiles', type=float, nargs='+', default=list(PERCENTILES))
+    parser.add_argument('--bands', action='store_true', help='include the envelope bands of the curves')
+    args = parser.parse_args(argv)
+
+    if args.input == '-':
+        spec = json.load(sys.stdin)
+    else:
+        with open(args.input) as f:
+            spec = json.load(f)
+    result = monte_carlo_spec(spec, args.samples, percentiles=args.percentiles, seed=args.seed,
+                              chunk_size=args.chunk_size, workers=args.workers or os.cpu_count() or 1,
+                              n_stations=201 if args.bands else 0)
+    json.dump(result, sys.stdout, indent=2, default=_json_default)
+    sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
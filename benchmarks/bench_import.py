@@ -0,0 +1,63 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import time and resident memory of the two ways of loading the code: the NumPy only core that scripts and
+# workers use, and the Dash app. Every path runs in a fresh interpreter, the bare interpreter is the
+# baseline. Memory is the peak resident set size reported by getrusage, so this only runs on Unix.
+PATHS = {
+    'interpreter': 'pass',
+    'numpy': 'import numpy',
+    'beam_core': 'import beam_core',
+    'beam_bending (no app)': 'import beam_bending; beam_bending.beam_deflection(1.0, 1.0, "steel", '
+                             '{"type": "circle", "r": 0.1}, 1.0, 2.0, "cantilever")',
+    'beam_bending.app': 'import beam_bending; beam_bending.app',
+}
+
+CHILD = """
+import resource, time
+start = time.perf_counter()
+exec({code!r})
+seconds = time.perf_counter() - start
+maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(seconds, maxrss * (1 if __import__('sys').platform == 'darwin' else 1024))
+"""
+
+
+def measure(code, repeat=5):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    seconds, rss = [], []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', CHILD.format(code=code)], cwd=ROOT, env=env,
+                                check=True, capture_output=True, text=True).stdout.split()
+        seconds.append(float(output[0]))
+        rss.append(int(output[1]))
+    return {'seconds': statistics.median(seconds), 'rss_mb': statistics.median(rss) / 2 ** 20}
+
+
+def run(repeat=5):
+    return {name: measure(code, repeat) for name, code in PATHS.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Import time and memory of the core and the Dash app.')
+    parser.add_argument('--repeat', type=int, default=5, help='fresh interpreters per path (median is reported)')
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print('{:<24} {:>12} {:>10}'.format('path', 'import (ms)', 'RSS (MB)'))
+    for name, result in results.items():
+        print('{:<24} {:>12.1f} {:>10.1f}'.format(name, result['seconds'] * 1e3, result['rss_mb']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+import argparse
+import json
+import tempfile
+
+import numpy as np
+
+import common
+import reference
+from beam_core import (E, _deflection_EI, beam_bending_stress, beam_bending_stress_array, beam_deflection,
+                       beam_deflection_array, beam_shear_stress, beam_shear_stress_array, evaluate_beam,
+                       von_mises_stress, von_mises_stress_array)
+from beam_design import design_sections
+from beam_fem import BeamModel, preset_supports
+from beam_influence import InfluenceSurface, unit_response
+from beam_loads import DistributedLoad, PointLoad
+from beam_materials import evaluate_materials
+from beam_modal import load_history, modal_model
+from beam_store import DesignStore, build_store
+from beam_uncertainty import UncertainBeam, monte_carlo
+
+# The scalar functions of beam_core called once per station, as the app used to, against their array
+# versions over the same stations. Times are per station, in microseconds.
+
+F, MATERIAL, XSECTION, SUPPORT_TYPE = -50000.0, 'steel', {'type': 'rectangular', 'b': 0.1, 'h': 0.2}, 'simply_supported'
+L, A = 10.0, 3.7
+
+KERNELS = {
+    'deflection': (lambda x: beam_deflection(F, x, MATERIAL, XSECTION, A, L, SUPPORT_TYPE),
+                   lambda x: beam_deflection_array(F, x, MATERIAL, XSECTION, A, L, SUPPORT_TYPE)),
+    'shear_stress': (lambda x: beam_shear_stress(F, x, XSECTION, A, L, SUPPORT_TYPE),
+                     lambda x: beam_shear_stress_array(F, x, XSECTION, A, L, SUPPORT_TYPE)),
+    'bending_stress': (lambda x: beam_bending_stress(F, x, XSECTION, A, L, SUPPORT_TYPE),
+                       lambda x: beam_bending_stress_array(F, x, XSECTION, A, L, SUPPORT_TYPE)),
+    'von_mises': (lambda x: von_mises_stress(F, x, XSECTION, A, L, SUPPORT_TYPE),
+                  lambda x: von_mises_stress_array(F, x, XSECTION, A, L, SUPPORT_TYPE)),
+}
+
+
+def run(n_stations=1000, n_beams=1000, repeat=5):
+    x = np.linspace(0.0, L, n_stations)
+    stations = x.tolist()
+    results = {}
+    for name, (scalar, array) in KERNELS.items():
+        scalar_time = common.timed(lambda: [scalar(s) for s in stations], repeat) / n_stations
+        array_time = common.timed(lambda: array(x), repeat) / n_stations
+        results['kernels.{}.scalar'.format(name)] = common.metric(scalar_time * 1e6, 'us/station')
+        results['kernels.{}.array'.format(name)] = common.metric(array_time * 1e6, 'us/station')
+        results['kernels.{}.speedup'.format(name)] = common.metric(scalar_time / array_time, 'x', 'higher')
+
+    # every quantity at once, and the original plain Python closed forms for comparison
+    fused = common.timed(lambda: evaluate_beam(F, x, MATERIAL, XSECTION, A, L, SUPPORT_TYPE), repeat)
+    results['kernels.evaluate_beam'] = common.metric(fused / n_stations * 1e6, 'us/station')
+    original = common.timed(lambda: reference.evaluate(F, stations, MATERIAL, XSECTION, A, L, SUPPORT_TYPE),
+                            repeat)
+    results['kernels.reference'] = common.metric(original / n_stations * 1e6, 'us/station', None)
+
+    # many beams in one broadcast, as in beam_batch and beam_api
+    rng = np.random.default_rng(0)
+    spans = rng.uniform(1.0, 1000.0, (n_beams, 1))
+    loads = rng.uniform(0.0, 1.0, (n_beams, 1)) * spans
+    X = spans * np.linspace(0.0, 1.0, 100)
+    many = common.timed(lambda: _deflection_EI(F, X, loads, spans, SUPPORT_TYPE), repeat)
+    results['kernels.broadcast_beams'] = common.metric(many / X.size * 1e9, 'ns/value')
+
+    # every material at every station in one (materials x stations) broadcast, per material and station
+    materials = common.timed(lambda: evaluate_materials(F, A, L, SUPPORT_TYPE, XSECTION, x=x), repeat)
+    results['kernels.evaluate_materials'] = common.metric(materials / (len(E) * n_stations) * 1e6, 'us/value')
+
+    # the lightest section of every material, both section types
+    design = common.timed(lambda: design_sections(F, A, L, SUPPORT_TYPE, max_deflection=L / 360), repeat)
+    results['kernels.design_sections'] = common.metric(design * 1e3, 'ms')
+
+    # Monte Carlo peaks of an uncertain beam, per sample
+    beam = UncertainBeam({'dist': 'normal', 'mean': F, 'cov': 0.1}, {'dist': 'normal', 'mean': A, 'std': 0.1}, L,
+                         SUPPORT_TYPE, {'dist': 'lognormal', 'mean': 200e9, 'cov': 0.05},
+                         {'type': 'rectangular', 'b': {'dist': 'lognormal', 'mean': 0.1, 'cov': 0.02}, 'h': 0.2})
+    n_samples = 100 * n_beams
+    samples = common.timed(lambda: monte_carlo(beam, n_samples, n_stations=0), max(1, repeat // 5))
+    results['kernels.monte_carlo'] = common.metric(samples / n_samples * 1e9, 'ns/sample')
+
+    # transient response to a load crossing the beam by modal superposition: 10000 time steps x 1000 stations
+    model = modal_model(SUPPORT_TYPE, L, XSECTION, MATERIAL)
+    t, load, positions = load_history('moving', F, A, L, 1.0, 10000, 20.0)
+    stations = np.linspace(0.0, L, 1000)
+    transient = common.timed(lambda: model.transient(load, t[1], positions, stations, 0.02), repeat)
+    results['kernels.transient_10k_1k'] = common.metric(transient * 1e3, 'ms')
+
+    # a fixed-fixed finite element model of 100000 elements: solve and evaluate at every node
+    nodes = np.linspace(0.0, L, 100001)
+    model = BeamModel(L, preset_supports('fixed_fixed', L), np.full(len(nodes) - 1, 1e7), nodes=nodes)
+    loads = (PointLoad(F, A), DistributedLoad(1000.0, 0.0, 2000.0, L))
+    fem = common.timed(lambda: model.solve(loads).evaluate(nodes), repeat)
+    results['kernels.fem_100k'] = common.metric(fem * 1e3, 'ms')
+
+    # first lookup on the influence surface of a beam: built in the process against opened from a design store
+    live = common.timed(lambda: InfluenceSurface(unit_response(SUPPORT_TYPE, L), L).lookup(A, F), repeat)
+    results['kernels.surface_build'] = common.metric(live * 1e3, 'ms')
+    with tempfile.TemporaryDirectory() as path:
+        build_store(path, (SUPPORT_TYPE,), (L,))
+        stored = common.timed(lambda: DesignStore(path).surface(SUPPORT_TYPE, L).lookup(A, F), repeat)
+    results['kernels.surface_store'] = common.metric(stored * 1e3, 'ms')
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Scalar against array kernels.')
+    parser.add_argument('--stations', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.stations, repeat=args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+import common
+from beam_app import default_inputs
+
+# Load test of the app over HTTP. Concurrent clients move the force location of the default beam, which is
+# the update_graph callback behind every release of the slider, and the script reports the requests per second,
+# the latency percentiles in milliseconds and the failed requests:
+#   python benchmarks/bench_load.py --url http://127.0.0.1:8050   an app already running
+#   python benchmarks/bench_load.py --processes 4                 starts python beam_bending.py --processes 4,
+#                                                                 with the caches shared through BEAM_CACHE in a
+#                                                                 temporary directory unless --no-shared-cache
+# The clients cycle through --positions force locations, so every request after the first round is answered
+# from the cache of the worker, or from the shared cache.
+
+INPUTS = (('support-type', 'value'), ('beam-length', 'value'), ('xsection', 'value'), ('force-location', 'value'),
+          ('b', 'value'), ('h', 'value'), ('r', 'value'), ('t', 'value'), ('tw', 'value'), ('tf', 'value'),
+          ('extra-loads', 'data'), ('slider-mode', 'value'))
+
+
+# the body of the update_graph request of the browser for the default beam with the force at a
+def _payload(defaults, a):
+    values = dict(defaults, **{'force-location': a})
+    return json.dumps({
+        'output': 'beam-data.data',
+        'outputs': {'id': 'beam-data', 'property': 'data'},
+        'inputs': [{'id': name, 'property': prop, 'value': values[name]} for name, prop in INPUTS],
+        'changedPropIds': ['force-location.value'],
+        'state': [],
+    }).encode('utf-8')
+
+
+def _request(url, body=None, timeout=60.0):
+    request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        response.read()
+        return response.status
+
+
+# Sends n_requests from concurrency threads. Returns the latency of every request in seconds, the wall time
+# and the number of failed requests.
+def load(url, n_requests=1000, concurrency=8, positions=50):
+    defaults = default_inputs()
+    L = float(defaults['beam-length'])
+    bodies = [_payload(defaults, L * k / max(positions - 1, 1)) for k in range(positions)]
+    endpoint = url.rstrip('/') + '/_dash-update-component'
+    latencies = []
+    failures = [0]
+    counter = iter(range(n_requests))
+    lock = threading.Lock()
+
+    def client():
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            start = time.perf_counter()
+            try:
+                ok = _request(endpoint, bodies[index % positions]) == 200
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                failures[0] += not ok
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return np.array(latencies), time.perf_counter() - start, failures[0]
+
+
+def run(url, n_requests=1000, concurrency=8, positions=50):
+    latencies, wall, failures = load(url, n_requests, concurrency, positions)
+    return {
+        'load.rps': common.metric(len(latencies) / wall, 'requests/s', 'higher'),
+        'load.latency.p50': common.metric(np.percentile(latencies, 50) * 1e3, 'ms'),
+        'load.latency.p99': common.metric(np.percentile(latencies, 99) * 1e3, 'ms'),
+        'load.failures': common.metric(failures, 'requests'),
+    }
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+# python beam_bending.py --processes n on a free port, once it answers
+def _start_server(processes, cache):
+    port = _free_port()
+    env = dict(os.environ)
+    if cache:
+        env['BEAM_CACHE'] = cache
+    server = subprocess.Popen([sys.executable, os.path.join(common.ROOT, 'beam_bending.py'), '--processes',
+                               str(processes), '--port', str(port)], cwd=common.ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = 'http://127.0.0.1:{}'.format(port)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise Exception('the server exited with status {}'.format(server.returncode))
+        try:
+            _request(url + '/_dash-layout', timeout=1.0)
+            return server, url
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise Exception('the server did not start')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Requests per second and latency of the app under load.')
+    parser.add_argument('--url', help='app to load, by default one started with --processes')
+    parser.add_argument('--processes', type=int, default=4, help='worker processes of the started app')
+    parser.add_argument('--no-shared-cache', action='store_true', help='start the app without BEAM_CACHE')
+    parser.add_argument('-n', '--requests', type=int, default=1000)
+    parser.add_argument('-c', '--concurrency', type=int, default=8)
+    parser.add_argument('--positions', type=int, default=50, help='distinct force locations requested')
+    args = parser.parse_args(argv)
+
+    if args.url:
+        results = run(args.url, args.requests, args.concurrency, args.positions)
+    else:
+        with tempfile.TemporaryDirectory() as cache:
+            server, url = _start_server(args.processes, None if args.no_shared_cache else cache)
+            try:
+                results = run(url, args.requests, args.concurrency, args.positions)
+            finally:
+                server.terminate()
+                server.wait()
+    print(json.dumps(results, indent=2))
+    return 0 if results['load.failures']['value'] == 0 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
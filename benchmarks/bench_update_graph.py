@@ -0,0 +1,93 @@
+import argparse
+import json
+
+import plotly.io.json
+
+import common
+import beam_app
+from beam_app import (FIGURE_TEMPLATES, figure_geometry, fill_figures, normalize_inputs, unit_curves,
+                      update_graph)
+from beam_core import E
+from beam_transport import encode_arrays, payload_size
+
+# The update_graph callback end to end for beams of 1 m to 1000 m, split into its phases:
+#   compute:   the unit load curves (unit_curves, caches cleared)
+#   figures:   filling the figure templates with the scaled curves, the work the browser does for every update
+#              (fill_figures is the Python mirror of assets/beam_bending.js)
+#   serialize: the callback output to JSON, with the encoder Dash uses
+#   callback:  update_graph with cold caches, warm caches, and a force location move read from the warm
+#              influence surface (slider mode 'influence')
+# and the size of the callback response, against the complete figures the server used to send.
+# Times are in milliseconds, sizes in bytes.
+
+LENGTHS = (1.0, 10.0, 100.0, 1000.0)
+INPUTS = {'st': 'simply_supported', 'xs': 'rectangular', 'b': 0.1, 'h': 0.2, 'r': 0.1}
+F, MATERIAL = -50000.0, 'steel'
+
+
+def _clear_caches():
+    for cache in (beam_app.response_cache, beam_app.figure_cache, beam_app.surface_cache):
+        cache.clear()
+
+
+def _to_json(obj):
+    return plotly.io.json.to_json_plotly(obj)
+
+
+def run(lengths=LENGTHS, repeat=5):
+    results = {}
+    for L in lengths:
+        fl = 0.37 * L
+        args = (INPUTS['st'], L, INPUTS['xs'], fl, INPUTS['b'], INPUTS['h'], INPUTS['r'])
+        _, st, L, xsection, a, _, loads, _ = normalize_inputs(MATERIAL, *args[:4], F, *args[4:])
+        prefix = 'update_graph.L={:g}.'.format(L)
+
+        def cold():
+            _clear_caches()
+            return unit_curves(st, L, xsection, a)
+
+        curves = encode_arrays(cold(), beam_app.ARRAY_ENCODING)
+        geometry = figure_geometry(L, xsection)
+        output = {'geometry': geometry, 'curves': curves}
+        figures = fill_figures(FIGURE_TEMPLATES, geometry, curves, E[MATERIAL], F)
+
+        results[prefix + 'compute'] = common.metric(common.timed(cold, repeat) * 1e3, 'ms')
+        results[prefix + 'figures'] = common.metric(
+            common.timed(lambda: fill_figures(FIGURE_TEMPLATES, geometry, curves, E[MATERIAL], F), repeat) * 1e3,
+            'ms')
+        results[prefix + 'serialize'] = common.metric(common.timed(lambda: _to_json(output), repeat) * 1e3, 'ms')
+
+        def callback():
+            _clear_caches()
+            return _to_json(update_graph(*args))
+
+        results[prefix + 'callback.cold'] = common.metric(common.timed(callback, repeat) * 1e3, 'ms')
+        results[prefix + 'callback.cached'] = common.metric(
+            common.timed(lambda: _to_json(update_graph(*args)), repeat) * 1e3, 'ms')
+
+        update_graph(*args, mode=['influence'])
+        positions = iter(L * ((k * 0.6180339887) % 1.0) for k in range(1, 10 ** 7))
+
+        def slider():
+            beam_app.figure_cache.clear()
+            return _to_json(update_graph(args[0], L, args[2], next(positions), *args[4:], mode=['influence']))
+
+        results[prefix + 'callback.slider'] = common.metric(common.timed(slider, repeat) * 1e3, 'ms')
+
+        size = payload_size(json.loads(_to_json(output)))
+        results[prefix + 'payload.json'] = common.metric(size['json'], 'bytes')
+        results[prefix + 'payload.gzip'] = common.metric(size['gzip'], 'bytes')
+        results[prefix + 'payload.figures'] = common.metric(len(_to_json(figures)), 'bytes', None)
+    _clear_caches()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='update_graph end to end for several beam lengths.')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(repeat=args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,608 @@
+import argparse
+import functools
+import itertools
+import json
+
+import numpy as np
+
+import common
+import reference
+from beam_batch import beam_peaks, evaluate_chunk
+from beam_core import (ALLOWABLE_STRESS, E, as_section, beam_bending_stress_array, beam_deflection,
+                       beam_deflection_array, beam_shear_stress_array, beam_response_model, von_mises_stress,
+                       von_mises_stress_array)
+from beam_loads import LoadCase, PointLoad
+from beam_transport import decode_arrays, encode_arrays
+
+# Every optimized path against the original closed forms of reference.py, over both support types, loads at
+# the supports and inside the span, beams of 1 m to 1000 m and both original sections. The error of a curve is
+# its largest deviation relative to the largest value of the curve (see common.curve_error). The exact peaks
+# must also match the reference at the reported station and be at least as large as a dense sampling of it.
+
+TOLERANCE = 1e-9
+F, MATERIAL = -50000.0, 'steel'
+SUPPORT_TYPES = ('cantilever', 'simply_supported')
+LENGTHS = (1.0, 10.0, 100.0, 1000.0)
+POSITIONS = (0.0, 0.37, 0.5, 1.0)
+XSECTIONS = ({'type': 'rectangular', 'b': 0.1, 'h': 0.2}, {'type': 'circle', 'r': 0.1})
+STRESSES = ('shear_stress', 'bending_stress', 'von_mises')
+
+
+def cases():
+    for support_type, L, position, xsection in itertools.product(SUPPORT_TYPES, LENGTHS, POSITIONS, XSECTIONS):
+        a = position * L
+        x = np.union1d(np.linspace(0.0, L, 201), [a])
+        yield support_type, L, a, xsection, x
+
+
+# The one intended change from the original closed forms, which reference.py keeps as first written: the
+# shear force and moment of a cantilever are those of a load at a, F and -F * (a - x) between the support and
+# the load and nothing past it, where the original forms give those of a tip load (F and -F * (L - x)) for any
+# a. Up to the load they are the original forms of a cantilever of length a.
+def _statics(F, x, a, L, support_type):
+    if support_type == 'cantilever':
+        x = max(0.0, min(x, L))
+        if x > a:
+            return 0.0, 0.0
+        L = a
+    return reference.shear_force(F, x, a, L, support_type), reference.bending_moment(F, x, a, L, support_type)
+
+
+# (shear, bending, von Mises) stress at x, with the statics above
+def _stresses(F, x, xsection, a, L, support_type):
+    shear_force, bending_moment = _statics(F, x, a, L, support_type)
+    shear_stress = shear_force / reference.calc_A(xsection)
+    bending_stress = bending_moment * reference.calc_c(xsection) / reference.calc_I(xsection)
+    return shear_stress, bending_stress, (bending_stress ** 2 + 3 * shear_stress ** 2) ** 0.5
+
+
+# reference.evaluate with the statics above
+def _evaluate(F, x, material, xsection, a, L, support_type):
+    expected = reference.evaluate(F, x, material, xsection, a, L, support_type)
+    if support_type == 'cantilever':
+        statics = [_statics(F, s, a, L, support_type) for s in x]
+        stresses = [_stresses(F, s, xsection, a, L, support_type) for s in x]
+        for k, name in enumerate(('shear_force', 'bending_moment')):
+            expected[name] = [values[k] for values in statics]
+        for k, name in enumerate(STRESSES):
+            expected[name] = [values[k] for values in stresses]
+    return expected
+
+
+def _reference(x, xsection, a, L, support_type):
+    return _evaluate(F, x.tolist(), MATERIAL, xsection, a, L, support_type)
+
+
+# largest curve error of names. Stresses are relative to the peak von Mises stress of the beam, which bounds
+# all of them, so a stress that is zero along the whole beam is still compared at a sensible scale.
+def _errors(actual, expected, names):
+    peak = np.max(np.abs(expected['von_mises'])) if 'von_mises' in expected else None
+    return max(common.curve_error(actual[name], expected[name], peak if name in STRESSES else None)
+               for name in names)
+
+
+def check_array_kernels():
+    error = 0.0
+    for support_type, L, a, xsection, x in cases():
+        args = (F, x, xsection, a, L, support_type)
+        actual = {
+            'deflection': beam_deflection_array(F, x, MATERIAL, xsection, a, L, support_type),
+            'shear_stress': beam_shear_stress_array(*args),
+            'bending_stress': beam_bending_stress_array(*args),
+            'von_mises': von_mises_stress_array(*args),
+        }
+        error = max(error, _errors(actual, _reference(x, xsection, a, L, support_type), actual))
+    return error
+
+
+def check_scalar_functions():
+    error = 0.0
+    for support_type, L, a, xsection, x in cases():
+        x = x[::10]
+        actual = {
+            'deflection': [beam_deflection(F, s, MATERIAL, xsection, a, L, support_type) for s in x],
+            'von_mises': [von_mises_stress(F, s, xsection, a, L, support_type) for s in x],
+        }
+        error = max(error, _errors(actual, _reference(x, xsection, a, L, support_type), actual))
+    return error
+
+
+# A peak (x, value) is exact when one of the expected values at x matches it and the reference has no larger
+# value anywhere. expected: func(x) -> list of the values the peak may take at x.
+def _peak_error(peak, expected, sampled):
+    x, value = peak
+    expected = min(expected(x), key=lambda e: abs(value - e))
+    return max(abs(value - expected), max(np.max(np.abs(sampled)) - abs(value), 0.0)) / (abs(expected) or 1.0)
+
+
+# shear and von Mises stress just past the load, where the shear force has jumped. The closed forms clip x to
+# the beam, so for a load on the right end the jump there never shows: the reaction (shear force -F) of a
+# simply supported beam, and nothing past the free end of a cantilever. The optimized paths report it, so it
+# is derived from the same forms.
+def _past_load(xsection, a, L, support_type):
+    if support_type == 'simply_supported':
+        shear_stress = (-F * a) / L / reference.calc_A(xsection)
+    else:
+        shear_stress = 0.0
+    bending_stress = _stresses(F, a, xsection, a, L, support_type)[1]
+    return shear_stress, (bending_stress ** 2 + 3 * shear_stress ** 2) ** 0.5
+
+
+# von Mises stress at x, just past x and, under the load, just past the load
+def _von_mises_values(xsection, a, L, support_type):
+    def values(x):
+        result = [_stresses(F, s, xsection, a, L, support_type)[2] for s in (x, np.nextafter(x, np.inf))]
+        if x == a:
+            result.append(_past_load(xsection, a, L, support_type)[1])
+        return result
+
+    return values
+
+
+# The reference at the stations of a curve for the graphs. The station just past the load is clipped to the
+# beam for a load on the right support, where it holds the reaction of a simply supported beam.
+def _reference_curve(x, xsection, a, L, support_type):
+    expected = _reference(x, xsection, a, L, support_type)
+    repeats = np.flatnonzero(x == a)
+    if a == L and len(repeats) > 1:
+        expected['shear_stress'][repeats[-1]], expected['von_mises'][repeats[-1]] = _past_load(xsection, a, L,
+                                                                                                support_type)
+    return expected
+
+
+# the reference on 4001 stations plus the load point
+@functools.lru_cache(maxsize=None)
+def _dense_reference(xsection, a, L, support_type):
+    return _reference(np.union1d(np.linspace(0.0, L, 4001), [a]), dict(xsection), a, L, support_type)
+
+
+def _peak_errors(peaks, xsection, a, L, support_type):
+    sampled = _dense_reference(tuple(xsection.items()), a, L, support_type)
+    deflection, von_mises = peaks
+    return max(
+        _peak_error(deflection, lambda s: [reference.deflection(F, s, MATERIAL, xsection, a, L, support_type)],
+                    sampled['deflection']),
+        _peak_error(von_mises, _von_mises_values(xsection, a, L, support_type), sampled['von_mises']))
+
+
+def check_response_model():
+    error = 0.0
+    for support_type, L, a, xsection, x in cases():
+        model = beam_response_model(F, MATERIAL, xsection, a, L, support_type)
+        expected = _reference(x, xsection, a, L, support_type)
+        error = max(error, _errors(model.evaluate(x), expected, ('deflection', 'shear_force', 'bending_moment')
+                                   + STRESSES))
+
+        error = max(error, _peak_errors((model.max_deflection(), model.max_von_mises()), xsection, a, L,
+                                        support_type))
+    return error
+
+
+# beam_loads.LoadCase with the point load alone
+def check_load_case():
+    error = 0.0
+    for support_type, L, a, xsection, x in cases():
+        V, M, EIy = LoadCase((PointLoad(F, a),), L, support_type).superpose(x)
+        EI = E[MATERIAL] * reference.calc_I(xsection)
+        actual = {'deflection': EIy / EI, 'shear_force': V, 'bending_moment': M}
+        error = max(error, _errors(actual, _reference(x, xsection, a, L, support_type), actual))
+    return error
+
+
+def check_batch_peaks():
+    error = 0.0
+    for support_type, L, a, xsection, _ in cases():
+        section = as_section(xsection)
+        peaks = beam_peaks([F], [a], [L], [E[MATERIAL] * section.I], [section.A], [section.S], support_type)
+        error = max(error, _peak_errors(((peaks[0][0], peaks[1][0]), (peaks[2][0], peaks[3][0])), xsection, a, L,
+                                        support_type))
+    return error
+
+
+def check_api():
+    from beam_api import evaluate_cases
+    cases_ = [{'F': F, 'a': a, 'L': L, 'material': MATERIAL, 'support_type': support_type, 'xsection': xsection}
+              for support_type, L, a, xsection, _ in cases()]
+    results = evaluate_cases(cases_, n_stations=201)
+    error = 0.0
+    for i, case in enumerate(cases_):
+        x = results['x'][i]
+        expected = _reference(x, case['xsection'], case['a'], case['L'], case['support_type'])
+        error = max(error, _errors({name: results[name][i] for name in expected}, expected, expected))
+    # the same cases with a second point load at the mirrored position, which add up to the two references
+    for case in cases_:
+        case['loads'] = [{'type': 'point', 'F': F, 'a': case['L'] - case['a']}]
+    results = evaluate_cases(cases_, n_stations=201)
+    for i, case in enumerate(cases_):
+        x = results['x'][i]
+        first = _reference(x, case['xsection'], case['a'], case['L'], case['support_type'])
+        second = _reference(x, case['xsection'], case['L'] - case['a'], case['L'], case['support_type'])
+        names = ('deflection', 'shear_force', 'bending_moment')
+        expected = {name: np.add(first[name], second[name]) for name in names}
+        error = max(error, _errors({name: results[name][i] for name in names}, expected, names))
+    # an additional load off the beam is rejected with the index of its case
+    cases_[1]['loads'] = [{'type': 'point', 'F': F, 'a': 2 * cases_[1]['L']}]
+    try:
+        evaluate_cases(cases_, n_stations=201)
+        error = float('inf')
+    except Exception as e:
+        if not str(e).startswith('Invalid case 1: '):
+            error = float('inf')
+    return error
+
+
+# the curves the browser scales (beam_app.unit_curves, sent as f8 typed arrays), from the closed forms and
+# from the influence surface
+def check_unit_curves():
+    import beam_app
+    error = 0.0
+    for use_surface in (False, True):
+        for support_type, L, a, xsection, _ in cases():
+            section = as_section(xsection)
+            curves = encode_arrays(beam_app.unit_curves(support_type, L, section, a, use_surface=use_surface), 'f8')
+            scaled, peaks = beam_app.scale_curves(decode_arrays(curves), E[MATERIAL], F)
+            expected = _reference_curve(scaled['x'], xsection, a, L, support_type)
+            error = max(error, _errors(scaled, expected, ('deflection',) + STRESSES))
+            x, value = peaks['deflection']
+            error = max(error, abs(value - reference.deflection(F, x, MATERIAL, xsection, a, L, support_type)) /
+                        (np.max(np.abs(expected['deflection'])) or 1.0))
+    for cache in (beam_app.response_cache, beam_app.figure_cache, beam_app.surface_cache):
+        cache.clear()
+    return error
+
+
+# The sections of beam_design meet their governing limit to within the rtol of the search (1e-12 here),
+# checked with the exact peaks of beam_response. The error is how far the governing ratio is from 1.
+def check_design():
+    from beam_design import size_sections
+    error = 0.0
+    for support_type, L, a, _, _ in cases():
+        for max_deflection in (L / 360, None):
+            for design in size_sections(F, a, L, support_type, max_deflection=max_deflection, rtol=1e-12):
+                model = beam_response_model(F, design['material'], design['xsection'], a, L, support_type)
+                deflection = abs(model.max_deflection()[1]) / (max_deflection or np.inf)
+                stress = model.max_von_mises()[1] / ALLOWABLE_STRESS[design['material']]
+                error = max(error, abs(max(deflection, stress) - 1))
+    return error
+
+
+# beam_uncertainty with fixed inputs: every percentile, the mean and the extremes of the peaks are the exact
+# peaks of beam_response, and the bands collapse onto the closed forms
+def check_uncertainty():
+    from beam_uncertainty import UncertainBeam, monte_carlo
+    error = 0.0
+    for support_type, L, a, xsection, x in cases():
+        model = beam_response_model(F, MATERIAL, xsection, a, L, support_type)
+        beam = UncertainBeam(F, a, L, support_type, E[MATERIAL], xsection)
+        result = monte_carlo(beam, 1000, chunk_size=300, n_stations=0)
+        for name, (_, expected) in (('deflection', model.max_deflection()), ('von_mises', model.max_von_mises())):
+            stats = result[name]
+            values = [stats['mean'], stats['min'], stats['max']] + list(stats['percentiles'].values())
+            error = max(error, max(abs(value - abs(expected)) for value in values) / (abs(expected) or 1.0))
+        bands = monte_carlo(beam, 10, n_stations=201)['bands']
+        expected = _reference(bands['x'], xsection, a, L, support_type)
+        names = ('deflection',) + STRESSES
+        for k in range(len(bands['percentiles'])):
+            error = max(error, _errors({name: bands[name][k] for name in names}, expected, names))
+    return error
+
+
+# beam_fem against the closed forms on the cases above (deflection everywhere, shear force and moment where the
+# closed forms follow the statics, as for check_load_case), against the textbook reactions of a point load on
+# the indeterminate beams, and a model of 100000 elements against the same beam as a single element.
+def check_fem():
+    from beam_fem import BeamModel, preset_supports
+    from beam_loads import DistributedLoad, MomentLoad
+    error = 0.0
+    for support_type, L, a, xsection, x in cases():
+        actual = BeamModel.from_support_type(support_type, L, MATERIAL, xsection).solve([PointLoad(F, a)]).evaluate(x)
+        names = ('deflection', 'shear_force', 'bending_moment') + STRESSES
+        error = max(error, _errors(actual, _reference(x, xsection, a, L, support_type), names))
+
+    for L, position in itertools.product(LENGTHS, POSITIONS):
+        a, b = position * L, (1 - position) * L
+        # upward force and counterclockwise moment at x = 0, upward force at x = L
+        expected = {
+            'fixed_fixed': (F * b * b * (3 * a + b) / L ** 3, F * a * b * b / L ** 2, F * a * a * (a + 3 * b) / L ** 3),
+            'propped_cantilever': (F * b * (3 * L * L - b * b) / (2 * L ** 3), F * a * b * (L + b) / (2 * L * L),
+                                   F * a * a * (3 * L - a) / (2 * L ** 3)),
+        }
+        for support_type, (R0, M0, RL) in expected.items():
+            reactions = BeamModel(L, preset_supports(support_type, L), 1.0).solve([PointLoad(F, a)]).reactions()
+            actual = (reactions[0]['force'], reactions[0]['moment'], reactions[1]['force'])
+            error = max(error, max(abs(value - e) for value, e in zip(actual, (R0, M0, RL))) / abs(F))
+
+    L, n = 10.0, 100000
+    loads = (PointLoad(F, 3.7), MomentLoad(-F, 6.1), DistributedLoad(-F / L, 2.0, 0.0, 8.0))
+    for support_type in SUPPORT_TYPES + ('fixed_fixed', 'propped_cantilever'):
+        supports = preset_supports(support_type, L)
+        nodes = np.linspace(0.0, L, n + 1)
+        expected = BeamModel(L, supports, 1.0).solve(loads).evaluate(nodes)
+        actual = BeamModel(L, supports, np.ones(n), nodes=nodes).solve(loads).evaluate(nodes)
+        error = max(error, _errors(actual, expected, ('deflection', 'slope', 'shear_force', 'bending_moment')))
+    return error
+
+
+# beam_store: a store of the lengths above, read back memory-mapped, against the reference at its stations, and
+# its peaks against the exact peaks of beam_batch. A store of an older version is rebuilt.
+def check_store():
+    import os
+    import tempfile
+    from beam_store import build_store
+    error = 0.0
+    with tempfile.TemporaryDirectory() as path:
+        store = build_store(path, SUPPORT_TYPES, LENGTHS)
+        for support_type, L, a, xsection, _ in cases():
+            actual = store.response(F, a, L, support_type, xsection, MATERIAL)
+            expected = _reference(actual['x'], xsection, a, L, support_type)
+            error = max(error, _errors(actual, expected, ('deflection', 'shear_force', 'bending_moment') + STRESSES))
+            # the exact peaks of beam_batch bound the peaks at the stations of the store from above
+            row = {'F': F, 'a': a, 'L': L, 'material': MATERIAL, 'support_type': support_type, 'xsection': xsection}
+            result = evaluate_chunk([(1, row)])[0]
+            for peak, values in (('max_deflection', np.abs(actual['deflection'])),
+                                 ('max_von_mises', actual['von_mises'])):
+                scale = abs(result[peak]) or 1.0
+                error = max(error, (np.max(values) - abs(result[peak])) / scale)
+        # a store of an older version is rebuilt, not refused
+        with open(os.path.join(path, 'index.json')) as f:
+            index = json.load(f)
+        index['version'] -= 1
+        with open(os.path.join(path, 'index.json'), 'w') as f:
+            json.dump(index, f)
+        if build_store(path, SUPPORT_TYPES[:1], LENGTHS[:1]).beams() != [(SUPPORT_TYPES[0], float(LENGTHS[0]))]:
+            error = float('inf')
+    return error
+
+
+# beam_field over the section: the extreme fiber carries the bending stress of the reference and the peak
+# shear stress is 3/2 (rectangle) or 4/3 (circle) of its average shear stress
+def check_stress_field():
+    from beam_field import stress_field
+    error = 0.0
+    for support_type, L, a, xsection, x in cases():
+        expected = _reference(x, xsection, a, L, support_type)
+        response = beam_response_model(F, MATERIAL, xsection, a, L, support_type).evaluate(x)
+        field = stress_field(response['shear_force'], response['bending_moment'], xsection)
+        peak = {'rectangular': 1.5, 'circle': 4.0 / 3.0}[xsection['type']]
+        actual = {'bending_stress': np.nanmax(np.abs(field['normal']), axis=(1, 2)),
+                  'shear_stress': np.nanmax(np.abs(field['shear']), axis=(1, 2)) / peak}
+        expected = dict(expected, bending_stress=np.abs(expected['bending_stress']),
+                        shear_stress=np.abs(expected['shear_stress']))
+        error = max(error, _errors(actual, expected, actual))
+    return error
+
+
+# beam_materials: the deflection of every material in one broadcast against the reference of that material,
+# the stresses and weights of the table, and a custom material read back from a CSV file
+def check_materials():
+    import os
+    import tempfile
+    from beam_materials import evaluate_materials, load_materials
+    error = 0.0
+    custom = {'name': 'custom', 'E': 71.7e9, 'density': 2810.0, 'allowable_stress': 503e6}
+    with tempfile.TemporaryDirectory() as path:
+        file = os.path.join(path, 'materials.csv')
+        with open(file, 'w') as f:
+            f.write('name,E,density,allowable_stress\n{name},{E!r},{density!r},{allowable_stress!r}\n'.format(
+                **custom))
+        table = load_materials(file)
+    if [material._asdict() for material in table] != [custom]:
+        return float('inf')
+    materials = list(E)
+    for support_type, L, a, xsection, x in cases():
+        comparison = evaluate_materials(F, a, L, support_type, xsection, materials + table, x)
+        for k, material in enumerate(materials):
+            expected = _evaluate(F, x.tolist(), material, xsection, a, L, support_type)
+            actual = {'deflection': comparison['deflection'][k], 'von_mises': comparison['von_mises']}
+            error = max(error, _errors(actual, expected, ('deflection', 'von_mises')))
+        expected = _reference(x, xsection, a, L, support_type)
+        scale = E[MATERIAL] / custom['E']
+        error = max(error, _errors({'deflection': comparison['deflection'][-1] / scale}, expected, ('deflection',)))
+        weight = comparison['weight'][-1] / (as_section(xsection).A * L * custom['density'])
+        error = max(error, abs(weight - 1))
+    return error
+
+
+# beam_jobs: the fixed input analysis of check_uncertainty as a background job gives the exact peaks,
+# submitting it again returns the finished job instead of running another one, and concurrent submissions of a
+# new job, or of a cancelled one, start it once
+def check_jobs():
+    import tempfile
+    import threading
+    import time
+    from beam_jobs import DONE, QUEUED, RUNNING, JobManager
+    from beam_uncertainty import monte_carlo_spec
+    error = 0.0
+    with tempfile.TemporaryDirectory() as path:
+        jobs = JobManager(path, workers=2)
+        submitted = {}
+        for support_type, L, a, xsection, _ in cases():
+            spec = {'F': F, 'a': a, 'L': L, 'support_type': support_type, 'material': MATERIAL, 'xsection': xsection}
+            submitted[jobs.submit(monte_carlo_spec, spec=spec, n_samples=1000, chunk_size=300, n_stations=0)] = (
+                beam_response_model(F, MATERIAL, xsection, a, L, support_type))
+        for id, model in submitted.items():
+            while jobs.status(id)['state'] != DONE:
+                if jobs.status(id)['state'] not in (QUEUED, RUNNING):
+                    return float('inf')
+                time.sleep(0.05)
+            result = jobs.result(id)
+            for name, (_, expected) in (('deflection', model.max_deflection()), ('von_mises', model.max_von_mises())):
+                error = max(error, abs(result[name]['max'] - abs(expected)) / (abs(expected) or 1.0))
+        support_type, L, a, xsection, _ = next(iter(cases()))
+        spec = {'F': F, 'a': a, 'L': L, 'support_type': support_type, 'material': MATERIAL, 'xsection': xsection}
+        id = jobs.submit(monte_carlo_spec, spec=spec, n_samples=1000, chunk_size=300, n_stations=0)
+        if id not in submitted or jobs.status(id)['state'] != DONE:
+            error = float('inf')
+        jobs.shutdown()
+
+    # a new job submitted by many servers of the same directory at once starts once
+    with tempfile.TemporaryDirectory() as path:
+        managers = [JobManager(path, workers=1) for _ in range(16)]
+        barrier = threading.Barrier(len(managers))
+
+        def submit(jobs):
+            barrier.wait()
+            jobs.submit(monte_carlo_spec, spec=spec, n_samples=1000, chunk_size=300, n_stations=0)
+
+        threads = [threading.Thread(target=submit, args=(jobs,)) for jobs in managers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if sum(len(jobs._futures) for jobs in managers) != 1:
+            error = float('inf')
+        for jobs in managers:
+            jobs.shutdown()
+
+    # a cancelled job submitted again by many servers at once, while its worker still winds down, starts once
+    # more, and the new run is not cancelled with the old one
+    with tempfile.TemporaryDirectory() as path:
+        managers = [JobManager(path, workers=1) for _ in range(17)]
+        barrier = threading.Barrier(len(managers) - 1)
+
+        def submit(jobs):
+            barrier.wait()
+            jobs.submit(monte_carlo_spec, spec=spec, n_samples=10 ** 8, chunk_size=1000, n_stations=0)
+
+        deadline = time.time() + 60
+        id = managers[0].submit(monte_carlo_spec, spec=spec, n_samples=10 ** 8, chunk_size=1000, n_stations=0)
+        while managers[0].status(id)['state'] != RUNNING and time.time() < deadline:
+            time.sleep(0.05)
+        managers[0].cancel(id)
+        threads = [threading.Thread(target=submit, args=(jobs,)) for jobs in managers[1:]]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if sum(len(jobs._futures) for jobs in managers[1:]) != 1:
+            error = float('inf')
+        while (managers[0]._futures or managers[0].status(id)['state'] != RUNNING) and time.time() < deadline:
+            time.sleep(0.05)
+        if managers[0]._futures or managers[0].status(id)['state'] != RUNNING:
+            error = float('inf')
+        managers[0].cancel(id)
+        for jobs in managers:
+            jobs.shutdown()
+    return error
+
+
+# beam_app.update_uncertainty: the Cancel button stops a running background job, the callback shows that it is
+# cancelling while the job winds down, and the next poll reports it cancelled. The error is 0 or inf.
+def check_uncertainty_cancel():
+    import tempfile
+    import time
+    import beam_app
+    from dash._callback_context import context_value
+    from dash._utils import AttributeDict
+    from beam_jobs import CANCELLED, RUNNING, JobManager
+    from beam_uncertainty import monte_carlo_spec
+
+    def callback(trigger, job):
+        context_value.set(AttributeDict(triggered_inputs=[{'prop_id': trigger, 'value': 1}]))
+        return beam_app.update_uncertainty.__wrapped__(*[None] * 25, job=job)
+
+    def wait(id, running, deadline):
+        while (jobs.status(id)['state'] == RUNNING) != running and time.time() < deadline:
+            time.sleep(0.05)
+
+    support_type, L, a, xsection, _ = next(iter(cases()))
+    spec = {'F': F, 'a': a, 'L': L, 'support_type': support_type, 'material': MATERIAL, 'xsection': xsection}
+    previous = beam_app.JOBS
+    with tempfile.TemporaryDirectory() as path:
+        beam_app.JOBS = jobs = JobManager(path, workers=1)
+        try:
+            deadline = time.time() + 60
+            job = {'id': jobs.submit(monte_carlo_spec, spec=spec, n_samples=10 ** 8, chunk_size=1000, n_stations=0),
+                   'spec': spec}
+            wait(job['id'], True, deadline)
+            _, message, kept, disabled = callback('uncertainty-cancel.n_clicks', job)
+            cancelling = message.children == 'Cancelling...' and kept == job and not disabled
+            wait(job['id'], False, deadline)
+            _, message, kept, disabled = callback('uncertainty-poll.n_intervals', job)
+            cancelled = jobs.status(job['id'])['state'] == CANCELLED and kept is None and disabled and \
+                message.children == 'The uncertainty analysis was cancelled.'
+        finally:
+            jobs.shutdown()
+            beam_app.JOBS = previous
+    return 0.0 if cancelling and cancelled else float('inf')
+
+
+# beam_modal: the static deflection summed over 2000 modes against the reference and the finite element
+# model, the mode shapes orthonormal over the beam (Gauss-Legendre quadrature) and the transient response to a
+# damped step load against the closed form step response of every mode
+def check_modal():
+    from beam_fem import BeamModel
+    from beam_modal import load_history, modal_model
+    error = 0.0
+    for support_type, L, a, xsection, x in cases():
+        static = modal_model(support_type, L, xsection, MATERIAL, 2000).static(F, a, x)
+        error = max(error, _errors({'deflection': static}, _reference(x, xsection, a, L, support_type),
+                                   ('deflection',)))
+    for support_type, L, position in itertools.product(('fixed_fixed', 'propped_cantilever'), LENGTHS, POSITIONS):
+        a, x = position * L, np.linspace(0.0, L, 201)
+        model = modal_model(support_type, L, XSECTIONS[0], MATERIAL, 2000)
+        expected = BeamModel.from_support_type(support_type, L, MATERIAL, XSECTIONS[0]).solve(
+            [PointLoad(F, a)]).evaluate(x)
+        error = max(error, common.curve_error(model.static(F, a, x), expected['deflection']))
+
+    nodes, weights = np.polynomial.legendre.leggauss(16)
+    for support_type in ('cantilever', 'simply_supported', 'fixed_fixed', 'propped_cantilever'):
+        L = 10.0
+        model = modal_model(support_type, L, XSECTIONS[1], MATERIAL)
+        panels = np.linspace(0.0, L, 201)
+        h = np.diff(panels)[:, None] / 2
+        x = ((panels[:-1, None] + panels[1:, None]) / 2 + h * nodes).ravel()
+        shapes = model.shapes(x)
+        gram = (shapes * (model.mass * h * weights).ravel()) @ shapes.T
+        error = max(error, np.max(np.abs(gram - np.eye(model.n_modes))))
+
+        damping = 0.05
+        t, load, a = load_history('step', F, 0.37 * L, L, 0.5, 5001)
+        q = model.modal_response(load, t[1], a, damping)
+        omega, omega_d = model.omega, model.omega * np.sqrt(1 - damping ** 2)
+        step = (1 - np.exp(-damping * omega * t[:, None]) * (np.cos(omega_d * t[:, None]) + damping * omega / omega_d
+                                                              * np.sin(omega_d * t[:, None]))) / omega ** 2
+        error = max(error, common.curve_error(q, F * model.shapes([a])[:, 0] * step))
+    return error
+
+
+CHECKS = {
+    'array_kernels': check_array_kernels,
+    'scalar_functions': check_scalar_functions,
+    'response_model': check_response_model,
+    'load_case': check_load_case,
+    'batch_peaks': check_batch_peaks,
+    'api': check_api,
+    'unit_curves': check_unit_curves,
+    'design': check_design,
+    'uncertainty': check_uncertainty,
+    'fem': check_fem,
+    'store': check_store,
+    'stress_field': check_stress_field,
+    'jobs': check_jobs,
+    'uncertainty_cancel': check_uncertainty_cancel,
+    'materials': check_materials,
+    'modal': check_modal,
+}
+
+
+# {check: {'error', 'tolerance', 'ok'}}
+def run(tolerance=TOLERANCE):
+    results = {}
+    for name, check in CHECKS.items():
+        error = check()
+        results[name] = {'error': error, 'tolerance': tolerance, 'ok': bool(error <= tolerance)}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Optimized paths against the original closed forms.')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    args = parser.parse_args(argv)
+    results = run(args.tolerance)
+    print(json.dumps(results, indent=2))
+    return 0 if all(result['ok'] for result in results.values()) else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,49 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+# Shared helpers of the benchmark scripts. Importing this module puts the repository root on sys.path, so the
+# scripts run from anywhere (python benchmarks/run.py).
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+# Best time of one call of func in seconds. Each of the repeat measurements runs func enough times to last at
+# least min_time, and the fastest is kept since slower runs only add noise from the rest of the machine.
+def timed(func, repeat=5, min_time=0.02):
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 10 ** 6:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    best = elapsed
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / number
+
+
+# One benchmark result. better is 'lower' or 'higher' for the results compared against the baseline, None for
+# the ones only recorded.
+def metric(value, unit, better='lower'):
+    return {'value': float(value), 'unit': unit, 'better': better}
+
+
+# max |actual - expected| relative to scale, by default the largest |expected| of the curve (1 when the curve
+# is all zeros), so round-off around the zero crossings of a curve does not count as an error
+def curve_error(actual, expected, scale=None):
+    actual, expected = np.asarray(actual, dtype=float), np.asarray(expected, dtype=float)
+    if not expected.size:
+        return 0.0
+    if scale is None:
+        scale = np.max(np.abs(expected))
+    return float(np.max(np.abs(actual - expected)) / (scale or 1.0))
@@ -0,0 +1,95 @@
+import math
+
+# The closed forms as they were first written, one station at a time in plain Python, kept here as the
+# reference the optimized paths are checked against (see check_accuracy.py). Only the rectangular and circular
+# sections of the original app are supported. Do not optimize this file.
+
+E = {
+    'aluminum': 68.0 * 10 ** 9,
+    'wood': 10.0 * 10 ** 9,
+    'titanium': 116.0 * 10 ** 9,
+    'steel': 200.0 * 10 ** 9, }
+
+
+def deflection_EI(F, x, a, L, support_type):
+    x = max(0, min(x, L))
+    if support_type == 'cantilever':
+        if 0.0 <= x < a:
+            return (-F * x ** 2 * (3 * a - x)) / 6
+        return (-F * a ** 2 * (3 * x - a)) / 6
+    b = L - a
+    if b == 0:
+        return 0.0
+    if 0.0 <= x < a:
+        return (-F * b * x * (L ** 2 - x ** 2 - (L - a) ** 2)) / (6 * L)
+    return (-F * b * (((L / b) * (x - a) ** 3) + ((L ** 2 - b ** 2) * x) - (x ** 3))) / (6 * L)
+
+
+def shear_force(F, x, a, L, support_type):
+    x = max(0, min(x, L))
+    if support_type == 'cantilever':
+        return F
+    b = L - a
+    if 0.0 <= x <= a:
+        return (F * b) / L
+    return (-F * a) / L
+
+
+def bending_moment(F, x, a, L, support_type):
+    x = max(0, min(x, L))
+    if support_type == 'cantilever':
+        return -F * (L - x)
+    b = L - a
+    M_max = (F * a * b) / L
+    if a == 0.0:
+        return 0.0
+    elif 0.0 <= x <= a:
+        return (x / a) * M_max
+    return M_max * ((-(x - a) / b) + 1)
+
+
+def calc_I(xsection):
+    if xsection['type'] == 'rectangular':
+        return (xsection['b'] * xsection['h'] ** 3) / 12
+    return (math.pi * xsection['r'] ** 4) / 4
+
+
+def calc_A(xsection):
+    if xsection['type'] == 'rectangular':
+        return xsection['b'] * xsection['h']
+    return math.pi * xsection['r'] ** 2
+
+
+def calc_c(xsection):
+    if xsection['type'] == 'rectangular':
+        return 0.5 * xsection['h']
+    return xsection['r']
+
+
+def deflection(F, x, material, xsection, a, L, support_type):
+    return deflection_EI(F, x, a, L, support_type) / (E[material] * calc_I(xsection))
+
+
+def shear_stress(F, x, xsection, a, L, support_type):
+    return shear_force(F, x, a, L, support_type) / calc_A(xsection)
+
+
+def bending_stress(F, x, xsection, a, L, support_type):
+    return bending_moment(F, x, a, L, support_type) * calc_c(xsection) / calc_I(xsection)
+
+
+def von_mises(F, x, xsection, a, L, support_type):
+    return (bending_stress(F, x, xsection, a, L, support_type) ** 2 +
+            3 * shear_stress(F, x, xsection, a, L, support_type) ** 2) ** 0.5
+
+
+# every quantity of one beam at the stations xs, as lists
+def evaluate(F, xs, material, xsection, a, L, support_type):
+    return {
+        'deflection': [deflection(F, x, material, xsection, a, L, support_type) for x in xs],
+        'shear_force': [shear_force(F, x, a, L, support_type) for x in xs],
+        'bending_moment': [bending_moment(F, x, a, L, support_type) for x in xs],
+        'shear_stress': [shear_stress(F, x, xsection, a, L, support_type) for x in xs],
+        'bending_stress': [bending_stress(F, x, xsection, a, L, support_type) for x in xs],
+        'von_mises': [von_mises(F, x, xsection, a, L, support_type) for x in xs],
+    }
@@ -0,0 +1,136 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+
+import numpy as np
+
+import bench_kernels
+import bench_update_graph
+import check_accuracy
+import common
+
+# Runs the benchmarks and the accuracy checks, saves the results to a JSON file and compares them with a
+# stored baseline:
+#   python benchmarks/run.py                              results in benchmarks/results.json, compared to
+#                                                         benchmarks/baseline.json
+#   python benchmarks/run.py --save-baseline --runs 3     stores the median of 3 runs as the new baseline
+#
+# Every result is {'value', 'unit', 'better'}. A result regresses when it is worse than the baseline by more
+# than the threshold (1.0 is twice as slow or large, or half as much for the results where higher is better).
+# The exit status is 1 when a result regresses or an accuracy check fails.
+#
+# Times depend on the machine, so the baseline only means something on the machine that recorded it.
+# Regenerate it with --save-baseline after changing machines, and after intended changes in performance.
+# The default threshold suits shared virtual machines, whose speed was seen to change by 1.75x for minutes at a
+# time. On a dedicated machine a threshold of 0.2 or less is practical.
+
+BASELINE = os.path.join(common.ROOT, 'benchmarks', 'baseline.json')
+RESULTS = os.path.join(common.ROOT, 'benchmarks', 'results.json')
+THRESHOLD = 1.0
+
+
+def machine():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def run(repeat=15, include_import=False, runs=1):
+    if runs > 1:
+        return _median([run(repeat, include_import) for _ in range(runs)])
+    metrics = {}
+    metrics.update(bench_kernels.run(repeat=repeat))
+    metrics.update(bench_update_graph.run(repeat=repeat))
+    if include_import:
+        import bench_import
+        for name, result in bench_import.run(repeat).items():
+            metrics['import.{}.time'.format(name)] = common.metric(result['seconds'] * 1e3, 'ms')
+            metrics['import.{}.rss'.format(name)] = common.metric(result['rss_mb'], 'MB')
+    return {
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'machine': machine(),
+        'metrics': metrics,
+        'accuracy': check_accuracy.run(),
+    }
+
+
+# one result per metric, the median over several runs
+def _median(runs):
+    results = runs[-1]
+    for name, result in results['metrics'].items():
+        result['value'] = float(np.median([r['metrics'][name]['value'] for r in runs]))
+    results['runs'] = len(runs)
+    return results
+
+
+# [(name, baseline value, value, relative change)] of the results worse than the baseline by more than threshold
+def regressions(results, baseline, threshold=THRESHOLD):
+    found = []
+    for name, result in sorted(results['metrics'].items()):
+        before = baseline['metrics'].get(name)
+        if before is None or result['better'] is None or not before['value']:
+            continue
+        change = result['value'] / before['value'] - 1
+        if (result['better'] == 'lower' and change > threshold) or \
+                (result['better'] == 'higher' and change < -threshold / (1 + threshold)):
+            found.append((name, before['value'], result['value'], change))
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks and accuracy checks, compared with a baseline.')
+    parser.add_argument('-o', '--output', default=RESULTS, help='results file (default benchmarks/results.json)')
+    parser.add_argument('--baseline', default=BASELINE, help='baseline file (default benchmarks/baseline.json)')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help='allowed relative regression (default {})'.format(THRESHOLD))
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as the new baseline')
+    parser.add_argument('--repeat', type=int, default=15, help='measurements per result, the best is kept')
+    parser.add_argument('--runs', type=int, default=1,
+                        help='run everything several times and keep the median of each result (use 3 or more '
+                             'when saving a baseline)')
+    parser.add_argument('--import-time', action='store_true', help='include the import benchmarks')
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat, args.import_time, args.runs)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+    for name, result in results['metrics'].items():
+        print('{:<48} {:>14.4g} {}'.format(name, result['value'], result['unit']))
+
+    status = 0
+    for name, check in results['accuracy'].items():
+        print('accuracy {:<39} {:>14.3g} {}'.format(name, check['error'], 'ok' if check['ok'] else 'FAILED'))
+        if not check['ok']:
+            status = 1
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print('Saved the baseline to ' + args.baseline)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('machine') != results['machine']:
+            print('Warning: the baseline was recorded on another machine: {}'.format(baseline.get('machine')))
+        found = regressions(results, baseline, args.threshold)
+        for name, before, after, change in found:
+            print('REGRESSION {}: {:.4g} -> {:.4g} ({:+.0%})'.format(name, before, after, change))
+        if found:
+            status = 1
+        else:
+            print('No regression beyond {:.0%} against {}'.format(args.threshold, args.baseline))
+    else:
+        print('No baseline at {}, run with --save-baseline to create one'.format(args.baseline))
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())